@@ -1,14 +1,18 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
+from config import Config
 from routes.user_routes import users_bp
 from routes.post_routes import posts_bp
+from routes.cache_routes import cache_bp
 
 app = Flask(__name__)
+app.config.from_object(Config)
 CORS(app)
 
 # Register the blueprints
 app.register_blueprint(users_bp)
 app.register_blueprint(posts_bp)
+app.register_blueprint(cache_bp)
 
 
 @app.route('/')
@@ -0,0 +1,61 @@
+"""
+Compare creating records one POST at a time with the batch endpoints.
+
+Usage: python benchmarks/bench_batch_create.py [count] [batch_size]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+
+
+def users(prefix, count):
+    """Build `count` user payloads with unique emails"""
+    return [{"name": f"User {i}", "email": f"{prefix}{i}@example.com"} for i in range(count)]
+
+
+def posts(count):
+    """Build `count` post payloads for the sample users"""
+    return [{"title": f"Post {i}", "content": "Lorem ipsum " * 8, "user_id": i % 2 + 1}
+            for i in range(count)]
+
+
+def timed(run):
+    """Return the seconds taken by `run`"""
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    client = app.test_client()
+    data_store.clear()
+    data_store._initialize_sample_data()
+
+    def single(url, items):
+        for item in items:
+            assert client.post(url, json=item).status_code == 201
+
+    def batched(url, items):
+        for start in range(0, len(items), batch_size):
+            assert client.post(url, json=items[start:start + batch_size]).status_code == 201
+
+    print(f"{count} records, batches of {batch_size}")
+    print(f"{'endpoint':>8} {'single/s':>12} {'batch/s':>12} {'speedup':>8}")
+    for name, url, single_items, batch_items in (
+            ("users", "/api/users", users("single", count), users("batch", count)),
+            ("posts", "/api/posts", posts(count), posts(count))):
+        one = timed(lambda: single(url + "/", single_items))
+        many = timed(lambda: batched(url + "/batch", batch_items))
+        print(f"{name:>8} {count / one:>12.0f} {count / many:>12.0f} {one / many:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare reassigning and deleting posts one request at a time with the bulk
+post endpoints.
+
+Usage: python benchmarks/bench_bulk_update.py [count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+
+
+def fill(count):
+    """Reset the store and give user 1 `count` posts; return their ids"""
+    data_store.clear()
+    data_store._initialize_sample_data()
+    posts = data_store.create_posts([(f"Post {i}", "Lorem ipsum", 1) for i in range(count)])
+    return [post.id for post in posts]
+
+
+def timed(run):
+    """Return the seconds taken by `run`"""
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    client = app.test_client()
+
+    def single_update(ids):
+        for post_id in ids:
+            client.put(f'/api/posts/{post_id}', json={"user_id": 2})
+
+    def single_delete(ids):
+        for post_id in ids:
+            client.delete(f'/api/posts/{post_id}')
+
+    print(f"{count} posts")
+    print(f"{'operation':>10} {'single ms':>10} {'bulk ms':>10} {'speedup':>8}")
+    for name, single, bulk_url, body in (
+            ("reassign", single_update, '/api/posts/batch/update',
+             {"filter": {"user_id": 1}, "patch": {"user_id": 2}}),
+            ("delete", single_delete, '/api/posts/batch/delete', {"filter": {"user_id": 1}})):
+        ids = fill(count)
+        one = timed(lambda: single(ids))
+        fill(count)
+        many = timed(lambda: client.post(bulk_url, json=body))
+        print(f"{name:>10} {one * 1e3:>10.1f} {many * 1e3:>10.1f} {one / many:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare the dict and columnar post storages: memory, per-user filters/counts.
+
+Each storage runs in a fresh subprocess so RSS figures are isolated.
+
+Usage: python benchmarks/bench_columnar.py [post_count]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore, POST_STORAGES  # noqa: E402
+
+USERS = 1000
+
+
+def rss_bytes():
+    """Return the current resident set size of this process"""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def timed(func, repeat=50):
+    """Return average microseconds per call"""
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(i % USERS + 1)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def measure(storage, count):
+    store = DataStore(post_storage=storage)
+    store.clear()
+    for i in range(USERS):
+        store.create_user(f"User {i}", f"user{i}@example.com")
+    before = rss_bytes()
+    for i in range(count):
+        store.create_post(f"Post {i}", f"Content of post {i}", i % USERS + 1)
+    after = rss_bytes()
+
+    filter_us = timed(store.get_posts_by_user)
+    count_us = timed(store.count_posts_by_user)
+    print(f"{storage:>9} {(after - before) / count:>10.1f} {after / 2**20:>9.1f} "
+          f"{filter_us:>12.1f} {count_us:>11.1f}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count:,} posts over {USERS} users")
+    print(f"{'storage':>9} {'bytes/rec':>10} {'RSS MiB':>9} {'filter us':>12} {'count us':>11}")
+    for storage in POST_STORAGES:
+        subprocess.run([sys.executable, __file__, '--child', storage, str(count)], check=True)
+
+
+if __name__ == '__main__':
+    main()
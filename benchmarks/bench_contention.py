@@ -0,0 +1,67 @@
+"""
+Measure DataStore throughput under contention as the thread count grows.
+
+Each thread runs a mix of 90% reads (get_post, get_posts_page, get_user) and
+10% writes (create_post, update_post, delete_post).
+
+Usage: python benchmarks/bench_contention.py [ops_per_thread]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+USERS = 100
+POSTS = 10_000
+
+
+def worker(store, ops, seed):
+    rng = random.Random(seed)
+    for _ in range(ops):
+        roll = rng.random()
+        post_id = rng.randint(1, POSTS)
+        if roll < 0.5:
+            store.get_post(post_id)
+        elif roll < 0.8:
+            store.get_posts_page(after=post_id, limit=20)
+        elif roll < 0.9:
+            store.get_user(rng.randint(1, USERS))
+        elif roll < 0.95:
+            store.update_post(post_id, title="Updated")
+        elif roll < 0.98:
+            store.create_post("New", "Content", rng.randint(1, USERS))
+        else:
+            store.delete_post(post_id)
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{'threads':>8} {'ops/s':>12}")
+    for threads in THREAD_COUNTS:
+        store = DataStore()
+        store.clear()
+        for i in range(USERS):
+            store.create_user(f"User {i}", f"user{i}@example.com")
+        for i in range(POSTS):
+            store.create_post(f"Post {i}", "Content", i % USERS + 1)
+
+        workers = [threading.Thread(target=worker, args=(store, ops, seed))
+                   for seed in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"{threads:>8} {threads * ops / elapsed:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
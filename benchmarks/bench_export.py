@@ -0,0 +1,55 @@
+"""
+Compare GET /api/posts/ with the streamed NDJSON and CSV exports: time and
+peak traced memory to produce the whole body.
+
+Usage: python benchmarks/bench_export.py [post_count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+from response_cache import response_cache  # noqa: E402
+
+CASES = [
+    ("list", "/api/posts/", {}),
+    ("ndjson", "/api/posts/export", {}),
+    ("csv", "/api/posts/export?format=csv", {}),
+    ("ndjson+gzip", "/api/posts/export", {"Accept-Encoding": "gzip"}),
+]
+
+
+def fill(count):
+    """Fill the store with `count` posts spread over 100 users"""
+    data_store.clear()
+    users = data_store.create_users([(f"User {i}", f"user{i}@example.com") for i in range(100)])
+    data_store.create_posts([(f"Post {i}", "Lorem ipsum dolor sit amet " * 4, users[i % 100].id)
+                             for i in range(count)])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    fill(count)
+    response_cache.resize(0)
+    client = app.test_client()
+    print(f"{count} posts")
+    print(f"{'case':>12} {'seconds':>9} {'MiB out':>9} {'peak MiB':>9}")
+    for name, url, headers in CASES:
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get(url, headers=headers, buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:>12} {elapsed:>9.2f} {size / 2**20:>9.1f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare full GET /api/posts/ responses with sparse `fields=id,title` ones:
+bytes on the wire and time per request with the response cache off, with
+and without the entity JSON cache. The first request of each mode (which
+fills the entity cache) is timed separately from the steady state.
+
+Usage: python benchmarks/bench_fields.py [post_count] [requests]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+from response_cache import response_cache  # noqa: E402
+
+URLS = ["/api/posts/", "/api/posts/?fields=id,title"]
+
+
+def fill(count):
+    """Fill the store with `count` posts of a few hundred bytes each"""
+    data_store.clear()
+    users = data_store.create_users([(f"User {i}", f"user{i}@example.com") for i in range(100)])
+    data_store.create_posts([(f"Post {i}", "Lorem ipsum dolor sit amet " * 12, users[i % 100].id)
+                             for i in range(count)])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    fill(count)
+    client = app.test_client()
+    # Measure building the body, not replaying cached bytes
+    response_cache.resize(0)
+    print(f"{count} posts, {requests} requests per mode")
+    print(f"{'entity cache':>12} {'url':>28} {'KiB':>8} {'first ms':>9} {'ms/req':>8}"
+          f" {'vs full':>8}")
+    for entity in (True, False):
+        app.config['ENTITY_JSON_CACHE'] = entity
+        full = None
+        for url in URLS:
+            started = time.perf_counter()
+            size = len(client.get(url).data)
+            first = time.perf_counter() - started
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(url)
+            per_request = (time.perf_counter() - started) / requests
+            full = full or per_request
+            print(f"{'on' if entity else 'off':>12} {url:>28} {size / 1024:>8,.0f}"
+                  f" {first * 1e3:>9.2f} {per_request * 1e3:>8.2f} {per_request / full:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
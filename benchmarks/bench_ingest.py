@@ -0,0 +1,90 @@
+"""
+Measure NDJSON import throughput for POST /api/posts/import.
+
+The request body is generated on the fly as it is read, so the client never
+holds it in memory; peak RSS growth then reflects the store's own growth
+plus the importer's bounded buffers.
+
+Usage: python benchmarks/bench_ingest.py [post_count] [chunk_size]
+"""
+
+import io
+import json
+import os
+import resource
+import sys
+import time
+
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+
+USERS = 100
+
+
+def line(i):
+    """Return the NDJSON line for post `i`"""
+    return (b'{"title": "Post %d", "content": "Lorem ipsum dolor sit amet", "user_id": %d}\n'
+            % (i, i % USERS + 1))
+
+
+class GeneratedBody(io.RawIOBase):
+    """Readable stream producing `count` NDJSON lines on demand"""
+
+    def __init__(self, count):
+        self._lines = (line(i) for i in range(count))
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self._pending) < len(buffer):
+            chunk = next(self._lines, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def post_stream(body, body_size):
+    """POST a readable body to the posts import endpoint and return the report"""
+    environ = EnvironBuilder('/api/posts/import', method='POST',
+                             content_type='application/x-ndjson').get_environ()
+    environ['wsgi.input'] = body
+    environ['CONTENT_LENGTH'] = str(body_size)
+    response, _, _ = run_wsgi_app(app, environ, buffered=True)
+    return json.loads(b''.join(response))
+
+
+def max_rss_mib():
+    """Return the peak resident set size of this process in MiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app.config['IMPORT_CHUNK_SIZE'] = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    body_size = sum(len(line(i)) for i in range(count))
+    print(f"{count} posts ({body_size / 2**20:.1f} MiB), chunks of {app.config['IMPORT_CHUNK_SIZE']}")
+    print(f"{'validator':>12} {'records/s':>12} {'seconds':>9} {'peak RSS MiB':>13}")
+    for validator in ('marshmallow', 'compiled'):
+        app.config['VALIDATOR_BACKEND'] = validator
+        data_store.clear()
+        for i in range(USERS):
+            data_store.create_user(f"User {i}", f"user{i}@example.com")
+        started = time.perf_counter()
+        report = post_stream(GeneratedBody(count), body_size)
+        elapsed = time.perf_counter() - started
+        assert report["imported"] == count, report
+        print(f"{validator:>12} {count / elapsed:>12.0f} {elapsed:>9.2f} {max_rss_mib():>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
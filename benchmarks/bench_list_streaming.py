@@ -0,0 +1,58 @@
+"""
+Compare buffered and streamed GET /api/posts/ responses.
+
+Reports time-to-first-byte, total time and peak traced memory for each mode.
+
+Usage: python benchmarks/bench_list_streaming.py [post_count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+
+
+def fill(count):
+    """Fill the store with `count` posts spread over 100 users"""
+    data_store.clear()
+    for i in range(100):
+        data_store.create_user(f"User {i}", f"user{i}@example.com")
+    for i in range(count):
+        data_store.create_post(f"Post {i}", "Lorem ipsum dolor sit amet " * 4, i % 100 + 1)
+
+
+def measure(client, url):
+    """Return (ttfb, total, peak bytes) for fetching `url`"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    ttfb = time.perf_counter() - started
+    for _ in chunks:
+        pass
+    total = time.perf_counter() - started
+    response.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    fill(count)
+    client = app.test_client()
+    print(f"{count} posts")
+    print(f"{'mode':>10} {'ttfb ms':>10} {'total ms':>10} {'peak MiB':>10}")
+    for mode, url in (('buffered', '/api/posts/'), ('streamed', '/api/posts/?stream=true')):
+        ttfb, total, peak = measure(client, url)
+        print(f"{mode:>10} {ttfb * 1e3:>10.1f} {total * 1e3:>10.1f} {peak / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Report memory per record for the slotted User/Post models versus equivalent
+classes with a per-instance __dict__ (the previous model layout).
+
+Each configuration runs in a fresh subprocess so RSS figures are isolated.
+
+Usage: python benchmarks/bench_model_memory.py [count ...]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models.post import Post  # noqa: E402
+
+
+class DictPost:
+    """Post layout before __slots__: attributes live in a per-instance dict."""
+
+    def __init__(self, id, title, content, user_id):
+        self.id = id
+        self.title = title
+        self.content = content
+        self.user_id = user_id
+        self._json = None
+
+
+LAYOUTS = {'dict': DictPost, 'slots': Post}
+
+
+def rss_bytes():
+    """Return the current resident set size of this process"""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def measure(layout, count):
+    """Build a `count`-post id->post dict and print bytes/record and total RSS"""
+    cls = LAYOUTS[layout]
+    # Share the string payloads so the figures isolate per-object overhead
+    title, content = "Post title", "Post content " * 8
+    before = rss_bytes()
+    posts = {i: cls(i, title, content, i % 1000) for i in range(count)}
+    after = rss_bytes()
+    print(f"{layout:>6} {count:>10,} {(after - before) / count:>12.1f} {after / 2**20:>10.1f}")
+    return posts
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+
+    counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'layout':>6} {'records':>10} {'bytes/rec':>12} {'RSS MiB':>10}")
+    for count in counts:
+        for layout in LAYOUTS:
+            subprocess.run([sys.executable, __file__, '--child', layout, str(count)], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Measure GET /api/posts/ throughput with no cache, with the entity JSON cache,
+and with the versioned response cache on top of it.
+
+Usage: python benchmarks/bench_post_list_cache.py [post_count] [requests]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+from response_cache import response_cache  # noqa: E402
+
+
+def fill(count):
+    """Fill the store with `count` posts spread over 100 users"""
+    data_store.clear()
+    for i in range(100):
+        data_store.create_user(f"User {i}", f"user{i}@example.com")
+    for i in range(count):
+        data_store.create_post(f"Post {i}", "Lorem ipsum dolor sit amet " * 4, i % 100 + 1)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    fill(count)
+    client = app.test_client()
+    print(f"{count} posts, {requests} requests per mode")
+    print(f"{'cache':>9} {'req/s':>10} {'ms/req':>10}")
+    budget = response_cache.max_bytes
+    for mode, entity, response in (("off", False, 0), ("entity", True, 0), ("response", True, budget)):
+        app.config['ENTITY_JSON_CACHE'] = entity
+        response_cache.resize(response)
+        client.get('/api/posts/')  # warm up (fills the caches when enabled)
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get('/api/posts/')
+        elapsed = time.perf_counter() - started
+        print(f"{mode:>9} {requests / elapsed:>10.1f} {elapsed / requests * 1e3:>10.2f}")
+    print(response_cache.stats())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare index-backed post queries with filtering the full post list, as a
+client of the unfiltered endpoint would, and print the plan of each query.
+
+Usage: python benchmarks/bench_post_query.py [post_count]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+
+USERS = 1000
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+QUERIES = [
+    ("two users", {"user_ids": [7, 700], "limit": 100}),
+    ("id range", {"min_id": 500_000, "max_id": 501_000}),
+    ("title prefix", {"title_prefix": "delta 12", "limit": 100}),
+    ("user + prefix", {"user_ids": [42], "title_prefix": "golf", "sort": "-id"}),
+    ("sort by title", {"sort": "title", "limit": 50}),
+    ("users by title", {"user_ids": list(range(1, 51)), "sort": "-title", "limit": 50}),
+]
+
+
+def scan(posts, user_ids=None, min_id=None, max_id=None, title_prefix=None,
+         sort='id', limit=None):
+    """Baseline: filter and sort the full post list"""
+    prefix = title_prefix.lower() if title_prefix else None
+    users = set(user_ids) if user_ids else None
+    found = [post for post in posts
+             if (users is None or post.user_id in users)
+             and (min_id is None or post.id >= min_id)
+             and (max_id is None or post.id <= max_id)
+             and (prefix is None or post.title.lower().startswith(prefix))]
+    if sort.endswith('title'):
+        found.sort(key=lambda post: (post.title.lower(), post.id))
+    if sort.startswith('-'):
+        found.reverse()
+    return found[:limit]
+
+
+def best_time(run, repeat):
+    """Return the result of `run` and its best time over `repeat` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(3)
+    store = DataStore(search_index=False)
+    store.clear()
+    users = store.create_users([(f"User {i}", f"user{i}@example.com") for i in range(USERS)])
+    started = time.perf_counter()
+    for start in range(0, count, 10_000):
+        store.create_posts([(f"{rng.choice(WORDS).title()} {rng.randrange(100_000)}", "Body",
+                             users[rng.randrange(USERS)].id)
+                            for _ in range(start, min(start + 10_000, count))])
+    print(f"{count:,} posts created in {time.perf_counter() - started:.1f} s")
+
+    print(f"{'query':>15} {'rows':>6} {'scan ms':>9} {'index ms':>9} {'speedup':>8}  plan")
+    for label, query in QUERIES:
+        (posts, plan), index_time = best_time(lambda: store.query_posts(**query, explain=True), 5)
+        expected, scan_time = best_time(lambda: scan(store.get_all_posts(), **query), 1)
+        assert [post.id for post in posts] == [post.id for post in expected]
+        print(f"{label:>15} {len(posts):>6} {scan_time * 1000:>9,.0f} {index_time * 1000:>9.2f}"
+              f" {scan_time / index_time:>7,.0f}x  {plan}")
+
+
+if __name__ == '__main__':
+    main()
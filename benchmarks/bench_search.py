@@ -0,0 +1,100 @@
+"""
+Compare full-text post search through the inverted index with a linear scan
+of every post, for rare, common and multi-term queries.
+
+Posts draw their words from a Zipf-distributed vocabulary, so a few terms
+appear in most posts and most terms in very few. The index is timed with
+NumPy (a requirement) and with the pure-Python fallback.
+
+Usage: python benchmarks/bench_search.py [post_count]
+"""
+
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search  # noqa: E402
+from data_store import DataStore  # noqa: E402
+from search import tokenize  # noqa: E402
+
+VOCABULARY = 20_000
+QUERIES = [
+    ("rare", "w15000"),
+    ("medium", "w300"),
+    ("common", "w1"),
+    ("two terms", "w20 w40"),
+    ("three terms", "w5 w50 w500"),
+]
+REPEAT = 20
+
+
+def fill(store, count):
+    """Fill `store` with `count` posts of 5-word titles and 40-word contents"""
+    rng = random.Random(42)
+    words = [f"w{i}" for i in range(VOCABULARY)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(VOCABULARY)))
+    users = store.create_users([(f"User {i}", f"user{i}@example.com") for i in range(1000)])
+    for start in range(0, count, 10_000):
+        batch = []
+        for i in range(start, min(start + 10_000, count)):
+            text = rng.choices(words, cum_weights=cum_weights, k=45)
+            batch.append((' '.join(text[:5]), ' '.join(text[5:]), users[i % 1000].id))
+        store.create_posts(batch)
+
+
+def scan(store, query):
+    """Rank-free baseline: the ids of the posts containing every query term"""
+    terms = set(tokenize(query))
+    return [post.id for post in store.iter_posts()
+            if terms <= set(tokenize(post.title + ' ' + post.content))]
+
+
+def timed(run, repeat):
+    """Return the result of `run` and its best time over `repeat` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    store = DataStore(search_index=False)
+    store.clear()
+    started = time.perf_counter()
+    fill(store, count)
+    print(f"{count:,} posts, filled without index in {time.perf_counter() - started:.1f} s")
+
+    indexed = DataStore()
+    indexed.clear()
+    # The index is built by the first search; build it now so the fill pays
+    # for keeping it up to date
+    indexed.search_posts("warmup")
+    started = time.perf_counter()
+    fill(indexed, count)
+    print(f"{count:,} posts, filled with index in {time.perf_counter() - started:.1f} s")
+
+    numpy = search.numpy
+    print(f"{'query':>12} {'matches':>9} {'scan ms':>10} {'numpy ms':>10} {'python ms':>10}"
+          f" {'speedup':>8}")
+    for label, query in QUERIES:
+        (page, total), index_time = timed(lambda: indexed.search_posts(query, 0, 20), REPEAT)
+        search.numpy = None
+        (fallback_page, _), fallback_time = timed(
+            lambda: indexed.search_posts(query, 0, 20), REPEAT)
+        search.numpy = numpy
+        matched, scan_time = timed(lambda: scan(store, query), 1)
+        assert total == len(matched) and {post.id for post in page} <= set(matched)
+        assert [post.id for post in fallback_page] == [post.id for post in page]
+        print(f"{label:>12} {total:>9,} {scan_time * 1000:>10,.1f} {index_time * 1000:>10.3f}"
+              f" {fallback_time * 1000:>10.3f} {scan_time / index_time:>7,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Micro-benchmark of records serialized per second: marshmallow vs. compiled dumper.
+
+Usage: python benchmarks/bench_serializers.py [record_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.post import Post  # noqa: E402
+from models.user import User  # noqa: E402
+from schemas import post_schema, user_schema  # noqa: E402
+from serializers import get_dumper  # noqa: E402
+
+
+def rate(dump, records):
+    """Return records dumped per second"""
+    started = time.perf_counter()
+    for record in records:
+        dump(record)
+    return len(records) / (time.perf_counter() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    users = [User(id=i, name=f"User {i}", email=f"user{i}@example.com") for i in range(count)]
+    posts = [Post(id=i, title=f"Post {i}", content="Lorem ipsum " * 8, user_id=i % 100)
+             for i in range(count)]
+    print(f"{count} records")
+    print(f"{'schema':>8} {'marshmallow/s':>15} {'compiled/s':>15} {'speedup':>8}")
+    for name, schema, records in (('user', user_schema, users), ('post', post_schema, posts)):
+        slow = rate(schema.dump, records)
+        fast = rate(get_dumper(schema), records)
+        print(f"{name:>8} {slow:>15,.0f} {fast:>15,.0f} {fast / slow:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
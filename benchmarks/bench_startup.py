@@ -0,0 +1,65 @@
+"""
+Compare DataStore startup time: write-ahead log replay vs snapshot restore.
+
+Builds a store with the given number of posts (spread over 1,000 users), then
+times constructing a new store from the JSON log and from a binary snapshot.
+Stores use the default configuration; the search index is built by the
+first search rather than at startup, so that search is timed separately.
+
+Usage: python benchmarks/bench_startup.py [posts]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+
+USERS = 1000
+
+
+def timed(build):
+    """Return the store built by `build` and the seconds it took"""
+    started = time.perf_counter()
+    store = build()
+    return store, time.perf_counter() - started
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        wal_path = os.path.join(directory, 'store.wal')
+        snap_path = os.path.join(directory, 'store.snap')
+
+        source = DataStore(post_storage='columnar', wal_path=wal_path, wal_sync='none',
+                           search_index=False)
+        source.clear()
+        for i in range(USERS):
+            source.create_user(f"User {i}", f"user{i}@example.com")
+        for i in range(posts):
+            source.create_post(f"Post {i}", f"Content of post {i}", i % USERS + 1)
+        source.close()
+        source.save_snapshot(snap_path)
+        print(f"{posts:,} posts: log {os.path.getsize(wal_path) / 2**20:,.0f} MiB, "
+              f"snapshot {os.path.getsize(snap_path) / 2**20:,.0f} MiB")
+
+        runs = [
+            ('log replay (dict)', lambda: DataStore(wal_path=wal_path, wal_sync='none')),
+            ('snapshot (dict)', lambda: DataStore(snapshot_path=snap_path)),
+            ('snapshot (columnar)', lambda: DataStore(post_storage='columnar',
+                                                      snapshot_path=snap_path)),
+        ]
+        for label, build in runs:
+            store, elapsed = timed(build)
+            assert store.get_post(posts).title == f"Post {posts - 1}"
+            print(f"{label:>20}: {elapsed * 1000:>10,.1f} ms")
+        _, elapsed = timed(lambda: store.search_posts("content"))
+        store.close()
+        print(f"{'then first search':>20}: {elapsed * 1000:>10,.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
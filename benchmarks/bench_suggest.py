@@ -0,0 +1,77 @@
+"""
+Compare user type-ahead through the prefix index with filtering every user,
+and show what keeping the index costs per user create.
+
+Usage: python benchmarks/bench_suggest.py [user_count]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+
+PREFIXES = ["a", "ma", "mar", "mart", "martin.k"]
+LIMIT = 10
+REPEAT = 50
+
+
+def random_name(rng):
+    """Return a random two-word name"""
+    first = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))).title()
+    last = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))).title()
+    return f"{first} {last}"
+
+
+def scan(store, prefix):
+    """Baseline: filter the full user list, as a client would"""
+    prefix = prefix.lower()
+    matches = [user for user in store.get_all_users()
+               if user.name.lower().startswith(prefix) or user.email.lower().startswith(prefix)]
+    matches.sort(key=lambda user: min(key for key in (user.name.lower(), user.email.lower())
+                                      if key.startswith(prefix)))
+    return matches[:LIMIT]
+
+
+def best_time(run, repeat):
+    """Return the best time of `repeat` calls to `run`"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    store = DataStore()
+    store.clear()
+    users = []
+    for i in range(count):
+        name = random_name(rng)
+        users.append((name, f"{name.replace(' ', '.').lower()}.{i}@example.com"))
+    started = time.perf_counter()
+    store.create_users(users)
+    print(f"{count:,} users created in {time.perf_counter() - started:.1f} s")
+
+    create = best_time(lambda: store.create_user("Martin K", f"new{rng.random()}@example.com"), 200)
+    print(f"single create_user at this size: {create * 1e6:,.1f} us")
+
+    print(f"{'prefix':>10} {'scan ms':>10} {'index ms':>10} {'speedup':>9}")
+    for prefix in PREFIXES:
+        expected = [user.id for user in scan(store, prefix)]
+        assert [user.id for user in store.suggest_users(prefix, LIMIT)] == expected
+        scan_time = best_time(lambda: scan(store, prefix), 1)
+        index_time = best_time(lambda: store.suggest_users(prefix, LIMIT), REPEAT)
+        print(f"{prefix:>10} {scan_time * 1000:>10,.1f} {index_time * 1000:>10.3f}"
+              f" {scan_time / index_time:>8,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
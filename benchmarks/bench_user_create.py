@@ -0,0 +1,45 @@
+"""
+Benchmark user creation latency as the number of stored users grows.
+
+Each POST /api/users/ runs an email uniqueness check; with the email index
+this stays O(1), so latency should be flat across store sizes.
+
+Usage: python benchmarks/bench_user_create.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from data_store import data_store  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 300_000]
+SAMPLES = 500
+
+
+def fill(count):
+    """Grow the store to `count` users"""
+    start = len(data_store.get_all_users())
+    for i in range(start, count):
+        data_store.create_user(f"User {i}", f"user{i}@example.com")
+
+
+def main():
+    client = app.test_client()
+    data_store.clear()
+    print(f"{'users':>10} {'us/create':>12}")
+    for size in SIZES:
+        fill(size)
+        started = time.perf_counter()
+        for i in range(SAMPLES):
+            client.post('/api/users/',
+                        json={"name": "Bench", "email": f"bench{size}-{i}@example.com"})
+        elapsed = time.perf_counter() - started
+        print(f"{size:>10} {elapsed / SAMPLES * 1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Compare per-payload validation cost of Schema.load and the compiled loaders.
+
+Usage: python benchmarks/bench_validators.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas import (post_schema, post_update_schema,  # noqa: E402
+                     user_schema, user_update_schema)
+from validators import get_loader  # noqa: E402
+
+CASES = [
+    ('user', user_schema, {"name": "Bench User", "email": "bench@example.com"}, None),
+    ('user update', user_update_schema, {"email": "john@example.com"}, {'current_user_id': 1}),
+    ('post', post_schema, {"title": "Title", "content": "Content", "user_id": 1}, None),
+    ('post update', post_update_schema, {"title": "New title", "user_id": 2}, None),
+]
+
+
+def per_call(load, data, iterations):
+    """Return microseconds per load call"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        load(data)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"{'schema':>12} {'marshmallow us':>15} {'compiled us':>12} {'speedup':>8}")
+    for name, schema, data, context in CASES:
+        schema.context = context or {}
+        loader = get_loader(schema)
+        slow = per_call(schema.load, data, iterations)
+        fast = per_call(lambda payload: loader.load(payload, context), data, iterations)
+        print(f"{name:>12} {slow:>15.2f} {fast:>12.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measure DataStore write throughput with the write-ahead log in each sync mode.
+
+Usage: python benchmarks/bench_wal.py [writes_per_thread]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from wal import SYNC_MODES  # noqa: E402
+
+THREAD_COUNTS = [1, 8]
+
+
+def run(mode, threads, writes):
+    """Return writes per second for one configuration"""
+    with tempfile.TemporaryDirectory() as directory:
+        if mode == 'off':
+            store = DataStore()
+        else:
+            store = DataStore(wal_path=os.path.join(directory, 'store.wal'), wal_sync=mode)
+
+        def worker(offset):
+            for i in range(writes):
+                store.create_post(f"Post {offset}-{i}", "Content", 1)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        store.close()
+    return threads * writes / elapsed
+
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{'sync':>8} " + " ".join(f"{f'{t} thr w/s':>12}" for t in THREAD_COUNTS))
+    for mode in ('off',) + SYNC_MODES:
+        rates = [run(mode, threads, writes) for threads in THREAD_COUNTS]
+        print(f"{mode:>8} " + " ".join(f"{rate:>12,.0f}" for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure request throughput with 1, 2, 4 and 8 worker processes sharing the
+SQLite backend.
+
+Each worker is a separate process running the Flask app against the same
+database file, like gunicorn workers, and issues a mix of 80% user reads,
+10% post page reads and 10% post creates through the test client for a fixed
+time. The in-memory backend with one worker is shown for reference.
+
+Usage: python benchmarks/bench_workers.py [seconds]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKER_COUNTS = [1, 2, 4, 8]
+USERS = 1000
+
+
+def worker(backend, db_path, seconds, start, results):
+    """Serve requests in this process until the time is up"""
+    os.environ['DATA_STORE_BACKEND'] = backend
+    os.environ['DATA_STORE_SQLITE_PATH'] = db_path
+    sys.path.insert(0, ROOT)
+    from app import app
+    from data_store import data_store
+
+    if backend == 'memory':
+        for i in range(USERS):
+            data_store.create_user(f"User {i}", f"user{i}@example.com")
+    client = app.test_client()
+    rng = random.Random(os.getpid())
+    start.wait()
+    requests = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < 0.8:
+            client.get(f"/api/users/{rng.randint(1, USERS)}")
+        elif roll < 0.9:
+            client.get("/api/posts/?limit=20")
+        else:
+            client.post("/api/posts/", json={
+                "title": "Bench", "content": "Post", "user_id": rng.randint(1, USERS)})
+        requests += 1
+    results.put(requests)
+
+
+def run(backend, workers, seconds, db_path):
+    """Return aggregate requests per second"""
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(backend, db_path, seconds, start, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # Give every worker time to import the app before starting the clock
+    time.sleep(2)
+    start.set()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / seconds
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"CPUs: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'store.sqlite3')
+        os.environ['DATA_STORE_BACKEND'] = 'sqlite'
+        os.environ['DATA_STORE_SQLITE_PATH'] = db_path
+        from sqlite_store import SQLiteDataStore
+        store = SQLiteDataStore(db_path)
+        for i in range(USERS):
+            store.create_user(f"User {i}", f"user{i}@example.com")
+        store.close()
+
+        print(f"{'backend':>8} {'workers':>8} {'req/s':>10}")
+        print(f"{'memory':>8} {1:>8} {run('memory', 1, seconds, db_path):>10,.0f}")
+        for workers in WORKER_COUNTS:
+            print(f"{'sqlite':>8} {workers:>8} {run('sqlite', workers, seconds, db_path):>10,.0f}")
+
+
+if __name__ == '__main__':
+    main()
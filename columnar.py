@@ -0,0 +1,209 @@
+"""
+Columnar (struct-of-arrays) storage for posts.
+
+`ColumnarPostTable` is a drop-in replacement for the `Dict[int, Post]` the
+DataStore keeps its posts in. Instead of one Python object per post it stores
+each attribute in its own column: typed `array('q')` columns for `id`,
+`user_id` and `version`, and plain string lists for `title` and `content`.
+`Post` objects are materialized on access.
+
+Rows are kept in id order, so lookups bisect the id column. Deleted rows are
+tombstoned (their `user_id` set to `DELETED`) and compacted away once they
+make up half the table. `DELETED` is never a live owner: posts cannot be
+stored under it, and per-user scans asked for it match nothing. Per-user filters and counts run as scans over the
+`user_id` column: vectorized through zero-copy NumPy views when NumPy is
+installed, otherwise with the C-level `array.index`/`array.count` methods.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping, MutableSequence
+from typing import Iterator, List, Optional, Set
+
+from models.post import Post
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; fall back to array scans
+    numpy = None
+
+DELETED = -1
+COMPACT_MIN_ROWS = 1024
+
+
+class ColumnarPostTable(MutableMapping):
+    """Mapping of post id to `Post`, stored column by column."""
+
+    def __init__(self):
+        self._ids = array('q')
+        self._user_ids = array('q')
+        self._versions = array('q')
+        self._titles: MutableSequence[Optional[str]] = []
+        self._contents: MutableSequence[Optional[str]] = []
+        self._live = 0
+
+    @classmethod
+    def from_columns(cls, ids: array, user_ids: array, versions: array,
+                     titles: MutableSequence, contents: MutableSequence) -> 'ColumnarPostTable':
+        """
+        Build a table directly from live, id-ordered columns.
+
+        The string columns may be any mutable sequence, such as the lazily
+        decoded columns of a memory-mapped snapshot.
+        """
+        table = cls()
+        table._ids = ids
+        table._user_ids = user_ids
+        table._versions = versions
+        table._titles = titles
+        table._contents = contents
+        table._live = len(ids)
+        return table
+
+    def _row(self, post_id: int) -> int:
+        """Return the row holding `post_id`, or -1 if it is absent or deleted."""
+        row = bisect_left(self._ids, post_id)
+        if row < len(self._ids) and self._ids[row] == post_id and self._user_ids[row] != DELETED:
+            return row
+        return -1
+
+    def __getitem__(self, post_id: int) -> Post:
+        row = self._row(post_id)
+        if row < 0:
+            raise KeyError(post_id)
+        return Post(id=post_id, title=self._titles[row],
+                    content=self._contents[row], user_id=self._user_ids[row],
+                    version=self._versions[row])
+
+    def __setitem__(self, post_id: int, post: Post):
+        if post.user_id == DELETED:
+            raise ValueError(f"user_id {DELETED} marks deleted rows")
+        row = bisect_left(self._ids, post_id)
+        if row < len(self._ids) and self._ids[row] == post_id:
+            if self._user_ids[row] == DELETED:
+                self._live += 1
+            self._user_ids[row] = post.user_id
+            self._versions[row] = post.version
+            self._titles[row] = post.title
+            self._contents[row] = post.content
+            return
+
+        if row == len(self._ids):
+            self._ids.append(post_id)
+            self._user_ids.append(post.user_id)
+            self._versions.append(post.version)
+            self._titles.append(post.title)
+            self._contents.append(post.content)
+        else:
+            self._ids.insert(row, post_id)
+            self._user_ids.insert(row, post.user_id)
+            self._versions.insert(row, post.version)
+            self._titles.insert(row, post.title)
+            self._contents.insert(row, post.content)
+        self._live += 1
+
+    def __delitem__(self, post_id: int):
+        row = self._row(post_id)
+        if row < 0:
+            raise KeyError(post_id)
+        self._user_ids[row] = DELETED
+        self._titles[row] = None
+        self._contents[row] = None
+        self._live -= 1
+        if len(self._ids) >= COMPACT_MIN_ROWS and self._live * 2 <= len(self._ids):
+            self._compact()
+
+    def __contains__(self, post_id) -> bool:
+        return self._row(post_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        if self._live == len(self._ids):
+            return iter(self._ids)
+        return (post_id for post_id, user_id in zip(self._ids, self._user_ids)
+                if user_id != DELETED)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def copy(self) -> 'ColumnarPostTable':
+        """
+        Return a point-in-time copy of the table.
+
+        Only the columns are copied: the typed columns are duplicated in bulk
+        and the string columns copy their references, not the strings.
+        """
+        table = ColumnarPostTable.from_columns(
+            array('q', self._ids), array('q', self._user_ids), array('q', self._versions),
+            self._titles.copy(), self._contents.copy())
+        table._live = self._live
+        return table
+
+    def clear(self):
+        """Remove all rows."""
+        self.__init__()
+
+    def _compact(self):
+        """Drop tombstoned rows from every column."""
+        keep = [row for row, user_id in enumerate(self._user_ids) if user_id != DELETED]
+        self._ids = array('q', (self._ids[row] for row in keep))
+        self._user_ids = array('q', (self._user_ids[row] for row in keep))
+        self._versions = array('q', (self._versions[row] for row in keep))
+        self._titles = [self._titles[row] for row in keep]
+        self._contents = [self._contents[row] for row in keep]
+
+    def ids_by_user(self, user_id: int) -> List[int]:
+        """Return the sorted ids of a user's posts by scanning the user_id column."""
+        if user_id == DELETED:
+            return []
+        if numpy is not None:
+            rows = numpy.flatnonzero(numpy.frombuffer(self._user_ids, dtype=numpy.int64) == user_id)
+            return numpy.frombuffer(self._ids, dtype=numpy.int64)[rows].tolist()
+
+        ids, find = self._ids, self._user_ids.index
+        result = []
+        row = -1
+        try:
+            while True:
+                row = find(user_id, row + 1)
+                result.append(ids[row])
+        except ValueError:
+            return result
+
+    def count_by_user(self, user_id: int) -> int:
+        """Count a user's posts by scanning the user_id column."""
+        if user_id == DELETED:
+            return 0
+        if numpy is not None:
+            return int(numpy.count_nonzero(
+                numpy.frombuffer(self._user_ids, dtype=numpy.int64) == user_id))
+        return self._user_ids.count(user_id)
+
+    def ids_by_users(self, user_ids: Set[int]) -> List[int]:
+        """Return the sorted ids of the posts of any of `user_ids`, in one column scan."""
+        user_ids = self._live_owners(user_ids)
+        if not user_ids:
+            return []
+        if numpy is not None:
+            rows = numpy.flatnonzero(self._user_mask(user_ids))
+            return numpy.frombuffer(self._ids, dtype=numpy.int64)[rows].tolist()
+        ids = self._ids
+        return [ids[row] for row, user_id in enumerate(self._user_ids) if user_id in user_ids]
+
+    def count_by_users(self, user_ids: Set[int]) -> int:
+        """Count the posts of any of `user_ids`, in one column scan."""
+        user_ids = self._live_owners(user_ids)
+        if not user_ids:
+            return 0
+        if numpy is not None:
+            return int(numpy.count_nonzero(self._user_mask(user_ids)))
+        return sum(1 for user_id in self._user_ids if user_id in user_ids)
+
+    @staticmethod
+    def _live_owners(user_ids: Set[int]) -> Set[int]:
+        """Drop the tombstone marker from a set of user ids."""
+        return user_ids - {DELETED} if DELETED in user_ids else user_ids
+
+    def _user_mask(self, user_ids: Set[int]):
+        """Return a NumPy mask of the rows owned by any of `user_ids`."""
+        return numpy.isin(numpy.frombuffer(self._user_ids, dtype=numpy.int64),
+                          numpy.fromiter(user_ids, dtype=numpy.int64, count=len(user_ids)))
@@ -0,0 +1,71 @@
+"""
+Conditional request helpers.
+
+Responses carry strong ETags derived from store versions: a record's
+`version` for single-record endpoints and the collection version for list
+endpoints. A GET whose `If-None-Match` already names the current ETag is
+answered with 304 Not Modified before the body is built.
+
+Writes honour `If-Match`: a PUT or DELETE naming a single ETag is applied
+only if the record still has that version, and otherwise gets 412
+Precondition Failed. The check is made by the store as part of the write, so
+two clients updating from the same version cannot both succeed.
+
+List handlers must read the collection version before they read the records,
+so a response is never labelled with a version newer than its body.
+"""
+
+import re
+from typing import Callable, Optional
+
+from flask import Response, request
+
+from storage import VersionConflict
+
+_VERSION_TAG = re.compile(r'v(\d+)')
+
+
+def make_etag(version: int) -> str:
+    """Return the (unquoted) ETag value for a store version."""
+    return f'v{version}'
+
+
+def with_etag(response: Response, version: int) -> Response:
+    """Attach the ETag for `version` to a response."""
+    response.set_etag(make_etag(version))
+    return response
+
+
+def conditional(version: int, build: Callable[[], Response]) -> Response:
+    """
+    Answer a GET for a resource at `version`.
+
+    Returns 304 if the client's `If-None-Match` matches, otherwise the
+    response produced by `build`; either way with the current ETag.
+    """
+    etag = make_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    return response
+
+
+def if_match_version() -> Optional[int]:
+    """
+    Return the version a write's `If-Match` requires, or None if any will do.
+
+    Raises VersionConflict for preconditions that cannot be met: weak tags
+    never match under `If-Match`, and the store checks a single version, so
+    lists of several tags are refused rather than half-honoured.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    tags = if_match.as_set()
+    if len(tags) == 1:
+        match = _VERSION_TAG.fullmatch(next(iter(tags)))
+        if match:
+            return int(match.group(1))
+    raise VersionConflict("If-Match does not name a single version")
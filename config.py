@@ -0,0 +1,58 @@
+"""
+Application configuration.
+
+Settings are read from environment variables at import time and loaded into
+`app.config`, where routes look them up through `current_app.config`.
+"""
+
+import os
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    """Default configuration, overridable through the environment."""
+
+    # Serve entity JSON from per-object cached bytes instead of re-dumping
+    ENTITY_JSON_CACHE = _env_flag('ENTITY_JSON_CACHE', True)
+
+    # Byte budget of the versioned cache of encoded list responses (0 = off)
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Keep the in-memory full-text index of post titles and contents
+    SEARCH_INDEX = _env_flag('SEARCH_INDEX', True)
+
+    # Largest array accepted by the batch create endpoints
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 10000))
+
+    # Records inserted per store call by the NDJSON import endpoints
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+    # Payload validation: "marshmallow" (full Schema.load) or "compiled"
+    VALIDATOR_BACKEND = os.environ.get('VALIDATOR_BACKEND', 'marshmallow')
+
+    # Storage backend: "memory" (per-process) or "sqlite" (one database file
+    # shared by every gunicorn worker)
+    DATA_STORE_BACKEND = os.environ.get('DATA_STORE_BACKEND', 'memory')
+    DATA_STORE_SQLITE_PATH = os.environ.get('DATA_STORE_SQLITE_PATH', 'data_store.sqlite3')
+
+    # In-memory post layout: "dict" (one object per post) or "columnar"
+    POST_STORAGE = os.environ.get('POST_STORAGE', 'dict')
+
+    # Gunicorn worker processes (read by gunicorn itself); the memory
+    # backend's log and snapshot can only be written by one of them
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+    # Append-only log of DataStore mutations, replayed on startup (empty = off)
+    DATA_STORE_WAL_PATH = os.environ.get('DATA_STORE_WAL_PATH', '')
+    # Log durability: "batch" (group-commit fsync), "always" (fsync per op) or "none"
+    DATA_STORE_WAL_SYNC = os.environ.get('DATA_STORE_WAL_SYNC', 'batch')
+
+    # Binary snapshot restored (memory-mapped) on startup and rewritten on exit (empty = off)
+    DATA_STORE_SNAPSHOT_PATH = os.environ.get('DATA_STORE_SNAPSHOT_PATH', '')
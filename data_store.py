@@ -1,145 +1,965 @@
-from typing import List, Optional, Dict
+import os
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from functools import wraps
+from itertools import islice
+from typing import (Callable, Dict, Iterator, List, Mapping, MutableMapping, Optional, Sequence,
+                    Set, Tuple, TypeVar)
 from models.user import User
 from models.post import Post
+from columnar import ColumnarPostTable
+from config import Config
+from locks import ReadWriteLock
+from snapshot import read_snapshot, write_snapshot
+from prefix_index import PrefixIndex
+from search import SearchIndex
+from storage import (POST_SORTS, BatchRejected, SearchUnavailable, Storage, VersionConflict,
+                     create_storage)
+from wal import SYNC_MODES, WriteAheadLog, iter_log
 
+POST_STORAGES = ('dict', 'columnar')
 
-class DataStore:
-    def __init__(self):
+T = TypeVar('T')
+
+
+def _reader(method):
+    """Run a DataStore method while holding the store's lock shared"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        with self._lock.read:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _writer(method):
+    """
+    Run a DataStore method while holding the store's lock exclusively.
+
+    When a write-ahead log is attached, the caller waits for the logged
+    mutations to become durable after the lock is released, so concurrent
+    writers can share one group commit.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        with self._lock.write:
+            result = method(self, *args, **kwargs)
+            lsn = self._wal.last_lsn if self._wal is not None else 0
+        if lsn:
+            self._wal.commit(lsn)
+        return result
+    return wrapper
+
+
+class DataStore(Storage):
+    """
+    Thread-safe in-memory store for users and posts.
+
+    Public methods take a reader-writer lock: reads share it, mutations hold
+    it exclusively, so id allocation, index maintenance and cascade deletes are
+    atomic. Updates are copy-on-write: a changed user or post is replaced by a
+    new object, so records handed out to readers never change underneath them.
+    Locked methods must not call each other; they use the unlocked helpers.
+
+    Every mutation takes the next value of a store-wide version clock. The
+    records it writes carry that value as their `version`, and the users or
+    posts collection it changes adopts it as its collection version, so both
+    only ever increase (even across `clear`). Updates and deletes given an
+    `expected_version` compare it with the record's version under the same
+    write lock that applies the change, so the check and the write are atomic.
+
+    With `wal_path` set, every mutation is appended to a write-ahead log and
+    an existing log is replayed on startup instead of loading sample data.
+    With `snapshot_path` set, an existing snapshot is restored first and the
+    log only holds the mutations made since it was written.
+
+    A store with either path is loaded again when first used after a fork,
+    and with `lazy` set it is not loaded until first used, so a store built
+    before gunicorn forks its workers is only ever loaded by them. Only one
+    process at a time can have the log open: another raises `LogLocked`
+    when it tries to load.
+    """
+
+    def __init__(self, post_storage: str = 'dict', wal_path: Optional[str] = None,
+                 wal_sync: str = 'batch', snapshot_path: Optional[str] = None,
+                 search_index: bool = True, lazy: bool = False):
+        if post_storage not in POST_STORAGES:
+            raise ValueError(f"Unknown post storage: {post_storage!r}")
+        if wal_sync not in SYNC_MODES:
+            raise ValueError(f"Unknown WAL sync mode: {wal_sync!r}")
+        self._lock = ReadWriteLock()
+        self._post_storage = post_storage
+        self._search_enabled = search_index
+        # Serializes readers building a lazy index
+        self._build_lock = threading.Lock()
+        self._wal: Optional[WriteAheadLog] = None
+        self._wal_path = wal_path
+        self._wal_sync = wal_sync
+        self._snapshot_path = snapshot_path
+        # A persistent store is loaded again from disk in a forked child, as
+        # state inherited from the parent (gunicorn --preload, recycled
+        # workers) may be stale
+        self._persistent = bool(wal_path or snapshot_path)
+        self._pid: Optional[int] = None
+        self._load_lock = threading.RLock()
+        self._loading = False
+        if not self._persistent:
+            self._load()
+        elif not lazy:
+            self._ensure_loaded()
+
+    def _create_tables(self):
+        """Create empty tables and indexes and reset the version clock"""
         self._users: Dict[int, User] = {}
-        self._posts: Dict[int, Post] = {}
+        self._email_index: Dict[str, int] = {}
+        # Normalized names and emails -> user ids, for type-ahead lookups
+        self._user_prefixes = PrefixIndex()
+        self._posts: MutableMapping[int, Post]
+        # user_id -> sorted post ids; the columnar table scans its user_id
+        # column instead of keeping this index
+        self._user_posts: Optional[Dict[int, List[int]]]
+        if self._post_storage == 'columnar':
+            self._posts = ColumnarPostTable()
+            self._user_posts = None
+        else:
+            self._posts = {}
+            self._user_posts = {}
+        # Sorted id lists backing keyset pagination
+        self._user_ids: List[int] = []
+        self._post_ids: List[int] = []
+        # Normalized titles -> post ids, for title prefix filters and sorts;
+        # None until first used after a columnar snapshot restore
+        self._title_index: Optional[PrefixIndex] = PrefixIndex()
+        # Full-text index over post titles and contents; None until the first
+        # search, then kept in step with every post change
+        self._search: Optional[SearchIndex] = None
+        self._next_user_id = 1
+        self._next_post_id = 1
+        self._clock = 0
+        self._users_version = 0
+        self._posts_version = 0
+
+    def _ensure_loaded(self):
+        """Load a persistent store if this process has not loaded it yet"""
+        if self._persistent and self._pid != os.getpid():
+            with self._load_lock:
+                # Sample data is created through the public methods, which
+                # come back here on the loading thread
+                if self._pid != os.getpid() and not self._loading:
+                    self._loading = True
+                    try:
+                        self._load()
+                    finally:
+                        self._loading = False
+
+    def _load(self):
+        """
+        Build the store in the current process: restore the snapshot, replay
+        the log and open it for appending, or add sample data if neither has
+        anything.
+
+        The log is opened, and locked against other processes, before
+        anything is read. A store inherited through fork first lets go of
+        the parent's log without writing the parent's pending records.
+        """
+        if self._wal is not None:
+            self._wal.detach()
+            self._wal = None
+        self._create_tables()
+        restored = False
+        if self._wal_path:
+            self._wal = WriteAheadLog(self._wal_path, sync=self._wal_sync)
+        if self._snapshot_path and os.path.exists(self._snapshot_path):
+            self._restore(self._snapshot_path)
+            restored = True
+        if self._wal is not None:
+            replayed, length = self._replay(self._wal_path)
+            restored = replayed or restored
+            # Drop any torn tail, so new records follow the last good one
+            self._wal.cut(length)
+        if not restored:
+            self._initialize_sample_data()
+        # What `save_snapshot_at_exit` compares against to tell whether this
+        # process has changed the store, or another has rewritten the file
+        self._saved_clock = self._clock
+        self._snapshot_seen = self._snapshot_stamp()
+        self._pid = os.getpid()
+
+    def _snapshot_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the current snapshot file (inode, mtime, size), or None"""
+        if not self._snapshot_path:
+            return None
+        try:
+            stat = os.stat(self._snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _restore(self, path: str):
+        """
+        Load a snapshot written by `save_snapshot`.
+
+        Columnar post storage keeps the snapshot memory-mapped and decodes
+        titles and contents on first access; dict storage decodes every post.
+        The search index is built by the first search, not here.
+        """
+        snapshot = read_snapshot(path)
+        for user in snapshot.users:
+            self._put_user(user)
+        if self._user_posts is None:
+            self._posts = ColumnarPostTable.from_columns(
+                snapshot.post_ids, snapshot.post_user_ids, snapshot.post_versions,
+                snapshot.post_titles, snapshot.post_contents)
+            self._post_ids = snapshot.post_ids.tolist()
+            # Building the title index decodes every title, so it waits
+            # until a query needs it
+            self._title_index = None
+        else:
+            for post in snapshot.iter_posts():
+                self._put_post(post)
+        self._next_user_id = snapshot.next_user_id
+        self._next_post_id = snapshot.next_post_id
+        self._clock = snapshot.clock
+        self._users_version = snapshot.users_version
+        self._posts_version = snapshot.posts_version
+
+    @_writer
+    def save_snapshot(self, path: Optional[str] = None):
+        """
+        Write a binary snapshot of the store and truncate the write-ahead log.
+
+        Writers are blocked while the snapshot is written, so it and the
+        truncated log never disagree. Defaults to the configured snapshot path.
+        """
+        path = path or self._snapshot_path
+        if not path:
+            raise ValueError("No snapshot path configured")
+        write_snapshot(path, (self._clock, self._users_version, self._posts_version),
+                       self._next_user_id, self._next_post_id,
+                       [self._users[user_id] for user_id in self._user_ids],
+                       [self._posts[post_id] for post_id in self._post_ids])
+        if self._wal is not None:
+            self._wal.truncate()
+        if path == self._snapshot_path:
+            self._saved_clock = self._clock
+            self._snapshot_seen = self._snapshot_stamp()
+
+    def save_snapshot_at_exit(self):
+        """
+        Save the configured snapshot as the process exits, if this process
+        loaded the store and changed it since it was loaded or last saved.
+
+        A process holding a copy inherited through fork (the gunicorn master
+        under --preload), one that only read, and one whose snapshot was
+        rewritten by another process since it loaded all leave the file alone,
+        so stale state never overwrites it.
+        """
+        if self._pid != os.getpid() or self._clock == self._saved_clock:
+            return
+        if self._snapshot_stamp() != self._snapshot_seen:
+            return
+        self.save_snapshot()
+
+    def _replay(self, path: str) -> Tuple[bool, int]:
+        """
+        Rebuild the store from a write-ahead log. Returns whether it had
+        records and the length in bytes of its valid prefix.
+        """
+        replayed, length = False, 0
+        for record, length in iter_log(path):
+            self._apply(record)
+            replayed = True
+        return replayed, length
+
+    def _apply(self, record: dict):
+        """Apply one logged mutation without logging it again"""
+        op = record["op"]
+        # Logs written before versioning carry no version; tick instead
+        version = record.get("version") or self._clock + 1
+        if op in ("create_user", "update_user"):
+            self._put_user(User.from_dict(record["user"], version))
+        elif op == "create_users":
+            for data in record["users"]:
+                self._put_user(User.from_dict(data, version))
+        elif op == "delete_user":
+            # A crash between writing a snapshot and truncating the log can
+            # replay deletes the snapshot already reflects
+            if record["id"] in self._users:
+                self._drop_user(record["id"], version)
+        elif op in ("create_post", "update_post"):
+            self._put_post(Post.from_dict(record["post"], version))
+        elif op in ("create_posts", "update_posts"):
+            for data in record["posts"]:
+                self._put_post(Post.from_dict(data, version))
+        elif op == "delete_post":
+            if record["id"] in self._posts:
+                self._drop_post(record["id"], version)
+        elif op == "delete_posts":
+            post_ids = [post_id for post_id in record["ids"] if post_id in self._posts]
+            if post_ids:
+                self._drop_posts(post_ids, version)
+        elif op == "clear":
+            self._reset(version)
+        else:
+            raise ValueError(f"Unknown log record: {op!r}")
+
+    def _log(self, record: dict):
+        """Append a mutation to the write-ahead log, if one is attached"""
+        if self._wal is not None:
+            self._wal.append(record)
+
+    def close(self):
+        """Flush and close the write-ahead log, if one is attached"""
+        if self._wal is not None:
+            if self._pid == os.getpid():
+                self._wal.close()
+            else:
+                self._wal.detach()
+            self._wal = None
+
+    @_writer
+    def clear(self):
+        """Remove all users and posts and reset the id counters"""
+        version = self._tick()
+        self._reset(version)
+        self._log({"op": "clear", "version": version})
+
+    def _tick(self) -> int:
+        """Advance the version clock and return the new version"""
+        self._clock += 1
+        return self._clock
+
+    def _advance(self, version: int):
+        """Move the version clock forward to a replayed version"""
+        if version > self._clock:
+            self._clock = version
+
+    def _reset(self, version: int):
+        """Empty every table and index (the version clock keeps running)"""
+        self._users.clear()
+        self._posts.clear()
+        self._email_index.clear()
+        self._user_prefixes.clear()
+        if self._user_posts is not None:
+            self._user_posts.clear()
+        self._user_ids.clear()
+        self._post_ids.clear()
+        self._title_index = PrefixIndex()
+        if self._search is not None:
+            self._search.clear()
         self._next_user_id = 1
         self._next_post_id = 1
-        self._initialize_sample_data()
-
-    def _initialize_sample_data(self):
-        """Initialize with sample data"""
-        # Add sample users
-        sample_users = [
-            {"name": "John Doe", "email": "john@example.com"},
-            {"name": "Jane Smith", "email": "jane@example.com"}
-        ]
-        for user_data in sample_users:
-            self.create_user(user_data["name"], user_data["email"])
-
-        # Add sample posts
-        sample_posts = [
-            {"title": "First Post",
-                "content": "This is the content of the first post", "user_id": 1},
-            {"title": "Second Post",
-                "content": "This is the content of the second post", "user_id": 2},
-            {"title": "Third Post",
-                "content": "This is the content of the third post", "user_id": 1}
-        ]
-        for post_data in sample_posts:
-            self.create_post(
-                post_data["title"], post_data["content"], post_data["user_id"])
+        self._users_version = self._posts_version = version
+        self._advance(version)
+
+    @staticmethod
+    def _check_version(record, expected_version: Optional[int]):
+        """Raise VersionConflict unless `record` has the expected version"""
+        if expected_version is not None and record.version != expected_version:
+            raise VersionConflict(
+                f"Expected version {expected_version}, found {record.version}")
+
+    def _user_post_ids(self, user_id: int) -> List[int]:
+        """Get the sorted ids of a user's posts"""
+        if self._user_posts is None:
+            return self._posts.ids_by_user(user_id)
+        return self._user_posts.get(user_id, [])
+
+    def _count_user_posts(self, user_ids: Set[int]) -> int:
+        """Count the posts of several users; one column scan in the columnar layout"""
+        if self._user_posts is None:
+            return self._posts.count_by_users(user_ids)
+        return sum(len(self._user_posts.get(user_id, ())) for user_id in user_ids)
+
+    def _users_post_ids(self, user_ids: Set[int], descending: bool = False) -> Iterator[int]:
+        """Iterate over the ids of several users' posts in id order, or reversed"""
+        if self._user_posts is None:
+            post_ids = self._posts.ids_by_users(user_ids)
+            return reversed(post_ids) if descending else iter(post_ids)
+        lists = [self._user_posts.get(user_id, []) for user_id in user_ids]
+        if descending:
+            return heapq.merge(*[reversed(ids) for ids in lists], reverse=True)
+        return heapq.merge(*lists)
+
+    @staticmethod
+    def _insert_id(ids: List[int], item_id: int):
+        """Add an id to a sorted id list (ids normally arrive in order)"""
+        if not ids or ids[-1] < item_id:
+            ids.append(item_id)
+        else:
+            insort(ids, item_id)
+
+    def _put_user(self, user: User):
+        """Insert or replace a user, keeping the id list, email index and prefix index in sync"""
+        old = self._users.get(user.id)
+        if old is None:
+            self._insert_id(self._user_ids, user.id)
+            self._next_user_id = max(self._next_user_id, user.id + 1)
+        else:
+            if self._email_index.get(self._normalize_email(old.email)) == user.id:
+                del self._email_index[self._normalize_email(old.email)]
+            self._unindex_user_prefixes(old)
+        self._users[user.id] = user
+        self._email_index[self._normalize_email(user.email)] = user.id
+        self._user_prefixes.add(self._normalize_name(user.name), user.id)
+        self._user_prefixes.add(self._normalize_email(user.email), user.id)
+        self._users_version = user.version
+        self._advance(user.version)
+
+    def _drop_user(self, user_id: int, version: int):
+        """Remove a user and cascade to their posts"""
+        user = self._users.pop(user_id)
+        self._remove_id(self._user_ids, user_id)
+        del self._email_index[self._normalize_email(user.email)]
+        self._unindex_user_prefixes(user)
+        deleted_post_ids = self._user_post_ids(user_id)
+        if self._user_posts is not None:
+            self._user_posts.pop(user_id, None)
+        deleted_posts = [self._posts.pop(post_id) for post_id in deleted_post_ids]
+        for post in deleted_posts:
+            self._unindex_title(post)
+        if self._search is not None:
+            self._search.remove_many(deleted_posts)
+        self._remove_ids(self._post_ids, deleted_post_ids)
+        self._users_version = version
+        if deleted_post_ids:
+            self._posts_version = version
+        self._advance(version)
+
+    def _unindex_user_prefixes(self, user: User):
+        """Remove a user's name and email from the prefix index"""
+        self._user_prefixes.remove(self._normalize_name(user.name), user.id)
+        self._user_prefixes.remove(self._normalize_email(user.email), user.id)
+
+    def _put_post(self, post: Post):
+        """Insert or replace a post, keeping the id list and user index in sync"""
+        old = self._posts.get(post.id)
+        if old is None:
+            self._insert_id(self._post_ids, post.id)
+            self._index_post(post.user_id, post.id)
+            self._next_post_id = max(self._next_post_id, post.id + 1)
+            self._index_title(post)
+            if self._search is not None:
+                self._search.add(post)
+        else:
+            if old.user_id != post.user_id:
+                self._unindex_post(old.user_id, post.id)
+                self._index_post(post.user_id, post.id)
+            if old.title != post.title:
+                self._unindex_title(old)
+                self._index_title(post)
+            if self._search is not None:
+                self._search.update(old, post)
+        self._posts[post.id] = post
+        self._posts_version = post.version
+        self._advance(post.version)
+
+    def _drop_post(self, post_id: int, version: int):
+        """Remove a post"""
+        post = self._posts.pop(post_id)
+        self._remove_id(self._post_ids, post_id)
+        self._unindex_post(post.user_id, post_id)
+        self._unindex_title(post)
+        if self._search is not None:
+            self._search.remove(post)
+        self._posts_version = version
+        self._advance(version)
+
+    def _drop_posts(self, post_ids: List[int], version: int):
+        """Remove several posts (given in id order), updating each index once"""
+        by_user: Dict[int, List[int]] = {}
+        deleted_posts = [self._posts.pop(post_id) for post_id in post_ids]
+        for post in deleted_posts:
+            by_user.setdefault(post.user_id, []).append(post.id)
+            self._unindex_title(post)
+        if self._search is not None:
+            self._search.remove_many(deleted_posts)
+        self._remove_ids(self._post_ids, post_ids)
+        if self._user_posts is not None:
+            for user_id, user_post_ids in by_user.items():
+                remaining = self._user_posts[user_id]
+                self._remove_ids(remaining, user_post_ids)
+                if not remaining:
+                    del self._user_posts[user_id]
+        self._posts_version = version
+        self._advance(version)
+
+    def _select_posts(self, post_ids: Optional[Sequence[int]], by_user: Optional[int]) -> List[int]:
+        """Resolve a bulk selection to the sorted ids of existing posts"""
+        if post_ids is None:
+            if by_user is None:
+                raise ValueError("Select posts by id, by user or both")
+            return list(self._user_post_ids(by_user))
+        selected = sorted({post_id for post_id in post_ids if post_id in self._posts})
+        if by_user is not None:
+            selected = [post_id for post_id in selected if self._posts[post_id].user_id == by_user]
+        return selected
+
+    def _index_post(self, user_id: int, post_id: int):
+        """Add a post id to its user's sorted post id list"""
+        if self._user_posts is not None:
+            insort(self._user_posts.setdefault(user_id, []), post_id)
+
+    def _unindex_post(self, user_id: int, post_id: int):
+        """Remove a post id from its user's sorted post id list"""
+        if self._user_posts is None:
+            return
+        post_ids = self._user_posts[user_id]
+        self._remove_id(post_ids, post_id)
+        if not post_ids:
+            del self._user_posts[user_id]
+
+    def _index_title(self, post: Post):
+        """Add a post to the title index, unless it is still to be built"""
+        if self._title_index is not None:
+            self._title_index.add(self._normalize_title(post.title), post.id)
+
+    def _unindex_title(self, post: Post):
+        """Remove a post from the title index, unless it is still to be built"""
+        if self._title_index is not None:
+            self._title_index.remove(self._normalize_title(post.title), post.id)
+
+    def _titles(self) -> PrefixIndex:
+        """
+        Return the title index, building it on first use after a restore.
+
+        Readers call this under the shared lock; writers are excluded then,
+        so only concurrent readers can race, and the build lock serializes them.
+        """
+        if self._title_index is None:
+            with self._build_lock:
+                if self._title_index is None:
+                    self._title_index = PrefixIndex.from_entries(
+                        (self._normalize_title(post.title), post.id)
+                        for post in self._posts.values())
+        return self._title_index
+
+    def _search_index(self) -> SearchIndex:
+        """Return the search index, building it on first use (see `_titles`)"""
+        if self._search is None:
+            with self._build_lock:
+                if self._search is None:
+                    search = SearchIndex()
+                    for post in self._posts.values():
+                        search.add(post)
+                    self._search = search
+        return self._search
+
+    @staticmethod
+    def _remove_id(ids: List[int], item_id: int):
+        """Remove an id from a sorted id list"""
+        del ids[bisect_left(ids, item_id)]
+
+    @staticmethod
+    def _remove_ids(ids: List[int], item_ids: List[int]):
+        """Remove several ids from a sorted id list"""
+        if len(item_ids) <= 64:
+            for item_id in item_ids:
+                del ids[bisect_left(ids, item_id)]
+        else:
+            removed = set(item_ids)
+            ids[:] = [item_id for item_id in ids if item_id not in removed]
+
+    def _iter_records(self, get_ids: Callable[[], List[int]], table: Mapping[int, T],
+                      batch_size: int) -> Iterator[T]:
+        """
+        Walk a sorted id list in keyset batches and yield the matching records.
+
+        Each batch is read under the lock, but the lock is released between
+        batches, so a slow consumer never blocks writers. The walk tolerates
+        ids being added or removed between batches.
+        """
+        after = None
+        while True:
+            with self._lock.read:
+                batch = self._page_ids(get_ids(), after, batch_size)
+                records = [table[item_id] for item_id in batch if item_id in table]
+            if not batch:
+                return
+            yield from records
+            after = batch[-1]
+
+    @staticmethod
+    def _page_ids(ids: List[int], after: Optional[int], limit: int) -> List[int]:
+        """Slice up to `limit` ids greater than `after` from a sorted id list"""
+        start = 0 if after is None else bisect_right(ids, after)
+        return ids[start:start + limit]
 
     # User methods
+    @_reader
     def get_all_users(self) -> List[User]:
         """Get all users"""
         return list(self._users.values())
 
+    @_reader
+    def get_users_page(self, after: Optional[int] = None, limit: int = 100) -> List[User]:
+        """Get up to `limit` users with an id greater than `after`, in id order"""
+        return [self._users[user_id] for user_id in self._page_ids(self._user_ids, after, limit)]
+
+    def iter_users(self, batch_size: int = 500) -> Iterator[User]:
+        """Iterate over all users in id order without copying the collection"""
+        self._ensure_loaded()
+        return self._iter_records(lambda: self._user_ids, self._users, batch_size)
+
+    @_reader
+    def export_users(self) -> Iterator[User]:
+        """Iterate over all users in id order as of the call, unaffected by later writes"""
+        # Users are copy-on-write, so references to the current objects are a
+        # consistent view
+        return iter(list(self._users.values()))
+
+    @_reader
     def get_user(self, user_id: int) -> Optional[User]:
         """Get a user by ID"""
         return self._users.get(user_id)
 
-    def create_user(self, name: str, email: str) -> User:
-        """Create a new user"""
-        user_id = self._next_user_id
-        self._next_user_id += 1
+    @_writer
+    def create_user(self, name: str, email: str) -> Optional[User]:
+        """Create a new user, or return None if the email is already taken"""
+        email_key = self._normalize_email(email)
+        if email_key in self._email_index:
+            return None
 
-        user = User(id=user_id, name=name, email=email)
-        self._users[user_id] = user
+        user = User(id=self._next_user_id, name=name, email=email, version=self._tick())
+        self._put_user(user)
+        self._log({"op": "create_user", "user": user.to_dict(), "version": user.version})
         return user
 
-    def update_user(self, user_id: int, name: Optional[str] = None, email: Optional[str] = None) -> Optional[User]:
-        """Update an existing user"""
+    @_writer
+    def create_users(self, users: Sequence[Tuple[str, str]]) -> List[User]:
+        """Create users from (name, email) pairs, all sharing one version"""
+        email_keys = [self._normalize_email(email) for _, email in users]
+        seen = set()
+        rejected = []
+        for index, email_key in enumerate(email_keys):
+            if email_key in self._email_index or email_key in seen:
+                rejected.append(index)
+            seen.add(email_key)
+        if rejected:
+            raise BatchRejected(rejected)
+        if not users:
+            return []
+
+        version = self._tick()
+        first_id = self._next_user_id
+        created = [User(id=first_id + offset, name=name, email=email, version=version)
+                   for offset, (name, email) in enumerate(users)]
+        for user in created:
+            self._put_user(user)
+        self._log({"op": "create_users", "users": [user.to_dict() for user in created],
+                   "version": version})
+        return created
+
+    @_writer
+    def update_user(self, user_id: int, name: Optional[str] = None, email: Optional[str] = None,
+                    expected_version: Optional[int] = None) -> Optional[User]:
+        """Update an existing user, or return None if it does not exist or the email is taken"""
         user = self._users.get(user_id)
         if not user:
             return None
+        self._check_version(user, expected_version)
 
-        if name is not None:
-            user.name = name
         if email is not None:
-            user.email = email
+            if self._email_index.get(self._normalize_email(email), user_id) != user_id:
+                return None
 
-        return user
+        updated = User(id=user_id,
+                       name=user.name if name is None else name,
+                       email=user.email if email is None else email,
+                       version=self._tick())
+        self._put_user(updated)
+        self._log({"op": "update_user", "user": updated.to_dict(), "version": updated.version})
+        return updated
 
-    def delete_user(self, user_id: int) -> bool:
+    @_writer
+    def delete_user(self, user_id: int, expected_version: Optional[int] = None) -> bool:
         """Delete a user"""
-        if user_id in self._users:
-            del self._users[user_id]
-            # Also delete all posts by this user
-            posts_to_delete = [
-                post_id for post_id, post in self._posts.items() if post.user_id == user_id]
-            for post_id in posts_to_delete:
-                del self._posts[post_id]
+        user = self._users.get(user_id)
+        if user:
+            self._check_version(user, expected_version)
+            # Also deletes all posts by this user
+            version = self._tick()
+            self._drop_user(user_id, version)
+            self._log({"op": "delete_user", "id": user_id, "version": version})
             return True
         return False
 
+    @_reader
     def user_exists(self, user_id: int) -> bool:
         """Check if a user exists"""
         return user_id in self._users
 
+    @_reader
     def get_user_by_email(self, email: str) -> Optional[User]:
-        """Get a user by email"""
-        for user in self._users.values():
-            if user.email == email:
-                return user
-        return None
+        """Get a user by email (case-insensitive)"""
+        user_id = self._email_index.get(self._normalize_email(email))
+        if user_id is None:
+            return None
+        return self._users.get(user_id)
+
+    @_reader
+    def suggest_users(self, prefix: str, limit: int = 10) -> List[User]:
+        """Get up to `limit` users whose name or email starts with `prefix`, in match order"""
+        user_ids = self._user_prefixes.match(self._normalize_prefix(prefix), limit)
+        return [self._users[user_id] for user_id in user_ids]
+
+    @_reader
+    def get_users_version(self) -> int:
+        """Get the version of the users collection"""
+        return self._users_version
 
     # Post methods
+    @_reader
     def get_all_posts(self) -> List[Post]:
         """Get all posts"""
         return list(self._posts.values())
 
+    @_reader
+    def get_posts_page(self, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts with an id greater than `after`, in id order"""
+        return [self._posts[post_id] for post_id in self._page_ids(self._post_ids, after, limit)]
+
+    def iter_posts(self, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over all posts in id order without copying the collection"""
+        self._ensure_loaded()
+        return self._iter_records(lambda: self._post_ids, self._posts, batch_size)
+
+    @_reader
+    def export_posts(self) -> Iterator[Post]:
+        """Iterate over all posts in id order as of the call, unaffected by later writes"""
+        if self._user_posts is None:
+            # Columnar rows are updated in place, so copy the columns
+            return iter(self._posts.copy().values())
+        return iter(list(self._posts.values()))
+
+    @_reader
     def get_post(self, post_id: int) -> Optional[Post]:
         """Get a post by ID"""
         return self._posts.get(post_id)
 
+    @_writer
     def create_post(self, title: str, content: str, user_id: int) -> Optional[Post]:
         """Create a new post"""
-        if not self.user_exists(user_id):
+        if user_id not in self._users:
             return None
 
-        post_id = self._next_post_id
-        self._next_post_id += 1
-
-        post = Post(id=post_id, title=title, content=content, user_id=user_id)
-        self._posts[post_id] = post
+        post = Post(id=self._next_post_id, title=title, content=content, user_id=user_id,
+                    version=self._tick())
+        self._put_post(post)
+        self._log({"op": "create_post", "post": post.to_dict(), "version": post.version})
         return post
 
-    def update_post(self, post_id: int, title: Optional[str] = None, content: Optional[str] = None, user_id: Optional[int] = None) -> Optional[Post]:
+    @_writer
+    def create_posts(self, posts: Sequence[Tuple[str, str, int]]) -> List[Post]:
+        """Create posts from (title, content, user_id) triples, all sharing one version"""
+        rejected = [index for index, (_, _, user_id) in enumerate(posts)
+                    if user_id not in self._users]
+        if rejected:
+            raise BatchRejected(rejected)
+        if not posts:
+            return []
+
+        version = self._tick()
+        first_id = self._next_post_id
+        created = [Post(id=first_id + offset, title=title, content=content, user_id=user_id,
+                        version=version)
+                   for offset, (title, content, user_id) in enumerate(posts)]
+        for post in created:
+            self._put_post(post)
+        self._log({"op": "create_posts", "posts": [post.to_dict() for post in created],
+                   "version": version})
+        return created
+
+    @_writer
+    def update_post(self, post_id: int, title: Optional[str] = None, content: Optional[str] = None,
+                    user_id: Optional[int] = None, expected_version: Optional[int] = None) -> Optional[Post]:
         """Update an existing post"""
         post = self._posts.get(post_id)
         if not post:
             return None
+        self._check_version(post, expected_version)
 
-        if user_id is not None and not self.user_exists(user_id):
+        if user_id is not None and user_id not in self._users:
             return None
 
-        if title is not None:
-            post.title = title
-        if content is not None:
-            post.content = content
-        if user_id is not None:
-            post.user_id = user_id
-
-        return post
+        updated = Post(id=post_id,
+                       title=post.title if title is None else title,
+                       content=post.content if content is None else content,
+                       user_id=post.user_id if user_id is None else user_id,
+                       version=self._tick())
+        self._put_post(updated)
+        self._log({"op": "update_post", "post": updated.to_dict(), "version": updated.version})
+        return updated
 
-    def delete_post(self, post_id: int) -> bool:
+    @_writer
+    def delete_post(self, post_id: int, expected_version: Optional[int] = None) -> bool:
         """Delete a post"""
-        if post_id in self._posts:
-            del self._posts[post_id]
+        post = self._posts.get(post_id)
+        if post:
+            self._check_version(post, expected_version)
+            version = self._tick()
+            self._drop_post(post_id, version)
+            self._log({"op": "delete_post", "id": post_id, "version": version})
             return True
         return False
 
+    @_writer
+    def update_posts(self, post_ids: Optional[Sequence[int]] = None, by_user: Optional[int] = None,
+                     title: Optional[str] = None, content: Optional[str] = None,
+                     user_id: Optional[int] = None) -> Optional[List[int]]:
+        """Patch the selected posts, all taking one version"""
+        if user_id is not None and user_id not in self._users:
+            return None
+        selected = self._select_posts(post_ids, by_user)
+        if not selected:
+            return []
+
+        version = self._tick()
+        updated = []
+        for post_id in selected:
+            post = self._posts[post_id]
+            updated.append(Post(id=post_id,
+                                title=post.title if title is None else title,
+                                content=post.content if content is None else content,
+                                user_id=post.user_id if user_id is None else user_id,
+                                version=version))
+        for post in updated:
+            self._put_post(post)
+        self._log({"op": "update_posts", "posts": [post.to_dict() for post in updated],
+                   "version": version})
+        return selected
+
+    @_writer
+    def delete_posts(self, post_ids: Optional[Sequence[int]] = None,
+                     by_user: Optional[int] = None) -> List[int]:
+        """Delete the selected posts, taking one version"""
+        selected = self._select_posts(post_ids, by_user)
+        if selected:
+            version = self._tick()
+            self._drop_posts(selected, version)
+            self._log({"op": "delete_posts", "ids": selected, "version": version})
+        return selected
+
+    @_reader
+    def get_posts_version(self) -> int:
+        """Get the version of the posts collection"""
+        return self._posts_version
+
+    @_reader
     def get_posts_by_user(self, user_id: int) -> List[Post]:
         """Get all posts by a specific user"""
-        if not self.user_exists(user_id):
-            return []
-        return [post for post in self._posts.values() if post.user_id == user_id]
+        return [self._posts[post_id] for post_id in self._user_post_ids(user_id)]
+
+    @_reader
+    def count_posts_by_user(self, user_id: int) -> int:
+        """Count the posts by a specific user"""
+        if self._user_posts is None:
+            return self._posts.count_by_user(user_id)
+        return len(self._user_posts.get(user_id, []))
+
+    def iter_posts_by_user(self, user_id: int, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over a user's posts in id order without copying the list"""
+        self._ensure_loaded()
+        return self._iter_records(lambda: self._user_post_ids(user_id), self._posts, batch_size)
+
+    @_reader
+    def get_posts_by_user_page(self, user_id: int, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts by a user with an id greater than `after`"""
+        post_ids = self._user_post_ids(user_id)
+        return [self._posts[post_id] for post_id in self._page_ids(post_ids, after, limit)]
+
+    @_reader
+    def query_posts(self, user_ids: Optional[Sequence[int]] = None, min_id: Optional[int] = None,
+                    max_id: Optional[int] = None, title_prefix: Optional[str] = None,
+                    sort: str = 'id', offset: int = 0, limit: Optional[int] = None,
+                    explain: bool = False) -> Tuple[List[Post], Optional[str]]:
+        """
+        Get the posts matching every given filter, in `sort` order.
+
+        One index drives the query: the id list for an id range, the user
+        index for a set of owners, or the title index for a title prefix,
+        whichever yields the fewest posts. The other filters are checked on
+        each post it yields. When the driving index is already in the
+        requested order, the walk stops as soon as the page is full.
+        """
+        if sort not in POST_SORTS:
+            raise ValueError(f"Unknown sort: {sort!r}")
+        users = None if user_ids is None else set(user_ids)
+        prefix = None if title_prefix is None else self._normalize_prefix(title_prefix)
+        by_title = sort in ('title', '-title')
+        descending = sort.startswith('-')
+        wanted = None if limit is None else offset + limit
+
+        # The id range and the user lists have known sizes; title matches are
+        # only counted up to the best size so far
+        low = 0 if min_id is None else bisect_left(self._post_ids, min_id)
+        high = len(self._post_ids) if max_id is None else bisect_right(self._post_ids, max_id)
+        driver, size = 'id', max(high - low, 0)
+        if users is not None and size:
+            user_size = self._count_user_posts(users)
+            if user_size < size:
+                driver, size = 'user_id', user_size
+        if prefix is not None:
+            title_size = sum(1 for _ in islice(self._titles().iter_prefix(prefix), size + 1))
+            if title_size <= size:
+                driver, size = 'title', title_size
+        elif by_title and (size == len(self._post_ids)
+                           or wanted is not None and wanted * len(self._post_ids) < size * size):
+            # Walking every title in order until the page is full should
+            # examine about wanted * posts / size posts, fewer than sorting
+            # the `size` candidates
+            driver = 'title'
+
+        if driver == 'id':
+            rows = range(high - 1, low - 1, -1) if descending and not by_title else range(low, high)
+            post_ids = (self._post_ids[row] for row in rows)
+        elif driver == 'user_id':
+            # Only the chosen driver's posts are listed
+            post_ids = self._users_post_ids(users, descending and not by_title)
+        else:
+            post_ids = (post_id for _, post_id in self._titles().iter_prefix(
+                prefix or '', reverse=sort == '-title'))
+        in_order = (driver == 'title') == by_title
+
+        matches: List[Post] = []
+        examined = 0
+        for post_id in post_ids:
+            examined += 1
+            if (min_id is not None and post_id < min_id) or (max_id is not None and post_id > max_id):
+                continue
+            post = self._posts[post_id]
+            if users is not None and post.user_id not in users:
+                continue
+            if prefix is not None and not self._normalize_title(post.title).startswith(prefix):
+                continue
+            matches.append(post)
+            if in_order and len(matches) == wanted:
+                break
+        if not in_order:
+            if by_title:
+                matches.sort(key=lambda post: (self._normalize_title(post.title), post.id),
+                             reverse=descending)
+            else:
+                matches.sort(key=lambda post: post.id, reverse=descending)
+
+        plan = None
+        if explain:
+            index = 'user_id column scan' if driver == 'user_id' and self._user_posts is None \
+                else f'{driver} index'
+            plan = (f"{index}; {examined} of {len(self._post_ids)} posts examined; "
+                    f"{'index order' if in_order else 'sorted in memory'}")
+        return matches[offset:wanted], plan
+
+    @_reader
+    def search_posts(self, query: str, offset: int = 0, limit: int = 100) -> Tuple[List[Post], int]:
+        """Get one page of the posts matching a full-text query, best first, and the match count"""
+        if not self._search_enabled:
+            raise SearchUnavailable("The search index is disabled")
+        post_ids, total = self._search_index().search(query, offset, limit)
+        return [self._posts[post_id] for post_id in post_ids], total
 
 
-# Global data store instance
-data_store = DataStore()
+# Global data store instance, backed by the configured storage backend
+data_store: Storage = create_storage(Config)
@@ -0,0 +1,134 @@
+"""
+Streaming NDJSON imports.
+
+`import_ndjson` reads a request body one line at a time, validates each
+record with the same schema rules as the single-record create endpoints, and
+inserts the valid ones through the store's batch creates, `chunk_size`
+records at a time. Only one chunk of records and at most
+`MAX_REPORTED_ERRORS` error entries are held at once, so memory stays bounded
+however long the body is.
+
+Unlike the batch endpoints, an import is not all-or-nothing: every valid line
+is imported, and rejected lines are counted and reported by line number.
+"""
+
+import io
+import json
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from marshmallow import Schema, ValidationError
+
+from storage import BatchRejected
+from validators import load
+
+MAX_LINE_BYTES = 1024 * 1024
+READ_BUFFER_BYTES = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    """Counters and the first few errors of an import."""
+
+    def __init__(self):
+        self.lines = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    def fail(self, line: int, error: Any):
+        """Count a rejected line, keeping its error if there is room"""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the report as sent to the client"""
+        elapsed = time.perf_counter() - self._started
+        return {
+            "lines": self.lines,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(self.imported / elapsed) if elapsed else 0,
+        }
+
+
+def iter_lines(stream: BinaryIO, max_line_bytes: int = MAX_LINE_BYTES
+               ) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line number, line) for each line of a byte stream.
+
+    Lines longer than `max_line_bytes` are skipped without being buffered
+    and yielded as None.
+    """
+    number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_line_bytes:
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes)
+            yield number, None
+        else:
+            yield number, line
+
+
+def import_ndjson(stream: BinaryIO, schema: Schema, context: Dict[str, Any],
+                  create: Callable[[List[Dict[str, Any]]], list], rejected_error: Any,
+                  chunk_size: int) -> Dict[str, Any]:
+    """
+    Validate and insert the records of an NDJSON stream in chunks.
+
+    `create` inserts a list of loaded records in one step and may raise
+    `BatchRejected`; rejected records are reported with `rejected_error` and
+    the rest of their chunk is inserted.
+    """
+    # WSGI input streams are unbuffered, and readline on an unbuffered
+    # stream reads a byte at a time
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, READ_BUFFER_BYTES)
+    report = ImportReport()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    def flush():
+        pending = chunk[:]
+        chunk.clear()
+        while pending:
+            try:
+                create([data for _, data in pending])
+            except BatchRejected as err:
+                rejected = set(err.indexes)
+                for index in err.indexes:
+                    report.fail(pending[index][0], rejected_error)
+                pending = [item for index, item in enumerate(pending) if index not in rejected]
+                continue
+            report.imported += len(pending)
+            return
+
+    for number, line in iter_lines(stream):
+        report.lines += 1
+        if line is None:
+            report.fail(number, f"Line longer than {MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            report.fail(number, "Invalid JSON")
+            continue
+        try:
+            chunk.append((number, load(schema, data, context)))
+        except ValidationError as err:
+            report.fail(number, err.messages)
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    return report.to_dict()
@@ -0,0 +1,69 @@
+"""
+Synchronization primitives for the data store.
+
+`ReadWriteLock` lets any number of readers hold the lock together while
+writers get exclusive access. Waiting writers block new readers, so a steady
+stream of reads cannot starve writes. The lock is not reentrant.
+"""
+
+import threading
+
+
+class _Guard:
+    """Context manager pairing an acquire and a release callable."""
+
+    __slots__ = ('_acquire', '_release')
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._release()
+
+
+class ReadWriteLock:
+    """Writer-preferring reader-writer lock."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self.read = _Guard(self.acquire_read, self.release_read)
+        self.write = _Guard(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        """Block until no writer holds or waits for the lock, then share it."""
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """Release a shared hold on the lock."""
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """Block until the lock is free, then hold it exclusively."""
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        """Release an exclusive hold on the lock."""
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
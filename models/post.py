@@ -1,12 +1,20 @@
-from typing import Dict, Any
+import json
+from typing import Dict, Any, Optional, Tuple
 
 
 class Post:
-    def __init__(self, id: int, title: str, content: str, user_id: int):
+    __slots__ = ('id', 'title', 'content', 'user_id', 'version', '_json', '_projections')
+
+    def __init__(self, id: int, title: str, content: str, user_id: int, version: int = 0):
         self.id = id
         self.title = title
         self.content = content
         self.user_id = user_id
+        # Store-assigned; increases with every change to this post
+        self.version = version
+        self._json: Optional[bytes] = None
+        # Encodings of sparse fieldsets, keyed by the field names
+        self._projections: Optional[Dict[Tuple[str, ...], bytes]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -16,11 +24,31 @@ class Post:
             "user_id": self.user_id
         }
 
+    def to_json(self) -> bytes:
+        """Return the compact JSON encoding of this post, computed once"""
+        if self._json is None:
+            self._json = json.dumps(
+                self.to_dict(), separators=(',', ':'), sort_keys=True).encode()
+        return self._json
+
+    def to_json_fields(self, fields: Tuple[str, ...]) -> bytes:
+        """Return the compact JSON encoding of some fields of this post, computed once per set"""
+        projections = self._projections
+        if projections is None:
+            projections = self._projections = {}
+        encoded = projections.get(fields)
+        if encoded is None:
+            encoded = projections[fields] = json.dumps(
+                {name: getattr(self, name) for name in fields},
+                separators=(',', ':'), sort_keys=True).encode()
+        return encoded
+
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'Post':
+    def from_dict(cls, data: Dict[str, Any], version: int = 0) -> 'Post':
         return cls(
             id=data["id"],
             title=data["title"],
             content=data["content"],
-            user_id=data["user_id"]
+            user_id=data["user_id"],
+            version=version
         )
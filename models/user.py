@@ -1,11 +1,19 @@
-from typing import Dict, Any
+import json
+from typing import Dict, Any, Optional, Tuple
 
 
 class User:
-    def __init__(self, id: int, name: str, email: str):
+    __slots__ = ('id', 'name', 'email', 'version', '_json', '_projections')
+
+    def __init__(self, id: int, name: str, email: str, version: int = 0):
         self.id = id
         self.name = name
         self.email = email
+        # Store-assigned; increases with every change to this user
+        self.version = version
+        self._json: Optional[bytes] = None
+        # Encodings of sparse fieldsets, keyed by the field names
+        self._projections: Optional[Dict[Tuple[str, ...], bytes]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -14,10 +22,30 @@ class User:
             "email": self.email
         }
 
+    def to_json(self) -> bytes:
+        """Return the compact JSON encoding of this user, computed once"""
+        if self._json is None:
+            self._json = json.dumps(
+                self.to_dict(), separators=(',', ':'), sort_keys=True).encode()
+        return self._json
+
+    def to_json_fields(self, fields: Tuple[str, ...]) -> bytes:
+        """Return the compact JSON encoding of some fields of this user, computed once per set"""
+        projections = self._projections
+        if projections is None:
+            projections = self._projections = {}
+        encoded = projections.get(fields)
+        if encoded is None:
+            encoded = projections[fields] = json.dumps(
+                {name: getattr(self, name) for name in fields},
+                separators=(',', ':'), sort_keys=True).encode()
+        return encoded
+
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'User':
+    def from_dict(cls, data: Dict[str, Any], version: int = 0) -> 'User':
         return cls(
             id=data["id"],
             name=data["name"],
-            email=data["email"]
+            email=data["email"],
+            version=version
         )
@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints.
+
+Clients pass `limit` and an opaque `after` cursor; the next page is
+advertised through a `Link: <...>; rel="next"` response header. Requests
+without either parameter keep receiving the full collection.
+"""
+
+import base64
+import binascii
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import Response, request
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class PaginationError(ValueError):
+    """Raised when pagination query parameters are invalid."""
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last item on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise PaginationError('Invalid cursor')
+    if last_id < 0:
+        raise PaginationError('Invalid cursor')
+    return last_id
+
+
+def parse_page_args() -> Optional[Tuple[Optional[int], int]]:
+    """
+    Read `after` and `limit` from the current request.
+
+    Returns None when the request is not paginated, otherwise the decoded
+    `after` id (or None for the first page) and the page size.
+    """
+    raw_limit = request.args.get('limit')
+    raw_after = request.args.get('after')
+    if raw_limit is None and raw_after is None:
+        return None
+
+    limit = DEFAULT_LIMIT
+    if raw_limit is not None:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            raise PaginationError('Invalid limit')
+        if not 1 <= limit <= MAX_LIMIT:
+            raise PaginationError(f'Limit must be between 1 and {MAX_LIMIT}')
+
+    after = decode_cursor(raw_after) if raw_after is not None else None
+    return after, limit
+
+
+def add_next_link(response: Response, items: List, limit: int,
+                  position: Optional[int] = None) -> Response:
+    """
+    Attach a `Link` header pointing at the page following `items`.
+
+    `items` is expected to hold up to `limit + 1` records; the extra record
+    only signals that another page exists and is not returned to the client.
+    The cursor is the id of the last record returned, or `position` for
+    results that are not in id order.
+    """
+    if len(items) > limit:
+        args = request.args.to_dict()
+        args['limit'] = str(limit)
+        args['after'] = encode_cursor(items[limit - 1].id if position is None else position)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
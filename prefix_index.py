@@ -0,0 +1,139 @@
+"""
+Sorted prefix index for type-ahead lookups.
+
+`PrefixIndex` keeps (key, id) pairs in sorted order. All keys starting with a
+prefix sit next to each other in that order, so a lookup is a binary search
+for the first of them followed by a walk over the matches: O(log n + k) for k
+results. An id can be stored under several keys (a user's name and email),
+and the walk returns each id once, at its first matching key.
+
+The pairs are split into sorted buckets of at most `2 * BUCKET_SIZE`, with
+the last pair of each bucket kept in a separate list to binary-search on, so
+an insert or removal shifts one bucket instead of the whole index.
+"""
+
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator, List, Tuple
+
+BUCKET_SIZE = 1000
+
+Entry = Tuple[str, int]
+
+_HIGHEST = '\U0010ffff'
+
+
+class PrefixIndex:
+    """Sorted (key, id) pairs with prefix lookups."""
+
+    def __init__(self):
+        self._buckets: List[List[Entry]] = []
+        # Last entry of each bucket
+        self._maxes: List[Entry] = []
+        self._size = 0
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry]) -> 'PrefixIndex':
+        """Build an index from (key, id) pairs in one sort"""
+        index = cls()
+        ordered = sorted(entries)
+        index._buckets = [ordered[start:start + BUCKET_SIZE]
+                          for start in range(0, len(ordered), BUCKET_SIZE)]
+        index._maxes = [bucket[-1] for bucket in index._buckets]
+        index._size = len(ordered)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        """Remove every entry"""
+        self._buckets.clear()
+        self._maxes.clear()
+        self._size = 0
+
+    def add(self, key: str, item_id: int):
+        """Index `item_id` under `key`"""
+        entry = (key, item_id)
+        self._size += 1
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+        number = min(bisect_left(self._maxes, entry), len(self._buckets) - 1)
+        bucket = self._buckets[number]
+        insort(bucket, entry)
+        self._maxes[number] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self._buckets[number:number + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._maxes[number:number + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+
+    def remove(self, key: str, item_id: int):
+        """Remove an entry added with `add`"""
+        entry = (key, item_id)
+        number = bisect_left(self._maxes, entry)
+        bucket = self._buckets[number]
+        del bucket[bisect_left(bucket, entry)]
+        self._size -= 1
+        if bucket:
+            self._maxes[number] = bucket[-1]
+        else:
+            del self._buckets[number]
+            del self._maxes[number]
+
+    def iter_prefix(self, prefix: str, reverse: bool = False) -> Iterator[Entry]:
+        """Yield the entries whose key starts with `prefix`, in key order or reversed"""
+        if reverse:
+            yield from self._iter_prefix_reversed(prefix)
+            return
+        start = (prefix,)
+        number = bisect_left(self._maxes, start)
+        if number == len(self._buckets):
+            return
+        row = bisect_left(self._buckets[number], start)
+        while number < len(self._buckets):
+            bucket = self._buckets[number]
+            while row < len(bucket):
+                entry = bucket[row]
+                if not entry[0].startswith(prefix):
+                    return
+                yield entry
+                row += 1
+            number += 1
+            row = 0
+
+    def _iter_prefix_reversed(self, prefix: str) -> Iterator[Entry]:
+        """Yield the entries whose key starts with `prefix`, last first"""
+        # Every key starting with the prefix sorts before this one
+        end = (prefix + _HIGHEST,)
+        number = bisect_left(self._maxes, end)
+        if number == len(self._buckets):
+            if not self._buckets:
+                return
+            number -= 1
+            row = len(self._buckets[number])
+        else:
+            row = bisect_left(self._buckets[number], end)
+        while number >= 0:
+            bucket = self._buckets[number]
+            while row > 0:
+                row -= 1
+                entry = bucket[row]
+                if not entry[0].startswith(prefix):
+                    return
+                yield entry
+            number -= 1
+            row = len(self._buckets[number]) if number >= 0 else 0
+
+    def match(self, prefix: str, limit: int) -> List[int]:
+        """Return up to `limit` distinct ids with a key starting with `prefix`, in key order"""
+        found: List[int] = []
+        if limit <= 0:
+            return found
+        seen = set()
+        for _, item_id in self.iter_prefix(prefix):
+            if item_id not in seen:
+                seen.add(item_id)
+                found.append(item_id)
+                if len(found) == limit:
+                    break
+        return found
@@ -0,0 +1,137 @@
+"""
+Versioned response cache for list endpoints.
+
+Full list responses are rebuilt from every record on each request, even
+though most requests arrive while nothing has changed. `ResponseCache` keeps
+the encoded bodies, keyed by collection, path, query string and the
+collection's version, so a repeated request is answered with the bytes
+already built.
+
+Invalidation follows the versions rather than hooks in the store: every
+mutation gives its collection a new version, so entries for older versions
+can never be hit again. The first response cached at a newer version drops
+all older entries of that collection at once, and the byte budget evicts the
+least recently used entries. Because versions come from the store, this also
+holds for the SQLite backend, where other worker processes do the writing.
+
+Counters are per process; with several workers each keeps its own cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from flask import Response, request
+
+from config import Config
+
+# Rough per-entry cost of the key, headers and bookkeeping, in bytes
+ENTRY_OVERHEAD = 256
+
+_Key = Tuple[str, str, Tuple[Tuple[str, str], ...], int]
+
+
+class ResponseCache:
+    """Byte-bounded LRU cache of encoded responses."""
+
+    def __init__(self, max_bytes: int):
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[_Key, Tuple[bytes, list, int]]' = OrderedDict()
+        self._latest: Dict[str, int] = {}
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: _Key):
+        """Return the cached body and headers for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: _Key, body: bytes, headers: list):
+        """Cache a response, evicting older versions and cold entries"""
+        collection, version = key[0], key[-1]
+        cost = len(body) + ENTRY_OVERHEAD
+        with self._lock:
+            if version < self._latest.get(collection, -1) or cost > self.max_bytes:
+                return
+            if version > self._latest.get(collection, -1):
+                self._latest[collection] = version
+                for stale in [k for k in self._entries
+                              if k[0] == collection and k[-1] < version]:
+                    self._discard(stale)
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (body, headers, cost)
+            self.size += cost
+            self._shrink()
+
+    def resize(self, max_bytes: int):
+        """Change the byte budget, evicting entries that no longer fit"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return the counters and current occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _discard(self, key: _Key):
+        """Remove an entry (caller holds the lock)"""
+        self.size -= self._entries.pop(key)[2]
+
+    def _shrink(self):
+        """Evict least recently used entries until within budget (caller holds the lock)"""
+        while self.size > self.max_bytes:
+            _, (_, _, cost) = self._entries.popitem(last=False)
+            self.size -= cost
+            self.evictions += 1
+
+
+response_cache = ResponseCache(Config.RESPONSE_CACHE_MAX_BYTES)
+
+
+def cached(collection: str, version: int, build: Callable[[], Response]) -> Callable[[], Response]:
+    """
+    Wrap a list response builder with the response cache.
+
+    `version` must be the collection version read before the records, as for
+    `conditional`, which the returned callable is meant to be passed to.
+    """
+    def build_cached() -> Response:
+        if response_cache.max_bytes <= 0:
+            return build()
+        key = (collection, request.path, tuple(sorted(request.args.items(multi=True))), version)
+        entry = response_cache.get(key)
+        if entry is not None:
+            body, headers = entry
+            return Response(body, headers=headers, mimetype='application/json')
+        response = build()
+        if response.status_code == 200 and not response.is_streamed:
+            headers = [(name, value) for name, value in response.headers
+                       if name not in ('Content-Type', 'Content-Length')]
+            response_cache.put(key, response.get_data(), headers)
+        return response
+    return build_cached
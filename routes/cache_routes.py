@@ -0,0 +1,10 @@
+from flask import Blueprint, jsonify
+from response_cache import response_cache
+
+cache_bp = Blueprint('cache', __name__, url_prefix='/api/cache')
+
+
+@cache_bp.route('/stats', methods=['GET'])
+def get_cache_stats():
+    """Get the response cache counters for this worker process"""
+    return jsonify(response_cache.stats())
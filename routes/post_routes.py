@@ -1,25 +1,178 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from data_store import data_store
-from schemas import post_schema, posts_schema, post_update_schema
+from schemas import post_schema, post_update_schema, post_batch_schema, BATCH_CONTEXT
 from marshmallow import ValidationError
+from pagination import DEFAULT_LIMIT, PaginationError, parse_page_args, add_next_link
+from streaming import wants_stream, stream_json_array
+from serializers import (FieldsError, record_encoder, requested_schema, json_response,
+                         json_array_response)
+from validators import load, load_many
+from ingest import import_ndjson
+from export import ExportFormatError, export_format, export_response
+from conditional import conditional, with_etag, if_match_version
+from storage import POST_SORTS, BatchRejected, SearchUnavailable, VersionConflict
+from response_cache import cached
 
 posts_bp = Blueprint('posts', __name__, url_prefix='/api/posts')
 
+# Largest number of user ids accepted by the user_id filter
+MAX_FILTER_VALUES = 100
+_QUERY_ARGS = ('user_id', 'min_id', 'max_id', 'title_prefix', 'sort', 'explain')
+
+
+def _int_arg(name, value):
+    """Parse a non-negative integer query parameter or raise ValueError"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if number < 0:
+        raise ValueError(f"'{name}' must not be negative")
+    return number
+
+
+def _parse_post_query():
+    """
+    Read the filter, sort and explain parameters of a post listing.
+
+    Returns None when there are none, otherwise the keyword arguments of
+    `query_posts`; raises ValueError for invalid values.
+    """
+    if not any(name in request.args for name in _QUERY_ARGS):
+        return None
+    query = {}
+    if 'user_id' in request.args:
+        values = [value for arg in request.args.getlist('user_id')
+                  for value in arg.split(',') if value.strip()]
+        if not values or len(values) > MAX_FILTER_VALUES:
+            raise ValueError(f"'user_id' takes 1 to {MAX_FILTER_VALUES} ids")
+        query['user_ids'] = [_int_arg('user_id', value) for value in values]
+    for name in ('min_id', 'max_id'):
+        if name in request.args:
+            query[name] = _int_arg(name, request.args[name])
+    if 'title_prefix' in request.args:
+        if not request.args['title_prefix'].strip():
+            raise ValueError("'title_prefix' must not be blank")
+        query['title_prefix'] = request.args['title_prefix']
+    query['sort'] = request.args.get('sort', 'id')
+    if query['sort'] not in POST_SORTS:
+        raise ValueError(f"'sort' must be one of: {', '.join(POST_SORTS)}")
+    query['explain'] = request.args.get('explain', '').lower() in ('1', 'true', 'yes')
+    return query
+
+
+def _query_posts(query, page, version, schema):
+    """Answer a filtered or sorted post listing from the store's indexes"""
+    offset, limit = 0, None
+    if page is not None:
+        after, limit = page
+        if after is not None:
+            # Id orders page by keyset; title orders by position
+            if query['sort'] == 'id':
+                query['min_id'] = max(query.get('min_id', 0), after + 1)
+            elif query['sort'] == '-id':
+                query['max_id'] = min(query.get('max_id', after - 1), after - 1)
+            else:
+                offset = after
+
+    def build():
+        posts, plan = data_store.query_posts(
+            **query, offset=offset, limit=None if limit is None else limit + 1)
+        response = json_array_response(posts if limit is None else posts[:limit], schema)
+        if plan is not None:
+            response.headers['X-Query-Plan'] = plan
+        if limit is not None:
+            position = None if query['sort'] in ('id', '-id') else offset + limit
+            add_next_link(response, posts, limit, position)
+        return response
+    return conditional(version, cached('posts', version, build))
+
 
 @posts_bp.route('/', methods=['GET'])
 def get_posts():
-    """Get all posts"""
-    posts = data_store.get_all_posts()
-    return jsonify(posts_schema.dump(posts))
+    """Get all posts, optionally filtered, sorted, one page at a time or as a stream"""
+    version = data_store.get_posts_version()
+    try:
+        schema = requested_schema(post_schema)
+        query = _parse_post_query()
+        if query is not None:
+            return _query_posts(query, parse_page_args(), version, schema)
+    except ValueError as err:
+        # PaginationError and FieldsError are ValueErrors too
+        return jsonify({"error": str(err)}), 400
+
+    if wants_stream():
+        return conditional(version, lambda: stream_json_array(
+            data_store.iter_posts(), record_encoder(schema)))
+
+    try:
+        page = parse_page_args()
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+
+    if page is None:
+        return conditional(version, cached('posts', version, lambda: json_array_response(
+            data_store.get_all_posts(), schema)))
+
+    after, limit = page
+
+    def build_page():
+        posts = data_store.get_posts_page(after, limit + 1)
+        return add_next_link(json_array_response(posts[:limit], schema), posts, limit)
+    return conditional(version, cached('posts', version, build_page))
+
+
+@posts_bp.route('/export', methods=['GET'])
+def export_posts():
+    """Stream every post as NDJSON or CSV, as of the start of the export"""
+    try:
+        fmt = export_format()
+        schema = requested_schema(post_schema)
+    except (ExportFormatError, FieldsError) as err:
+        return jsonify({"error": str(err)}), 400
+    return export_response(data_store.export_posts(), schema, 'posts', fmt)
+
+
+@posts_bp.route('/search', methods=['GET'])
+def search_posts():
+    """Full-text search over post titles and contents, best matches first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    try:
+        page = parse_page_args()
+        schema = requested_schema(post_schema)
+    except (PaginationError, FieldsError) as err:
+        return jsonify({"error": str(err)}), 400
+    # Ranked results are paged by position: the cursor counts the matches
+    # already returned
+    offset, limit = page if page is not None else (None, DEFAULT_LIMIT)
+    offset = offset or 0
+
+    version = data_store.get_posts_version()
+
+    def build_results():
+        posts, total = data_store.search_posts(query, offset, limit + 1)
+        response = json_array_response(posts[:limit], schema)
+        response.headers['X-Total-Count'] = str(total)
+        return add_next_link(response, posts, limit, offset + limit)
+    try:
+        return conditional(version, cached('posts', version, build_results))
+    except SearchUnavailable as err:
+        return jsonify({"error": str(err)}), 503
 
 
 @posts_bp.route('/<int:post_id>', methods=['GET'])
 def get_post(post_id):
     """Get a single post by ID"""
+    try:
+        schema = requested_schema(post_schema)
+    except FieldsError as err:
+        return jsonify({"error": str(err)}), 400
     post = data_store.get_post(post_id)
     if not post:
         return jsonify({"error": "Post not found"}), 404
-    return jsonify(post_schema.dump(post))
+    return conditional(post.version, lambda: json_response(post, schema))
 
 
 @posts_bp.route('/', methods=['POST'])
@@ -32,7 +185,7 @@ def create_post():
 
     try:
         # Validate the incoming data using PostSchema
-        validated_data = post_schema.load(data)
+        validated_data = load(post_schema, data)
     except ValidationError as err:
         # Check if it's an invalid user_id error
         if 'user_id' in err.messages and 'User with the specified user_id does not exist' in str(err.messages['user_id']):
@@ -41,7 +194,128 @@ def create_post():
 
     new_post = data_store.create_post(
         validated_data["title"], validated_data["content"], validated_data["user_id"])
-    return jsonify(post_schema.dump(new_post)), 201
+    if not new_post:
+        # The user was deleted after validation
+        return jsonify({"error": "User not found"}), 404
+    return with_etag(json_response(new_post, post_schema, 201), new_post.version)
+
+
+@posts_bp.route('/batch', methods=['POST'])
+def create_posts():
+    """Create many posts at once; either all are created or none"""
+    data = request.get_json()
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Expected a non-empty JSON array"}), 400
+    max_items = current_app.config['BATCH_MAX_ITEMS']
+    if len(data) > max_items:
+        return jsonify({"error": f"Batches are limited to {max_items} items"}), 413
+
+    validated, errors = load_many(post_batch_schema, data, BATCH_CONTEXT)
+    if errors:
+        return jsonify({"error": "Validation failed", "details": errors}), 400
+
+    try:
+        new_posts = data_store.create_posts(
+            [(item["title"], item["content"], item["user_id"]) for item in validated])
+    except BatchRejected as err:
+        details = {index: {"user_id": ["User with the specified user_id does not exist."]}
+                   for index in err.indexes}
+        return jsonify({"error": "User not found", "details": details}), 404
+    return json_array_response(new_posts, post_schema, 201)
+
+
+@posts_bp.route('/import', methods=['POST'])
+def import_posts():
+    """Import posts from an NDJSON body, one post per line, in chunks"""
+    report = import_ndjson(
+        request.stream, post_batch_schema, BATCH_CONTEXT,
+        lambda posts: data_store.create_posts(
+            [(post["title"], post["content"], post["user_id"]) for post in posts]),
+        {"user_id": ["User with the specified user_id does not exist."]},
+        current_app.config['IMPORT_CHUNK_SIZE'])
+    return jsonify(report)
+
+
+def _parse_selection(data):
+    """
+    Read the posts a bulk operation applies to: `ids`, a `filter` on
+    `user_id`, or both. Returns (ids, by_user) or raises ValueError.
+    """
+    ids = data.get("ids")
+    filters = data.get("filter")
+    if ids is None and filters is None:
+        raise ValueError("Select posts with 'ids' or 'filter'")
+
+    by_user = None
+    if filters is not None:
+        if not isinstance(filters, dict) or set(filters) != {"user_id"}:
+            raise ValueError("'filter' supports exactly one key: 'user_id'")
+        by_user = filters["user_id"]
+        if type(by_user) is not int or by_user < 1:
+            raise ValueError("'filter.user_id' must be a positive integer")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(type(post_id) is int for post_id in ids):
+            raise ValueError("'ids' must be an array of integers")
+        max_items = current_app.config['BATCH_MAX_ITEMS']
+        if len(ids) > max_items:
+            raise ValueError(f"Batches are limited to {max_items} items")
+    return ids, by_user
+
+
+def _summary(count_key, ids, selected):
+    """Summarize a bulk operation without echoing the records"""
+    summary = {count_key: len(selected)}
+    if ids is not None:
+        found = set(selected)
+        summary["not_found"] = sorted({post_id for post_id in ids if post_id not in found})
+    return jsonify(summary)
+
+
+@posts_bp.route('/batch/update', methods=['POST'])
+def update_posts():
+    """Apply one patch to many posts at once"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "No JSON data provided"}), 400
+    try:
+        ids, by_user = _parse_selection(data)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    patch = data.get("patch")
+    if not isinstance(patch, dict) or not patch:
+        return jsonify({"error": "'patch' must be a non-empty object"}), 400
+    try:
+        validated_data = load(post_update_schema, patch)
+    except ValidationError as err:
+        if 'user_id' in err.messages and 'User with the specified user_id does not exist' in str(err.messages['user_id']):
+            return jsonify({"error": "User not found"}), 404
+        return jsonify({"error": "Validation failed", "details": err.messages}), 400
+
+    selected = data_store.update_posts(
+        ids, by_user,
+        title=validated_data.get('title'),
+        content=validated_data.get('content'),
+        user_id=validated_data.get('user_id')
+    )
+    if selected is None:
+        # The target user was deleted after validation
+        return jsonify({"error": "User not found"}), 404
+    return _summary("updated", ids, selected)
+
+
+@posts_bp.route('/batch/delete', methods=['POST'])
+def delete_posts():
+    """Delete many posts at once"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "No JSON data provided"}), 400
+    try:
+        ids, by_user = _parse_selection(data)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    return _summary("deleted", ids, data_store.delete_posts(ids, by_user))
 
 
 @posts_bp.route('/<int:post_id>', methods=['PUT'])
@@ -57,36 +331,71 @@ def update_post(post_id):
 
     try:
         # Validate the incoming data using PostUpdateSchema
-        validated_data = post_update_schema.load(data)
+        validated_data = load(post_update_schema, data)
     except ValidationError as err:
         # Check if it's an invalid user_id error
         if 'user_id' in err.messages and 'User with the specified user_id does not exist' in str(err.messages['user_id']):
             return jsonify({"error": "User not found"}), 404
         return jsonify({"error": "Validation failed", "details": err.messages}), 400
 
-    updated_post = data_store.update_post(
-        post_id,
-        title=validated_data.get('title'),
-        content=validated_data.get('content'),
-        user_id=validated_data.get('user_id')
-    )
+    try:
+        updated_post = data_store.update_post(
+            post_id,
+            title=validated_data.get('title'),
+            content=validated_data.get('content'),
+            user_id=validated_data.get('user_id'),
+            expected_version=if_match_version()
+        )
+    except VersionConflict:
+        return jsonify({"error": "Precondition failed"}), 412
+    if not updated_post:
+        # The post or the target user was deleted after validation
+        if not data_store.get_post(post_id):
+            return jsonify({"error": "Post not found"}), 404
+        return jsonify({"error": "User not found"}), 404
 
-    return jsonify(post_schema.dump(updated_post))
+    return with_etag(json_response(updated_post, post_schema), updated_post.version)
 
 
 @posts_bp.route('/<int:post_id>', methods=['DELETE'])
 def delete_post(post_id):
     """Delete a post"""
-    if not data_store.delete_post(post_id):
+    try:
+        deleted = data_store.delete_post(post_id, expected_version=if_match_version())
+    except VersionConflict:
+        return jsonify({"error": "Precondition failed"}), 412
+    if not deleted:
         return jsonify({"error": "Post not found"}), 404
     return '', 204
 
 
 @posts_bp.route('/user/<int:user_id>', methods=['GET'])
 def get_posts_by_user(user_id):
-    """Get all posts by a specific user"""
+    """Get all posts by a specific user, optionally one page at a time or as a stream"""
+    version = data_store.get_posts_version()
     if not data_store.user_exists(user_id):
         return jsonify({"error": "User not found"}), 404
+    try:
+        schema = requested_schema(post_schema)
+    except FieldsError as err:
+        return jsonify({"error": str(err)}), 400
+
+    if wants_stream():
+        return conditional(version, lambda: stream_json_array(
+            data_store.iter_posts_by_user(user_id), record_encoder(schema)))
+
+    try:
+        page = parse_page_args()
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+
+    if page is None:
+        return conditional(version, cached('posts', version, lambda: json_array_response(
+            data_store.get_posts_by_user(user_id), schema)))
+
+    after, limit = page
 
-    user_posts = data_store.get_posts_by_user(user_id)
-    return jsonify(posts_schema.dump(user_posts))
+    def build_page():
+        user_posts = data_store.get_posts_by_user_page(user_id, after, limit + 1)
+        return add_next_link(json_array_response(user_posts[:limit], schema), user_posts, limit)
+    return conditional(version, cached('posts', version, build_page))
@@ -1,25 +1,98 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from data_store import data_store
-from schemas import user_schema, users_schema, user_update_schema
+from schemas import user_schema, user_update_schema, user_batch_schema, BATCH_CONTEXT
 from marshmallow import ValidationError
+from pagination import PaginationError, parse_page_args, add_next_link
+from streaming import wants_stream, stream_json_array
+from serializers import (FieldsError, record_encoder, requested_schema, json_response,
+                         json_array_response)
+from validators import load, load_many
+from ingest import import_ndjson
+from export import ExportFormatError, export_format, export_response
+from conditional import conditional, with_etag, if_match_version
+from storage import BatchRejected, VersionConflict
+from response_cache import cached
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 100
+
 
 @users_bp.route('/', methods=['GET'])
 def get_users():
-    """Get all users"""
-    users = data_store.get_all_users()
-    return jsonify(users_schema.dump(users))
+    """Get all users, optionally one page at a time or as a stream"""
+    version = data_store.get_users_version()
+    try:
+        schema = requested_schema(user_schema)
+    except FieldsError as err:
+        return jsonify({"error": str(err)}), 400
+
+    if wants_stream():
+        return conditional(version, lambda: stream_json_array(
+            data_store.iter_users(), record_encoder(schema)))
+
+    try:
+        page = parse_page_args()
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+
+    if page is None:
+        return conditional(version, cached('users', version, lambda: json_array_response(
+            data_store.get_all_users(), schema)))
+
+    after, limit = page
+
+    def build_page():
+        users = data_store.get_users_page(after, limit + 1)
+        return add_next_link(json_array_response(users[:limit], schema), users, limit)
+    return conditional(version, cached('users', version, build_page))
+
+
+@users_bp.route('/export', methods=['GET'])
+def export_users():
+    """Stream every user as NDJSON or CSV, as of the start of the export"""
+    try:
+        fmt = export_format()
+        schema = requested_schema(user_schema)
+    except (ExportFormatError, FieldsError) as err:
+        return jsonify({"error": str(err)}), 400
+    return export_response(data_store.export_users(), schema, 'users', fmt)
+
+
+@users_bp.route('/suggest', methods=['GET'])
+def suggest_users():
+    """Type-ahead: users whose name or email starts with `q`"""
+    prefix = request.args.get('q', '')
+    if not prefix.strip():
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    try:
+        limit = int(request.args.get('limit', SUGGEST_LIMIT))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    if not 1 <= limit <= MAX_SUGGEST_LIMIT:
+        return jsonify({"error": f"Limit must be between 1 and {MAX_SUGGEST_LIMIT}"}), 400
+    try:
+        schema = requested_schema(user_schema)
+    except FieldsError as err:
+        return jsonify({"error": str(err)}), 400
+
+    version = data_store.get_users_version()
+    return conditional(version, cached('users', version, lambda: json_array_response(
+        data_store.suggest_users(prefix, limit), schema)))
 
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Get a single user by ID"""
+    try:
+        schema = requested_schema(user_schema)
+    except FieldsError as err:
+        return jsonify({"error": str(err)}), 400
     user = data_store.get_user(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
-    return jsonify(user_schema.dump(user))
+    return conditional(user.version, lambda: json_response(user, schema))
 
 
 @users_bp.route('/', methods=['POST'])
@@ -32,7 +105,7 @@ def create_user():
 
     try:
         # Validate the incoming data using UserSchema
-        validated_data = user_schema.load(data)
+        validated_data = load(user_schema, data)
     except ValidationError as err:
         # Check if it's a duplicate email error
         if 'email' in err.messages and 'Email address already exists' in str(err.messages['email']):
@@ -41,7 +114,43 @@ def create_user():
 
     new_user = data_store.create_user(
         validated_data["name"], validated_data["email"])
-    return jsonify(user_schema.dump(new_user)), 201
+    if not new_user:
+        return jsonify({"error": "Email already exists"}), 409
+    return with_etag(json_response(new_user, user_schema, 201), new_user.version)
+
+
+@users_bp.route('/batch', methods=['POST'])
+def create_users():
+    """Create many users at once; either all are created or none"""
+    data = request.get_json()
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Expected a non-empty JSON array"}), 400
+    max_items = current_app.config['BATCH_MAX_ITEMS']
+    if len(data) > max_items:
+        return jsonify({"error": f"Batches are limited to {max_items} items"}), 413
+
+    validated, errors = load_many(user_batch_schema, data, BATCH_CONTEXT)
+    if errors:
+        return jsonify({"error": "Validation failed", "details": errors}), 400
+
+    try:
+        new_users = data_store.create_users(
+            [(item["name"], item["email"]) for item in validated])
+    except BatchRejected as err:
+        details = {index: {"email": ["Email address already exists."]} for index in err.indexes}
+        return jsonify({"error": "Email already exists", "details": details}), 409
+    return json_array_response(new_users, user_schema, 201)
+
+
+@users_bp.route('/import', methods=['POST'])
+def import_users():
+    """Import users from an NDJSON body, one user per line, in chunks"""
+    report = import_ndjson(
+        request.stream, user_batch_schema, BATCH_CONTEXT,
+        lambda users: data_store.create_users([(user["name"], user["email"]) for user in users]),
+        {"email": ["Email address already exists."]},
+        current_app.config['IMPORT_CHUNK_SIZE'])
+    return jsonify(report)
 
 
 @users_bp.route('/<int:user_id>', methods=['PUT'])
@@ -57,25 +166,37 @@ def update_user(user_id):
 
     try:
         # Validate the incoming data using UserUpdateSchema with context
-        user_update_schema.context = {'current_user_id': user_id}
-        validated_data = user_update_schema.load(data)
+        validated_data = load(user_update_schema, data, {'current_user_id': user_id})
     except ValidationError as err:
         # Check if it's a duplicate email error
         if 'email' in err.messages and 'Email address already exists' in str(err.messages['email']):
             return jsonify({"error": "Email already exists"}), 409
         return jsonify({"error": "Validation failed", "details": err.messages}), 400
 
-    updated_user = data_store.update_user(
-        user_id,
-        name=validated_data.get('name'),
-        email=validated_data.get('email')
-    )
-    return jsonify(user_schema.dump(updated_user))
+    try:
+        updated_user = data_store.update_user(
+            user_id,
+            name=validated_data.get('name'),
+            email=validated_data.get('email'),
+            expected_version=if_match_version()
+        )
+    except VersionConflict:
+        return jsonify({"error": "Precondition failed"}), 412
+    if not updated_user:
+        # The user was deleted, or the email taken, after validation
+        if not data_store.user_exists(user_id):
+            return jsonify({"error": "User not found"}), 404
+        return jsonify({"error": "Email already exists"}), 409
+    return with_etag(json_response(updated_user, user_schema), updated_user.version)
 
 
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     """Delete a user"""
-    if not data_store.delete_user(user_id):
+    try:
+        deleted = data_store.delete_user(user_id, expected_version=if_match_version())
+    except VersionConflict:
+        return jsonify({"error": "Precondition failed"}), 412
+    if not deleted:
         return jsonify({"error": "User not found"}), 404
     return '', 204
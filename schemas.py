@@ -27,6 +27,10 @@ class UserSchema(Schema):
     @validates('email')
     def validate_email_uniqueness(self, value):
         """Validate that email is unique (excluding current user if updating)."""
+        # Batch creates check every email against the store in one step
+        if self.context and self.context.get('batch'):
+            return
+
         # Get the current user ID from context if available (for updates)
         current_user_id = self.context.get(
             'current_user_id') if self.context else None
@@ -64,6 +68,9 @@ class PostSchema(Schema):
     @validates('user_id')
     def validate_user_id_exists(self, value):
         """Validate that the user_id exists in the database."""
+        # Batch creates check every user_id against the store in one step
+        if self.context and self.context.get('batch'):
+            return
         if not data_store.user_exists(value):
             raise ValidationError(
                 'User with the specified user_id does not exist.')
@@ -132,3 +139,9 @@ user_update_schema = UserUpdateSchema()
 post_schema = PostSchema()
 posts_schema = PostSchema(many=True)
 post_update_schema = PostUpdateSchema()
+
+# Batch creates load items with these, passing BATCH_CONTEXT to skip the
+# per-item store lookups
+BATCH_CONTEXT = {'batch': True}
+user_batch_schema = UserSchema()
+post_batch_schema = PostSchema()
@@ -0,0 +1,218 @@
+"""
+Inverted full-text index over post titles and contents.
+
+`SearchIndex` maps each term to a postings list: the ids of the posts that
+contain it, in id order, with a parallel column of term weights (a title
+occurrence counts `TITLE_WEIGHT` times). Both columns are typed arrays, so an
+entry costs 10 bytes instead of a dict slot. The DataStore updates the index
+in the same step as every post change. It hands over the old post as well, so
+the index can find the entries to remove without keeping a forward index.
+
+A query matches the posts containing every query term. The index intersects
+the postings from the rarest term up and ranks matches by tf-idf:
+`sum(idf(term) * log(1 + weight))`, highest first, ties in id order. The
+intersection and top-k selection run vectorized with NumPy (listed in
+requirements.txt) over zero-copy views of the postings. Without it the index
+falls back to bisect and heapq, which is about 100x slower for terms in
+most posts (benchmarks/bench_search.py reports both).
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+from models.post import Post
+
+try:
+    import numpy
+except ImportError:  # Fall back to bisect and heapq (much slower on common terms)
+    numpy = None
+
+TITLE_WEIGHT = 3
+MAX_WEIGHT = 0xFFFF
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word terms."""
+    return _TOKEN.findall(text.lower())
+
+
+def _term_weights(post: Post) -> Dict[str, int]:
+    """Return the weight of each term of a post."""
+    weights = Counter()
+    for term in tokenize(post.title):
+        weights[term] += TITLE_WEIGHT
+    weights.update(tokenize(post.content))
+    return {term: min(weight, MAX_WEIGHT) for term, weight in weights.items()}
+
+
+class _Postings:
+    """Sorted post ids containing a term, with the term's weight in each."""
+
+    __slots__ = ('ids', 'weights')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.weights = array('H')
+
+    def set(self, post_id: int, weight: int):
+        """Add or reweight a post (ids normally arrive in order)"""
+        ids = self.ids
+        if not ids or ids[-1] < post_id:
+            ids.append(post_id)
+            self.weights.append(weight)
+            return
+        row = bisect_left(ids, post_id)
+        if ids[row] == post_id:
+            self.weights[row] = weight
+        else:
+            ids.insert(row, post_id)
+            self.weights.insert(row, weight)
+
+    def remove(self, post_id: int):
+        """Remove a post"""
+        row = bisect_left(self.ids, post_id)
+        del self.ids[row]
+        del self.weights[row]
+
+    def remove_many(self, post_ids: Set[int]):
+        """Remove several posts"""
+        if len(post_ids) <= 64:
+            for post_id in post_ids:
+                self.remove(post_id)
+            return
+        kept = [row for row, post_id in enumerate(self.ids) if post_id not in post_ids]
+        self.ids = array('q', [self.ids[row] for row in kept])
+        self.weights = array('H', [self.weights[row] for row in kept])
+
+
+class SearchIndex:
+    """Term -> postings index with ranked, AND-semantics queries."""
+
+    def __init__(self):
+        self._postings: Dict[str, _Postings] = {}
+        self._documents = 0
+
+    def __len__(self) -> int:
+        return self._documents
+
+    def clear(self):
+        """Remove every post"""
+        self._postings.clear()
+        self._documents = 0
+
+    def add(self, post: Post):
+        """Index a new post"""
+        for term, weight in _term_weights(post).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+            postings.set(post.id, weight)
+        self._documents += 1
+
+    def remove(self, post: Post):
+        """Unindex a post, given its indexed text"""
+        for term in _term_weights(post):
+            postings = self._postings[term]
+            postings.remove(post.id)
+            if not postings.ids:
+                del self._postings[term]
+        self._documents -= 1
+
+    def remove_many(self, posts: Iterable[Post]):
+        """Unindex several posts, rewriting each affected postings list once"""
+        by_term: Dict[str, Set[int]] = {}
+        for post in posts:
+            for term in _term_weights(post):
+                by_term.setdefault(term, set()).add(post.id)
+            self._documents -= 1
+        for term, post_ids in by_term.items():
+            postings = self._postings[term]
+            postings.remove_many(post_ids)
+            if not postings.ids:
+                del self._postings[term]
+
+    def update(self, old: Post, new: Post):
+        """Reindex a changed post, touching only the terms whose weight changed"""
+        if old.title == new.title and old.content == new.content:
+            return
+        old_weights = _term_weights(old)
+        new_weights = _term_weights(new)
+        for term in old_weights.keys() - new_weights.keys():
+            postings = self._postings[term]
+            postings.remove(old.id)
+            if not postings.ids:
+                del self._postings[term]
+        for term, weight in new_weights.items():
+            if old_weights.get(term) != weight:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _Postings()
+                postings.set(new.id, weight)
+
+    def search(self, query: str, offset: int = 0, limit: int = 100) -> Tuple[List[int], int]:
+        """
+        Return the ids of one page of matches, best first, and the total
+        number of matches.
+        """
+        terms = set(tokenize(query))
+        postings = [self._postings.get(term) for term in terms]
+        if not terms or None in postings:
+            return [], 0
+        postings.sort(key=lambda entry: len(entry.ids))
+        idfs = [math.log(1 + self._documents / len(entry.ids)) for entry in postings]
+        if numpy is not None:
+            return self._search_vectorized(postings, idfs, offset, limit)
+        return self._search_scalar(postings, idfs, offset, limit)
+
+    @staticmethod
+    def _search_vectorized(postings: List[_Postings], idfs: List[float],
+                           offset: int, limit: int) -> Tuple[List[int], int]:
+        """Intersect and rank with NumPy"""
+        first = postings[0]
+        ids = numpy.frombuffer(first.ids, dtype=numpy.int64)
+        scores = idfs[0] * numpy.log1p(numpy.frombuffer(first.weights, dtype=numpy.uint16))
+        for entry, idf in zip(postings[1:], idfs[1:]):
+            other_ids = numpy.frombuffer(entry.ids, dtype=numpy.int64)
+            rows = numpy.minimum(numpy.searchsorted(other_ids, ids), len(other_ids) - 1)
+            found = other_ids[rows] == ids
+            ids, rows = ids[found], rows[found]
+            weights = numpy.frombuffer(entry.weights, dtype=numpy.uint16)[rows]
+            scores = scores[found] + idf * numpy.log1p(weights)
+
+        total = len(ids)
+        wanted = min(offset + limit, total)
+        if wanted <= 0:
+            return [], total
+        if wanted < total:
+            # Keep every row scoring at least the wanted-th best, so ties at
+            # the cut-off are still broken by id
+            cutoff = numpy.partition(scores, total - wanted)[total - wanted]
+            keep = scores >= cutoff
+            ids, scores = ids[keep], scores[keep]
+        order = numpy.lexsort((ids, -scores))
+        return ids[order][offset:offset + limit].tolist(), total
+
+    @staticmethod
+    def _search_scalar(postings: List[_Postings], idfs: List[float],
+                       offset: int, limit: int) -> Tuple[List[int], int]:
+        """Intersect with bisect and rank with a heap"""
+        first = postings[0]
+        matches = []
+        for row, post_id in enumerate(first.ids):
+            score = idfs[0] * math.log1p(first.weights[row])
+            for entry, idf in zip(postings[1:], idfs[1:]):
+                other_row = bisect_left(entry.ids, post_id)
+                if other_row == len(entry.ids) or entry.ids[other_row] != post_id:
+                    break
+                score += idf * math.log1p(entry.weights[other_row])
+            else:
+                matches.append((-score, post_id))
+        best = heapq.nsmallest(offset + limit, matches)
+        return [post_id for _, post_id in best[offset:]], len(matches)
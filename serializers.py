@@ -0,0 +1,152 @@
+"""
+Response serialization helpers.
+
+Collections are encoded as a JSON array of per-record fragments. With
+`ENTITY_JSON_CACHE` enabled the fragments come straight from the models'
+cached bytes, so unchanged records are never dumped or encoded twice.
+
+Records that do need dumping go through a dumper compiled from the schema's
+fields, which produces the same output as `Schema.dump` without marshmallow's
+per-field dispatch.
+
+Read endpoints accept a `fields` parameter naming the fields to return.
+`requested_schema` turns it into a projection of the endpoint's schema
+(`Schema(only=...)`), built once per set of fields, whose compiled dumper
+never reads the omitted attributes. With the entity cache on, models also
+keep the encoding of each projection they have been served in, next to the
+full one, so repeated sparse reads skip dumping too.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from flask import Response, current_app, request
+from marshmallow import Schema, fields, missing
+from marshmallow.utils import ensure_text_type
+
+_encode = json.JSONEncoder(separators=(',', ':'), sort_keys=True).encode
+
+# Field classes the dumper compiler knows how to inline
+_COMPILED_FIELDS = {
+    fields.Integer: '{value} if {value} is None else int({value})',
+    fields.String: '{value} if {value} is None or type({value}) is str else _text({value})',
+    fields.Email: '{value} if {value} is None or type({value}) is str else _text({value})',
+}
+
+
+def _can_compile(schema: Schema) -> bool:
+    """Check whether every dump field and hook of `schema` can be inlined."""
+    dump_hooks = [hooks for key, hooks in schema._hooks.items()
+                  if isinstance(key, tuple) and key[0] in ('pre_dump', 'post_dump')]
+    if schema.many or any(dump_hooks):
+        return False
+    for attr_name, field_obj in schema.dump_fields.items():
+        if type(field_obj) not in _COMPILED_FIELDS:
+            return False
+        if getattr(field_obj, 'as_string', False) or field_obj.dump_default is not missing:
+            return False
+        attribute = field_obj.attribute or attr_name
+        if '.' in attribute or not attribute.isidentifier():
+            return False
+    return True
+
+
+def compile_dumper(schema: Schema) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Generate a function equivalent to `schema.dump` for a single object.
+
+    Objects supporting item access (e.g. dicts) and schemas using fields or
+    hooks the compiler does not understand fall back to `schema.dump`.
+    """
+    if not _can_compile(schema):
+        return schema.dump
+
+    lines = [
+        'def dump(obj):',
+        '    if hasattr(obj, "__getitem__"):',
+        '        return _fallback(obj)',
+        '    out = {}',
+    ]
+    for index, (attr_name, field_obj) in enumerate(schema.dump_fields.items()):
+        value = f'v{index}'
+        attribute = field_obj.attribute or attr_name
+        key = field_obj.data_key if field_obj.data_key is not None else attr_name
+        lines.append(f'    {value} = getattr(obj, {attribute!r}, _missing)')
+        lines.append(f'    if {value} is not _missing:')
+        lines.append(f'        out[{key!r}] = ' +
+                     _COMPILED_FIELDS[type(field_obj)].format(value=value))
+    lines.append('    return out')
+
+    namespace = {'_fallback': schema.dump, '_missing': missing, '_text': ensure_text_type}
+    exec('\n'.join(lines), namespace)
+    return namespace['dump']
+
+
+@lru_cache(maxsize=None)
+def get_dumper(schema: Schema) -> Callable[[Any], Dict[str, Any]]:
+    """Return the compiled dumper for a schema instance, compiling it once."""
+    return compile_dumper(schema)
+
+
+class FieldsError(ValueError):
+    """Raised when a `fields` query parameter is empty or names unknown fields."""
+
+
+@lru_cache(maxsize=None)
+def project(schema: Schema, names: Tuple[str, ...]) -> Schema:
+    """Return a copy of `schema` dumping only `names`, built once per projection."""
+    return type(schema)(only=names, many=schema.many)
+
+
+def requested_schema(schema: Schema) -> Schema:
+    """
+    Return `schema` projected onto the current request's `fields` parameter.
+
+    Field names may be repeated or comma separated. Without the parameter, or
+    when it names every field, `schema` itself is returned.
+    """
+    if 'fields' not in request.args:
+        return schema
+    names = {name.strip() for arg in request.args.getlist('fields')
+             for name in arg.split(',') if name.strip()}
+    if not names:
+        raise FieldsError("'fields' must name at least one field")
+    unknown = names.difference(schema.dump_fields)
+    if unknown:
+        raise FieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if len(names) == len(schema.dump_fields):
+        return schema
+    # Only validated names reach the cache, so it holds at most one
+    # projection per subset of each schema's fields
+    return project(schema, tuple(sorted(names)))
+
+
+def dump_many(schema: Schema, records: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Dump a collection of records with the compiled dumper."""
+    dump = get_dumper(schema)
+    return [dump(record) for record in records]
+
+
+def record_encoder(schema: Schema) -> Callable[[Any], bytes]:
+    """Return a callable encoding a single record to compact JSON bytes."""
+    if current_app.config['ENTITY_JSON_CACHE']:
+        if schema.only is None:
+            return lambda record: record.to_json()
+        names = tuple(schema.only)
+        return lambda record: record.to_json_fields(names)
+    dump = get_dumper(schema)
+    return lambda record: _encode(dump(record)).encode()
+
+
+def json_response(record: Any, schema: Schema, status: int = 200) -> Response:
+    """Build a JSON response for a single record."""
+    body = record_encoder(schema)(record) + b'\n'
+    return Response(body, status=status, mimetype='application/json')
+
+
+def json_array_response(records: Iterable[Any], schema: Schema, status: int = 200) -> Response:
+    """Build a JSON array response by joining per-record fragments."""
+    encode = record_encoder(schema)
+    body = b'[' + b','.join(encode(record) for record in records) + b']\n'
+    return Response(body, status=status, mimetype='application/json')
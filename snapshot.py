@@ -0,0 +1,215 @@
+"""
+Compact binary snapshots of the DataStore.
+
+A snapshot stores each table column by column so it can be restored by
+memory-mapping the file instead of parsing it:
+
+    header   magic, clock, users_version, posts_version, next_user_id,
+             next_post_id, user_count, post_count
+    users    id int64[n], version int64[n], name offsets uint64[n+1],
+             email offsets uint64[n+1], name blob, email blob
+    posts    id int64[n], user_id int64[n], version int64[n],
+             title offsets uint64[n+1], content offsets uint64[n+1],
+             title blob, content blob
+
+Integer columns are copied out of the mapping in one step; string columns
+stay in the mapping as `MappedStrings` and each value is only decoded when it
+is first read. Every section is padded to 8 bytes.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableSequence
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+from models.post import Post
+from models.user import User
+
+MAGIC = b'RESTSNP2'
+_HEADER = struct.Struct('<8sQQQQQQQ')
+
+
+class MappedStrings(MutableSequence):
+    """
+    Sequence of strings decoded lazily from a UTF-8 blob and an offsets column.
+
+    Writes go to an overlay; inserting or deleting in the middle falls back to
+    a fully decoded list.
+    """
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+        self._base = len(offsets) - 1
+        self._overrides = {}
+        self._tail: List[Optional[str]] = []
+        self._items: Optional[List[Optional[str]]] = None
+
+    def __len__(self) -> int:
+        if self._items is not None:
+            return len(self._items)
+        return self._base + len(self._tail)
+
+    def __getitem__(self, index):
+        if self._items is not None:
+            return self._items[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index >= self._base:
+            return self._tail[index - self._base]
+        if index in self._overrides:
+            return self._overrides[index]
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def __setitem__(self, index, value):
+        if self._items is not None:
+            self._items[index] = value
+        elif index >= self._base:
+            self._tail[index - self._base] = value
+        else:
+            self._overrides[index] = value
+
+    def __delitem__(self, index):
+        self._materialize()
+        del self._items[index]
+
+    def insert(self, index, value):
+        if self._items is None and index >= len(self):
+            self._tail.append(value)
+            return
+        self._materialize()
+        self._items.insert(index, value)
+
+    def copy(self) -> 'MappedStrings':
+        """Return an independent copy sharing the read-only blob."""
+        clone = MappedStrings(self._blob, self._offsets)
+        clone._overrides = dict(self._overrides)
+        clone._tail = list(self._tail)
+        clone._items = None if self._items is None else list(self._items)
+        return clone
+
+    def _materialize(self):
+        """Decode every value into a plain list."""
+        if self._items is None:
+            self._items = [self[i] for i in range(len(self))]
+
+
+class Snapshot(NamedTuple):
+    """Decoded snapshot header and columns."""
+
+    clock: int
+    users_version: int
+    posts_version: int
+    next_user_id: int
+    next_post_id: int
+    users: List[User]
+    post_ids: array
+    post_user_ids: array
+    post_versions: array
+    post_titles: MappedStrings
+    post_contents: MappedStrings
+
+    def iter_posts(self) -> Iterable[Post]:
+        """Build a Post for every row (decodes all strings)."""
+        for row, post_id in enumerate(self.post_ids):
+            yield Post(id=post_id, title=self.post_titles[row],
+                       content=self.post_contents[row], user_id=self.post_user_ids[row],
+                       version=self.post_versions[row])
+
+
+def _pad(length: int) -> bytes:
+    return b'\0' * (-length % 8)
+
+
+def _encode_strings(values: Iterable[str]):
+    """Return the offsets column and UTF-8 blob for a string column."""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = array('Q', [0])
+    total = 0
+    for item in encoded:
+        total += len(item)
+        offsets.append(total)
+    return offsets, b''.join(encoded)
+
+
+def _write_table(out, id_columns: Sequence[Iterable[int]], string_columns: Sequence[Iterable[str]]):
+    """Write a table's integer columns, then its offsets columns, then its blobs."""
+    for column in id_columns:
+        out.write(array('q', column).tobytes())
+    encoded = [_encode_strings(column) for column in string_columns]
+    for offsets, _ in encoded:
+        out.write(offsets.tobytes())
+    for _, blob in encoded:
+        out.write(blob)
+        out.write(_pad(len(blob)))
+
+
+def write_snapshot(path: str, versions: Sequence[int], next_user_id: int, next_post_id: int,
+                   users: Sequence[User], posts: Sequence[Post]):
+    """
+    Atomically write a snapshot of `users` and `posts` to `path`.
+
+    `versions` is the store's (clock, users_version, posts_version).
+    """
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, *versions, next_user_id, next_post_id,
+                               len(users), len(posts)))
+        _write_table(out, [[user.id for user in users], [user.version for user in users]],
+                     [[user.name for user in users], [user.email for user in users]])
+        _write_table(out, [[post.id for post in posts], [post.user_id for post in posts],
+                           [post.version for post in posts]],
+                     [[post.title for post in posts], [post.content for post in posts]])
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temp_path, path)
+
+
+def read_snapshot(path: str) -> Snapshot:
+    """Memory-map a snapshot; users are decoded eagerly, post strings lazily."""
+    with open(path, 'rb') as snapshot_file:
+        mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    (magic, clock, users_version, posts_version,
+     next_user_id, next_post_id, user_count, post_count) = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a data store snapshot')
+    position = _HEADER.size
+
+    def take_ints(typecode: str, count: int) -> memoryview:
+        nonlocal position
+        column = view[position:position + 8 * count].cast(typecode)
+        position += 8 * count
+        return column
+
+    def take_strings(count: int) -> List[MappedStrings]:
+        nonlocal position
+        offsets = [take_ints('Q', count + 1) for _ in range(2)]
+        columns = []
+        for column_offsets in offsets:
+            size = column_offsets[-1] if count else 0
+            columns.append(MappedStrings(view[position:position + size], column_offsets))
+            position += size + (-size % 8)
+        return columns
+
+    def take_array(count: int) -> array:
+        column = array('q')
+        column.frombytes(take_ints('q', count).cast('B'))
+        return column
+
+    user_ids = take_ints('q', user_count)
+    user_versions = take_ints('q', user_count)
+    names, emails = take_strings(user_count)
+    users = [User(id=user_id, name=names[row], email=emails[row], version=user_versions[row])
+             for row, user_id in enumerate(user_ids)]
+
+    post_ids = take_array(post_count)
+    post_user_ids = take_array(post_count)
+    post_versions = take_array(post_count)
+    titles, contents = take_strings(post_count)
+    return Snapshot(clock, users_version, posts_version, next_user_id, next_post_id, users,
+                    post_ids, post_user_ids, post_versions, titles, contents)
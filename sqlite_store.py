@@ -0,0 +1,707 @@
+"""
+SQLite-backed data store shared by every process that opens the same file.
+
+`SQLiteDataStore` implements the `Storage` interface, so routes and schemas
+work unchanged. Because the dataset lives in one database file, several
+gunicorn worker processes see the same users and posts.
+
+The database runs in WAL journal mode, so readers never block the writer and
+concurrent writers queue on SQLite's file lock (up to `BUSY_TIMEOUT` seconds).
+`ConnectionPool` gives each thread of each process its own connection; a
+connection inherited across `fork()` is never reused. Every statement is a
+module-level constant, so each connection prepares it once and then reuses it
+from its statement cache.
+
+The version clock and the collection versions live in the `versions` table and
+are advanced inside each write transaction.
+
+Full-text search uses an FTS5 index over post titles and contents
+(`posts_fts`), kept in step with `posts` by triggers and ranked by BM25 with
+titles weighted `TITLE_WEIGHT` times.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from models.post import Post
+from models.user import User
+from search import TITLE_WEIGHT, tokenize
+from storage import BatchRejected, Storage, VersionConflict
+
+BUSY_TIMEOUT = 30.0
+STATEMENT_CACHE_SIZE = 64
+# Rows fetched at a time by exports
+EXPORT_BATCH_SIZE = 1000
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        email_key TEXT NOT NULL UNIQUE,
+        version INTEGER NOT NULL DEFAULT 0,
+        name_key TEXT NOT NULL DEFAULT ''
+    )""",
+    """CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        version INTEGER NOT NULL DEFAULT 0,
+        title_key TEXT NOT NULL DEFAULT ''
+    )""",
+    "CREATE INDEX IF NOT EXISTS posts_user_id ON posts (user_id, id)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO versions VALUES ('clock', 0), ('users', 0), ('posts', 0)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content, content='posts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 0'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+)
+# Columns added after the first release of the schema
+_MIGRATIONS = (
+    ("users", "version", "ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+    ("posts", "version", "ALTER TABLE posts ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+    ("users", "name_key", "ALTER TABLE users ADD COLUMN name_key TEXT NOT NULL DEFAULT ''"),
+    ("posts", "title_key", "ALTER TABLE posts ADD COLUMN title_key TEXT NOT NULL DEFAULT ''"),
+)
+# Indexes on migrated columns, created once the migrations have run
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS users_name_key ON users (name_key, id)",
+    "CREATE INDEX IF NOT EXISTS posts_title_key ON posts (title_key, id)",
+)
+
+_SELECT_USERS = "SELECT id, name, email, version FROM users"
+_SELECT_POSTS = "SELECT id, title, content, user_id, version FROM posts"
+
+_ALL_USERS = _SELECT_USERS + " ORDER BY id"
+_USERS_AFTER = _SELECT_USERS + " WHERE id > ? ORDER BY id LIMIT ?"
+_USER_BY_ID = _SELECT_USERS + " WHERE id = ?"
+_USER_BY_EMAIL = _SELECT_USERS + " WHERE email_key = ?"
+_USER_EXISTS = "SELECT 1 FROM users WHERE id = ?"
+_USER_VERSION = "SELECT version FROM users WHERE id = ?"
+_INSERT_USER = ("INSERT INTO users (name, email, email_key, version, name_key)"
+                " VALUES (?, ?, ?, ?, ?)")
+_TAKEN_EMAIL_KEYS = "SELECT email_key FROM users WHERE email_key IN ({})"
+_UPDATE_USER = ("UPDATE users SET name = coalesce(?, name), email = coalesce(?, email),"
+                " email_key = coalesce(?, email_key), name_key = coalesce(?, name_key), version = ?"
+                " WHERE id = ?"
+                " RETURNING id, name, email, version")
+_DELETE_USER = "DELETE FROM users WHERE id = ?"
+# Keys starting with a prefix sort between the prefix and the prefix followed
+# by the highest code point
+_USERS_BY_NAME_PREFIX = ("SELECT name_key, id, name, email, version FROM users"
+                         " WHERE name_key >= ? AND name_key < ? ORDER BY name_key, id LIMIT ?")
+_USERS_BY_EMAIL_PREFIX = ("SELECT email_key, id, name, email, version FROM users"
+                          " WHERE email_key >= ? AND email_key < ? ORDER BY email_key LIMIT ?")
+# Key columns filled in for the rows of a file created before they existed:
+# column -> (select id and source value, set the key)
+_BACKFILLS = {
+    "name_key": ("SELECT id, name FROM users", "UPDATE users SET name_key = ? WHERE id = ?"),
+    "title_key": ("SELECT id, title FROM posts", "UPDATE posts SET title_key = ? WHERE id = ?"),
+}
+
+_ALL_POSTS = _SELECT_POSTS + " ORDER BY id"
+_POSTS_AFTER = _SELECT_POSTS + " WHERE id > ? ORDER BY id LIMIT ?"
+_POST_BY_ID = _SELECT_POSTS + " WHERE id = ?"
+_POST_VERSION = "SELECT version FROM posts WHERE id = ?"
+_POSTS_BY_USER = _SELECT_POSTS + " WHERE user_id = ? ORDER BY id"
+_POSTS_BY_USER_AFTER = _SELECT_POSTS + " WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?"
+_COUNT_POSTS_BY_USER = "SELECT count(*) FROM posts WHERE user_id = ?"
+_INSERT_POST = ("INSERT INTO posts (title, content, user_id, version, title_key)"
+                " VALUES (?, ?, ?, ?, ?)")
+_EXISTING_USER_IDS = "SELECT id FROM users WHERE id IN ({})"
+_UPDATE_POST = ("UPDATE posts SET title = coalesce(?, title), content = coalesce(?, content),"
+                " user_id = coalesce(?, user_id), title_key = coalesce(?, title_key), version = ?"
+                " WHERE id = ?"
+                " RETURNING id, title, content, user_id, version")
+_DELETE_POST = "DELETE FROM posts WHERE id = ?"
+_EXISTING_POST_IDS = "SELECT id FROM posts WHERE id IN ({})"
+_POST_IDS_BY_USER = "SELECT id FROM posts WHERE user_id = ?"
+_UPDATE_POSTS = ("UPDATE posts SET title = coalesce(?, title), content = coalesce(?, content),"
+                 " user_id = coalesce(?, user_id), title_key = coalesce(?, title_key), version = ?"
+                 " WHERE id IN ({})")
+_DELETE_POSTS = "DELETE FROM posts WHERE id IN ({})"
+_DELETE_POSTS_BY_USER = "DELETE FROM posts WHERE user_id = ?"
+# ORDER BY clause for each of POST_SORTS
+_POST_ORDERS = {
+    'id': "id",
+    '-id': "id DESC",
+    'title': "title_key, id",
+    '-title': "title_key DESC, id DESC",
+}
+_SEARCH_POSTS = ("SELECT p.id, p.title, p.content, p.user_id, p.version"
+                 " FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid WHERE posts_fts MATCH ?"
+                 f" ORDER BY bm25(posts_fts, {TITLE_WEIGHT}.0, 1.0), p.id LIMIT ? OFFSET ?")
+_COUNT_SEARCH = "SELECT count(*) FROM posts_fts WHERE posts_fts MATCH ?"
+_HAS_FTS = "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+_REBUILD_FTS = "INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')"
+
+# Values bound per IN (...) query, below SQLite's historic 999 variable limit
+_IN_CHUNK = 500
+
+_NEXT_VERSION = "SELECT version + 1 FROM versions WHERE name = 'clock'"
+_COLLECTION_VERSION = "SELECT version FROM versions WHERE name = ?"
+_SET_USERS_VERSION = "UPDATE versions SET version = ? WHERE name IN ('clock', 'users')"
+_SET_POSTS_VERSION = "UPDATE versions SET version = ? WHERE name IN ('clock', 'posts')"
+_SET_ALL_VERSIONS = "UPDATE versions SET version = ?"
+
+
+def _user(row) -> User:
+    return User(id=row[0], name=row[1], email=row[2], version=row[3])
+
+
+def _post(row) -> Post:
+    return Post(id=row[0], title=row[1], content=row[2], user_id=row[3], version=row[4])
+
+
+class ConnectionPool:
+    """
+    One connection per thread, opened on first use and closed together.
+
+    A forked child starts with an empty pool: the parent's connections are
+    dropped without being closed, since closing them would disturb the parent.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def open(self) -> sqlite3.Connection:
+        """Open a connection configured like the pooled ones, owned by the caller"""
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and register a connection configured for shared use"""
+        conn = self.open()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._connections = []
+                self._local = threading.local()
+            self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every connection opened by this process"""
+        with self._lock:
+            connections = self._connections if self._pid == os.getpid() else []
+            self._connections = []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+
+class SQLiteDataStore(Storage):
+    """
+    Data store persisted in a SQLite database file.
+
+    The schema is created, and sample data loaded, by whichever process opens
+    a new database file first.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pool = ConnectionPool(path)
+        with self._transaction() as conn:
+            has_fts = conn.execute(_HAS_FTS).fetchone() is not None
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            added = set()
+            for table, column, statement in _MIGRATIONS:
+                if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(statement)
+                    added.add(column)
+            normalizers = {"name_key": self._normalize_name, "title_key": self._normalize_title}
+            for column in added & _BACKFILLS.keys():
+                select, update = _BACKFILLS[column]
+                conn.executemany(update, [(normalizers[column](value), row_id)
+                                          for row_id, value in conn.execute(select).fetchall()])
+            for statement in _INDEXES:
+                conn.execute(statement)
+            if not has_fts:
+                # Index the posts of a file created before full-text search
+                conn.execute(_REBUILD_FTS)
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone() is None:
+                conn.execute("INSERT INTO meta VALUES ('initialized', '1')")
+                seed = True
+            else:
+                seed = False
+        if seed:
+            self._initialize_sample_data()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a write transaction, taking the write lock up front"""
+        conn = self._pool.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _next_version(conn: sqlite3.Connection) -> int:
+        """Read the version the current write transaction will commit"""
+        return conn.execute(_NEXT_VERSION).fetchone()[0]
+
+    @staticmethod
+    def _check_version(conn: sqlite3.Connection, sql: str, record_id: int,
+                       expected_version: Optional[int]) -> bool:
+        """
+        Return whether a record exists, raising VersionConflict if it does
+        but no longer has the expected version.
+
+        Runs inside the write transaction, so nothing can change the record
+        between the check and the write.
+        """
+        row = conn.execute(sql, (record_id,)).fetchone()
+        if row is None:
+            return False
+        if expected_version is not None and row[0] != expected_version:
+            raise VersionConflict(f"Expected version {expected_version}, found {row[0]}")
+        return True
+
+    @staticmethod
+    def _select_in(conn: sqlite3.Connection, sql: str, values: list) -> set:
+        """Return the first column of `sql` run over `values` in IN (...) chunks"""
+        found = set()
+        for start in range(0, len(values), _IN_CHUNK):
+            chunk = values[start:start + _IN_CHUNK]
+            query = sql.format(', '.join('?' * len(chunk)))
+            found.update(row[0] for row in conn.execute(query, chunk))
+        return found
+
+    def _select_posts(self, conn: sqlite3.Connection, post_ids: Optional[Sequence[int]],
+                      by_user: Optional[int]) -> List[int]:
+        """Resolve a bulk selection to the sorted ids of existing posts"""
+        if post_ids is None:
+            if by_user is None:
+                raise ValueError("Select posts by id, by user or both")
+            return sorted(row[0] for row in conn.execute(_POST_IDS_BY_USER, (by_user,)))
+        selected = self._select_in(conn, _EXISTING_POST_IDS, list(set(post_ids)))
+        if by_user is not None:
+            selected &= {row[0] for row in conn.execute(_POST_IDS_BY_USER, (by_user,))}
+        return sorted(selected)
+
+    @staticmethod
+    def _execute_in(conn: sqlite3.Connection, sql: str, params: tuple, values: list):
+        """Run `sql` with `params` followed by each IN (...) chunk of `values`"""
+        for start in range(0, len(values), _IN_CHUNK):
+            chunk = values[start:start + _IN_CHUNK]
+            conn.execute(sql.format(', '.join('?' * len(chunk))), params + tuple(chunk))
+
+    def _export(self, sql: str) -> Iterator[tuple]:
+        """
+        Stream the rows of `sql` from a read transaction on a connection of
+        its own.
+
+        The query starts before this returns, which fixes the transaction's
+        snapshot; in WAL mode writers carry on while the rows are read. The
+        connection is closed when the rows run out or the iterator is closed.
+        """
+        conn = self._pool.open()
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.execute(sql)
+        except BaseException:
+            conn.close()
+            raise
+        return self._drain(conn, cursor)
+
+    @staticmethod
+    def _drain(conn: sqlite3.Connection, cursor: sqlite3.Cursor) -> Iterator[tuple]:
+        """Yield a cursor's rows in batches, then close its connection"""
+        try:
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Run several reads in one read transaction, so they see the same data"""
+        conn = self._pool.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        return self._pool.connection().execute(sql, params).fetchall()
+
+    def close(self):
+        """Close every pooled connection"""
+        self._pool.close()
+
+    def clear(self):
+        """Remove all users and posts and reset the id counters"""
+        with self._transaction() as conn:
+            version = self._next_version(conn)
+            conn.execute("DELETE FROM posts")
+            conn.execute("DELETE FROM users")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('users', 'posts')")
+            conn.execute(_SET_ALL_VERSIONS, (version,))
+
+    def _iter_rows(self, sql: str, params: tuple, batch_size: int) -> Iterator[tuple]:
+        """
+        Walk a query in keyset batches of ids.
+
+        `sql` must select rows with `id > ?` ordered by id and end with
+        `LIMIT ?`; the last id of each batch is the next batch's cursor.
+        """
+        after = 0
+        while True:
+            rows = self._query(sql, params + (after, batch_size))
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1][0]
+
+    # User methods
+    def get_all_users(self) -> List[User]:
+        """Get all users"""
+        return [_user(row) for row in self._query(_ALL_USERS)]
+
+    def get_users_page(self, after: Optional[int] = None, limit: int = 100) -> List[User]:
+        """Get up to `limit` users with an id greater than `after`, in id order"""
+        return [_user(row) for row in self._query(
+            _USERS_AFTER, (after or 0, limit))]
+
+    def iter_users(self, batch_size: int = 500) -> Iterator[User]:
+        """Iterate over all users in id order without copying the collection"""
+        rows = self._iter_rows(_USERS_AFTER, (), batch_size)
+        return (_user(row) for row in rows)
+
+    def export_users(self) -> Iterator[User]:
+        """Iterate over all users in id order as of the call, unaffected by later writes"""
+        return (_user(row) for row in self._export(_ALL_USERS))
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        """Get a user by ID"""
+        rows = self._query(_USER_BY_ID, (user_id,))
+        return _user(rows[0]) if rows else None
+
+    def create_user(self, name: str, email: str) -> Optional[User]:
+        """Create a new user, or return None if the email is already taken"""
+        try:
+            with self._transaction() as conn:
+                version = self._next_version(conn)
+                cursor = conn.execute(_INSERT_USER, (name, email, self._normalize_email(email),
+                                                     version, self._normalize_name(name)))
+                conn.execute(_SET_USERS_VERSION, (version,))
+        except sqlite3.IntegrityError:
+            return None
+        return User(id=cursor.lastrowid, name=name, email=email, version=version)
+
+    def create_users(self, users: Sequence[Tuple[str, str]]) -> List[User]:
+        """Create users from (name, email) pairs in one transaction, all sharing one version"""
+        email_keys = [self._normalize_email(email) for _, email in users]
+        with self._transaction() as conn:
+            taken = self._select_in(conn, _TAKEN_EMAIL_KEYS, list(set(email_keys)))
+            rejected = []
+            for index, email_key in enumerate(email_keys):
+                if email_key in taken:
+                    rejected.append(index)
+                taken.add(email_key)
+            if rejected:
+                raise BatchRejected(rejected)
+            if not users:
+                return []
+
+            version = self._next_version(conn)
+            created = []
+            for (name, email), email_key in zip(users, email_keys):
+                cursor = conn.execute(_INSERT_USER, (name, email, email_key, version,
+                                                     self._normalize_name(name)))
+                created.append(User(id=cursor.lastrowid, name=name, email=email, version=version))
+            conn.execute(_SET_USERS_VERSION, (version,))
+        return created
+
+    def update_user(self, user_id: int, name: Optional[str] = None, email: Optional[str] = None,
+                    expected_version: Optional[int] = None) -> Optional[User]:
+        """Update an existing user, or return None if it does not exist or the email is taken"""
+        email_key = None if email is None else self._normalize_email(email)
+        name_key = None if name is None else self._normalize_name(name)
+        try:
+            with self._transaction() as conn:
+                if not self._check_version(conn, _USER_VERSION, user_id, expected_version):
+                    return None
+                version = self._next_version(conn)
+                rows = conn.execute(
+                    _UPDATE_USER, (name, email, email_key, name_key, version, user_id)).fetchall()
+                if rows:
+                    conn.execute(_SET_USERS_VERSION, (version,))
+        except sqlite3.IntegrityError:
+            return None
+        return _user(rows[0]) if rows else None
+
+    def delete_user(self, user_id: int, expected_version: Optional[int] = None) -> bool:
+        """Delete a user"""
+        with self._transaction() as conn:
+            if not self._check_version(conn, _USER_VERSION, user_id, expected_version):
+                return False
+            version = self._next_version(conn)
+            # Delete the posts first (rather than through ON DELETE CASCADE)
+            # to learn whether the posts collection changed
+            posts_deleted = conn.execute(_DELETE_POSTS_BY_USER, (user_id,)).rowcount
+            if not conn.execute(_DELETE_USER, (user_id,)).rowcount:
+                return False
+            conn.execute(_SET_ALL_VERSIONS if posts_deleted else _SET_USERS_VERSION, (version,))
+            return True
+
+    def user_exists(self, user_id: int) -> bool:
+        """Check if a user exists"""
+        return bool(self._query(_USER_EXISTS, (user_id,)))
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get a user by email (case-insensitive)"""
+        rows = self._query(_USER_BY_EMAIL, (self._normalize_email(email),))
+        return _user(rows[0]) if rows else None
+
+    def suggest_users(self, prefix: str, limit: int = 10) -> List[User]:
+        """Get up to `limit` users whose name or email starts with `prefix`, in match order"""
+        key = self._normalize_prefix(prefix)
+        params = (key, key + '\U0010ffff', limit)
+        with self._snapshot() as conn:
+            rows = (conn.execute(_USERS_BY_NAME_PREFIX, params).fetchall()
+                    + conn.execute(_USERS_BY_EMAIL_PREFIX, params).fetchall())
+        # Each query returns a user at most once, so `limit` rows from each
+        # cover the first `limit` distinct users of the merged order
+        users: List[User] = []
+        seen = set()
+        for row in sorted(rows, key=lambda row: (row[0], row[1])):
+            if row[1] not in seen and len(users) < limit:
+                seen.add(row[1])
+                users.append(_user(row[1:]))
+        return users
+
+    def get_users_version(self) -> int:
+        """Get the version of the users collection"""
+        return self._query(_COLLECTION_VERSION, ('users',))[0][0]
+
+    # Post methods
+    def get_all_posts(self) -> List[Post]:
+        """Get all posts"""
+        return [_post(row) for row in self._query(_ALL_POSTS)]
+
+    def get_posts_page(self, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts with an id greater than `after`, in id order"""
+        return [_post(row) for row in self._query(
+            _POSTS_AFTER, (after or 0, limit))]
+
+    def iter_posts(self, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over all posts in id order without copying the collection"""
+        rows = self._iter_rows(_POSTS_AFTER, (), batch_size)
+        return (_post(row) for row in rows)
+
+    def export_posts(self) -> Iterator[Post]:
+        """Iterate over all posts in id order as of the call, unaffected by later writes"""
+        return (_post(row) for row in self._export(_ALL_POSTS))
+
+    def get_post(self, post_id: int) -> Optional[Post]:
+        """Get a post by ID"""
+        rows = self._query(_POST_BY_ID, (post_id,))
+        return _post(rows[0]) if rows else None
+
+    def create_post(self, title: str, content: str, user_id: int) -> Optional[Post]:
+        """Create a new post"""
+        try:
+            with self._transaction() as conn:
+                version = self._next_version(conn)
+                cursor = conn.execute(_INSERT_POST, (title, content, user_id, version,
+                                                     self._normalize_title(title)))
+                conn.execute(_SET_POSTS_VERSION, (version,))
+        except sqlite3.IntegrityError:
+            return None
+        return Post(id=cursor.lastrowid, title=title, content=content, user_id=user_id,
+                    version=version)
+
+    def create_posts(self, posts: Sequence[Tuple[str, str, int]]) -> List[Post]:
+        """Create posts from (title, content, user_id) triples in one transaction, all sharing one version"""
+        with self._transaction() as conn:
+            existing = self._select_in(
+                conn, _EXISTING_USER_IDS, list({user_id for _, _, user_id in posts}))
+            rejected = [index for index, (_, _, user_id) in enumerate(posts)
+                        if user_id not in existing]
+            if rejected:
+                raise BatchRejected(rejected)
+            if not posts:
+                return []
+
+            version = self._next_version(conn)
+            created = []
+            for title, content, user_id in posts:
+                cursor = conn.execute(_INSERT_POST, (title, content, user_id, version,
+                                                     self._normalize_title(title)))
+                created.append(Post(id=cursor.lastrowid, title=title, content=content,
+                                    user_id=user_id, version=version))
+            conn.execute(_SET_POSTS_VERSION, (version,))
+        return created
+
+    def update_post(self, post_id: int, title: Optional[str] = None, content: Optional[str] = None,
+                    user_id: Optional[int] = None, expected_version: Optional[int] = None) -> Optional[Post]:
+        """Update an existing post"""
+        title_key = None if title is None else self._normalize_title(title)
+        try:
+            with self._transaction() as conn:
+                if not self._check_version(conn, _POST_VERSION, post_id, expected_version):
+                    return None
+                version = self._next_version(conn)
+                rows = conn.execute(
+                    _UPDATE_POST, (title, content, user_id, title_key, version, post_id)).fetchall()
+                if rows:
+                    conn.execute(_SET_POSTS_VERSION, (version,))
+        except sqlite3.IntegrityError:
+            return None
+        return _post(rows[0]) if rows else None
+
+    def delete_post(self, post_id: int, expected_version: Optional[int] = None) -> bool:
+        """Delete a post"""
+        with self._transaction() as conn:
+            if not self._check_version(conn, _POST_VERSION, post_id, expected_version):
+                return False
+            version = self._next_version(conn)
+            if not conn.execute(_DELETE_POST, (post_id,)).rowcount:
+                return False
+            conn.execute(_SET_POSTS_VERSION, (version,))
+            return True
+
+    def update_posts(self, post_ids: Optional[Sequence[int]] = None, by_user: Optional[int] = None,
+                     title: Optional[str] = None, content: Optional[str] = None,
+                     user_id: Optional[int] = None) -> Optional[List[int]]:
+        """Patch the selected posts in one transaction, all taking one version"""
+        title_key = None if title is None else self._normalize_title(title)
+        with self._transaction() as conn:
+            if user_id is not None and conn.execute(_USER_EXISTS, (user_id,)).fetchone() is None:
+                return None
+            selected = self._select_posts(conn, post_ids, by_user)
+            if selected:
+                version = self._next_version(conn)
+                self._execute_in(conn, _UPDATE_POSTS, (title, content, user_id, title_key, version),
+                                 selected)
+                conn.execute(_SET_POSTS_VERSION, (version,))
+        return selected
+
+    def delete_posts(self, post_ids: Optional[Sequence[int]] = None,
+                     by_user: Optional[int] = None) -> List[int]:
+        """Delete the selected posts in one transaction"""
+        with self._transaction() as conn:
+            selected = self._select_posts(conn, post_ids, by_user)
+            if selected:
+                version = self._next_version(conn)
+                self._execute_in(conn, _DELETE_POSTS, (), selected)
+                conn.execute(_SET_POSTS_VERSION, (version,))
+        return selected
+
+    def get_posts_version(self) -> int:
+        """Get the version of the posts collection"""
+        return self._query(_COLLECTION_VERSION, ('posts',))[0][0]
+
+    def get_posts_by_user(self, user_id: int) -> List[Post]:
+        """Get all posts by a specific user"""
+        return [_post(row) for row in self._query(_POSTS_BY_USER, (user_id,))]
+
+    def count_posts_by_user(self, user_id: int) -> int:
+        """Count the posts by a specific user"""
+        return self._query(_COUNT_POSTS_BY_USER, (user_id,))[0][0]
+
+    def iter_posts_by_user(self, user_id: int, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over a user's posts in id order without copying the list"""
+        rows = self._iter_rows(_POSTS_BY_USER_AFTER, (user_id,), batch_size)
+        return (_post(row) for row in rows)
+
+    def get_posts_by_user_page(self, user_id: int, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts by a user with an id greater than `after`"""
+        return [_post(row) for row in self._query(
+            _POSTS_BY_USER_AFTER, (user_id, after or 0, limit))]
+
+    def query_posts(self, user_ids: Optional[Sequence[int]] = None, min_id: Optional[int] = None,
+                    max_id: Optional[int] = None, title_prefix: Optional[str] = None,
+                    sort: str = 'id', offset: int = 0, limit: Optional[int] = None,
+                    explain: bool = False) -> Tuple[List[Post], Optional[str]]:
+        """
+        Get the posts matching every given filter, in `sort` order.
+
+        SQLite's planner picks the index (the primary key, `posts_user_id`
+        or `posts_title_key`); `explain` reports its EXPLAIN QUERY PLAN.
+        """
+        if sort not in _POST_ORDERS:
+            raise ValueError(f"Unknown sort: {sort!r}")
+        conditions: List[str] = []
+        params: list = []
+        if user_ids is not None:
+            user_ids = list(set(user_ids))
+            conditions.append(f"user_id IN ({', '.join('?' * len(user_ids))})")
+            params.extend(user_ids)
+        if min_id is not None:
+            conditions.append("id >= ?")
+            params.append(min_id)
+        if max_id is not None:
+            conditions.append("id <= ?")
+            params.append(max_id)
+        if title_prefix is not None:
+            prefix = self._normalize_prefix(title_prefix)
+            conditions.append("title_key >= ? AND title_key < ?")
+            params.extend((prefix, prefix + '\U0010ffff'))
+        sql = _SELECT_POSTS
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {_POST_ORDERS[sort]} LIMIT ? OFFSET ?"
+        params.extend((-1 if limit is None else limit, offset))
+
+        rows = self._query(sql, params)
+        plan = None
+        if explain:
+            plan = '; '.join(row[3] for row in self._query("EXPLAIN QUERY PLAN " + sql, params))
+        return [_post(row) for row in rows], plan
+
+    def search_posts(self, query: str, offset: int = 0, limit: int = 100) -> Tuple[List[Post], int]:
+        """Get one page of the posts matching a full-text query, best first, and the match count"""
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+        # Quote every term so FTS5 reads them as words, not query syntax
+        match = ' '.join(f'"{term}"' for term in terms)
+        with self._snapshot() as conn:
+            total = conn.execute(_COUNT_SEARCH, (match,)).fetchone()[0]
+            rows = conn.execute(_SEARCH_POSTS, (match, limit, offset)).fetchall() if total else []
+        return [_post(row) for row in rows], total
@@ -0,0 +1,293 @@
+"""
+Storage backend interface.
+
+Routes and schemas only rely on the methods declared by `Storage`. The backend
+behind the global `data_store` is built by `create_storage` from
+`DATA_STORE_BACKEND`:
+
+- ``memory``: `data_store.DataStore`, private to each process.
+- ``sqlite``: `sqlite_store.SQLiteDataStore`, one database file shared by
+  every worker process.
+
+Every backend must keep the same semantics: ids are allocated in increasing
+order and never reused (until `clear`), emails are unique case-insensitively,
+deleting a user deletes their posts, collections are returned in id order, and
+create/update return None instead of raising when a referenced record is
+missing or an email is taken. Every change gives the records it writes, and
+the collection it touches, a version higher than any that collection or
+record has had before, so versions can serve as ETags.
+
+Updates and deletes accept an `expected_version`. The change is applied only
+if the record still has that version (compare-and-set); otherwise they raise
+`VersionConflict` and change nothing.
+
+Batch creates are all-or-nothing: if any item would fail (an email already
+taken, by the store or by an earlier item of the batch, or a missing user),
+they raise `BatchRejected` listing every failing item and create nothing.
+Bulk post updates and deletes select posts by id, by owner or both, and apply
+to every selected post in one step. Exports iterate over the collection as it
+was when the export started, however long the consumer takes.
+
+Post queries combine filters (owner in a set of users, id range, title
+prefix) with one of `POST_SORTS`, and are answered from the backend's indexes
+instead of a scan of every post; with `explain` they also describe the plan.
+
+Type-ahead suggestions match users whose name or email starts with a prefix,
+case-insensitively, and list them in the sort order of the matching name or
+email (a user matching on both appears once, at the first).
+
+Full-text search matches the posts whose title and content contain every
+word of the query, case-insensitively, and ranks them best first (ties in id
+order). Each backend has its own relevance formula, so only the matches and
+the ordering rules are shared, not the exact ranks.
+"""
+
+import atexit
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from models.post import Post
+from models.user import User
+
+STORAGE_BACKENDS = ('memory', 'sqlite')
+# Orders accepted by `query_posts`; a leading "-" sorts descending. Titles
+# sort case-insensitively, ties in id order
+POST_SORTS = ('id', '-id', 'title', '-title')
+
+
+class VersionConflict(Exception):
+    """Raised when a record no longer has the version a write expected."""
+
+
+class BatchRejected(Exception):
+    """Raised when some items of a batch create would fail; nothing is created."""
+
+    def __init__(self, indexes: List[int]):
+        super().__init__(f"Rejected batch items: {indexes}")
+        self.indexes = indexes
+
+
+class SearchUnavailable(Exception):
+    """Raised when full-text search is disabled for the backend."""
+
+
+class Storage(ABC):
+    """Users and posts, with the lookups the API needs."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all users and posts and reset the id counters"""
+
+    def close(self):
+        """Release any files or connections held by the backend"""
+
+    @staticmethod
+    def _normalize_email(email: str) -> str:
+        """Normalize an email address for use as an index key"""
+        return email.strip().lower()
+
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        """Normalize a user name for use as an index key"""
+        return name.strip().lower()
+
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        """Normalize a post title for use as an index key"""
+        return title.strip().lower()
+
+    @staticmethod
+    def _normalize_prefix(prefix: str) -> str:
+        """Normalize a type-ahead prefix to match name and email keys"""
+        # Trailing spaces are kept, so "ann " does not match "anne"
+        return prefix.lstrip().lower()
+
+    def _initialize_sample_data(self):
+        """Initialize with sample data"""
+        # Add sample users
+        sample_users = [
+            {"name": "John Doe", "email": "john@example.com"},
+            {"name": "Jane Smith", "email": "jane@example.com"}
+        ]
+        for user_data in sample_users:
+            self.create_user(user_data["name"], user_data["email"])
+
+        # Add sample posts
+        sample_posts = [
+            {"title": "First Post",
+                "content": "This is the content of the first post", "user_id": 1},
+            {"title": "Second Post",
+                "content": "This is the content of the second post", "user_id": 2},
+            {"title": "Third Post",
+                "content": "This is the content of the third post", "user_id": 1}
+        ]
+        for post_data in sample_posts:
+            self.create_post(
+                post_data["title"], post_data["content"], post_data["user_id"])
+
+    # User methods
+    @abstractmethod
+    def get_all_users(self) -> List[User]:
+        """Get all users"""
+
+    @abstractmethod
+    def get_users_page(self, after: Optional[int] = None, limit: int = 100) -> List[User]:
+        """Get up to `limit` users with an id greater than `after`, in id order"""
+
+    @abstractmethod
+    def iter_users(self, batch_size: int = 500) -> Iterator[User]:
+        """Iterate over all users in id order without copying the collection"""
+
+    @abstractmethod
+    def export_users(self) -> Iterator[User]:
+        """Iterate over all users in id order as of the call, unaffected by later writes"""
+
+    @abstractmethod
+    def get_user(self, user_id: int) -> Optional[User]:
+        """Get a user by ID"""
+
+    @abstractmethod
+    def create_user(self, name: str, email: str) -> Optional[User]:
+        """Create a new user, or return None if the email is already taken"""
+
+    @abstractmethod
+    def create_users(self, users: Sequence[Tuple[str, str]]) -> List[User]:
+        """Create users from (name, email) pairs in one step"""
+
+    @abstractmethod
+    def update_user(self, user_id: int, name: Optional[str] = None, email: Optional[str] = None,
+                    expected_version: Optional[int] = None) -> Optional[User]:
+        """Update an existing user, or return None if it does not exist or the email is taken"""
+
+    @abstractmethod
+    def delete_user(self, user_id: int, expected_version: Optional[int] = None) -> bool:
+        """Delete a user and their posts"""
+
+    @abstractmethod
+    def user_exists(self, user_id: int) -> bool:
+        """Check if a user exists"""
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get a user by email (case-insensitive)"""
+
+    @abstractmethod
+    def suggest_users(self, prefix: str, limit: int = 10) -> List[User]:
+        """Get up to `limit` users whose name or email starts with `prefix`, in match order"""
+
+    @abstractmethod
+    def get_users_version(self) -> int:
+        """Get the version of the users collection; it grows with every change to it"""
+
+    # Post methods
+    @abstractmethod
+    def get_all_posts(self) -> List[Post]:
+        """Get all posts"""
+
+    @abstractmethod
+    def get_posts_page(self, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts with an id greater than `after`, in id order"""
+
+    @abstractmethod
+    def iter_posts(self, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over all posts in id order without copying the collection"""
+
+    @abstractmethod
+    def export_posts(self) -> Iterator[Post]:
+        """Iterate over all posts in id order as of the call, unaffected by later writes"""
+
+    @abstractmethod
+    def get_post(self, post_id: int) -> Optional[Post]:
+        """Get a post by ID"""
+
+    @abstractmethod
+    def create_post(self, title: str, content: str, user_id: int) -> Optional[Post]:
+        """Create a new post, or return None if the user does not exist"""
+
+    @abstractmethod
+    def create_posts(self, posts: Sequence[Tuple[str, str, int]]) -> List[Post]:
+        """Create posts from (title, content, user_id) triples in one step"""
+
+    @abstractmethod
+    def update_post(self, post_id: int, title: Optional[str] = None, content: Optional[str] = None,
+                    user_id: Optional[int] = None, expected_version: Optional[int] = None) -> Optional[Post]:
+        """Update an existing post, or return None if the post or new user does not exist"""
+
+    @abstractmethod
+    def delete_post(self, post_id: int, expected_version: Optional[int] = None) -> bool:
+        """Delete a post"""
+
+    @abstractmethod
+    def update_posts(self, post_ids: Optional[Sequence[int]] = None, by_user: Optional[int] = None,
+                     title: Optional[str] = None, content: Optional[str] = None,
+                     user_id: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Patch the selected posts in one step and return their ids in order,
+        or None (changing nothing) if the new user does not exist
+        """
+
+    @abstractmethod
+    def delete_posts(self, post_ids: Optional[Sequence[int]] = None,
+                     by_user: Optional[int] = None) -> List[int]:
+        """Delete the selected posts in one step and return their ids in order"""
+
+    @abstractmethod
+    def get_posts_version(self) -> int:
+        """Get the version of the posts collection; it grows with every change to it"""
+
+    @abstractmethod
+    def get_posts_by_user(self, user_id: int) -> List[Post]:
+        """Get all posts by a specific user"""
+
+    @abstractmethod
+    def count_posts_by_user(self, user_id: int) -> int:
+        """Count the posts by a specific user"""
+
+    @abstractmethod
+    def iter_posts_by_user(self, user_id: int, batch_size: int = 500) -> Iterator[Post]:
+        """Iterate over a user's posts in id order without copying the list"""
+
+    @abstractmethod
+    def get_posts_by_user_page(self, user_id: int, after: Optional[int] = None, limit: int = 100) -> List[Post]:
+        """Get up to `limit` posts by a user with an id greater than `after`"""
+
+    @abstractmethod
+    def query_posts(self, user_ids: Optional[Sequence[int]] = None, min_id: Optional[int] = None,
+                    max_id: Optional[int] = None, title_prefix: Optional[str] = None,
+                    sort: str = 'id', offset: int = 0, limit: Optional[int] = None,
+                    explain: bool = False) -> Tuple[List[Post], Optional[str]]:
+        """
+        Get the posts matching every given filter (ids inclusive), in `sort`
+        order, skipping `offset` and returning at most `limit`; also return
+        a description of the query plan if `explain` is set, else None
+        """
+
+    @abstractmethod
+    def search_posts(self, query: str, offset: int = 0, limit: int = 100) -> Tuple[List[Post], int]:
+        """Get one page of the posts matching a full-text query, best first, and the match count"""
+
+
+def create_storage(config) -> Storage:
+    """Build the storage backend selected by a config object"""
+    # Backends import this module for the base class, so import them lazily
+    backend = config.DATA_STORE_BACKEND
+    if backend == 'sqlite':
+        from sqlite_store import SQLiteDataStore
+        return SQLiteDataStore(config.DATA_STORE_SQLITE_PATH)
+    if backend == 'memory':
+        from data_store import DataStore
+        persistent = config.DATA_STORE_WAL_PATH or config.DATA_STORE_SNAPSHOT_PATH
+        if persistent and config.WEB_CONCURRENCY > 1:
+            raise ValueError("DATA_STORE_WAL_PATH and DATA_STORE_SNAPSHOT_PATH need a single "
+                             f"worker process (WEB_CONCURRENCY is {config.WEB_CONCURRENCY})")
+        # The store is imported before gunicorn forks its workers, so it is
+        # loaded lazily, by the worker that serves it
+        store = DataStore(post_storage=config.POST_STORAGE,
+                          wal_path=config.DATA_STORE_WAL_PATH,
+                          wal_sync=config.DATA_STORE_WAL_SYNC,
+                          snapshot_path=config.DATA_STORE_SNAPSHOT_PATH,
+                          search_index=config.SEARCH_INDEX, lazy=True)
+        if config.DATA_STORE_SNAPSHOT_PATH:
+            atexit.register(store.save_snapshot_at_exit)
+        return store
+    raise ValueError(f"Unknown data store backend: {backend!r}")
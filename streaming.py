@@ -0,0 +1,45 @@
+"""
+Streaming JSON array responses for large collections.
+
+Records are serialized one at a time and flushed in chunks of roughly
+`CHUNK_SIZE` bytes, so peak memory is bounded by a single chunk and the first
+byte leaves as soon as the first chunk is full.
+"""
+
+from typing import Any, Callable, Iterable, Iterator
+
+from flask import Response, request, stream_with_context
+
+CHUNK_SIZE = 64 * 1024
+
+_TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def wants_stream() -> bool:
+    """Check whether the current request asked for a streamed response."""
+    return request.args.get('stream', '').lower() in _TRUE_VALUES
+
+
+def iter_json_array(records: Iterable[Any], encode: Callable[[Any], bytes],
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a JSON array of encoded records as a sequence of byte chunks."""
+    buffer = [b'[']
+    buffered = 1
+    separator = b''
+    for record in records:
+        encoded = separator + encode(record)
+        separator = b','
+        buffer.append(encoded)
+        buffered += len(encoded)
+        if buffered >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    buffer.append(b']\n')
+    yield b''.join(buffer)
+
+
+def stream_json_array(records: Iterable[Any], encode: Callable[[Any], bytes]) -> Response:
+    """Build a streamed `application/json` response from an iterable of records."""
+    return Response(stream_with_context(iter_json_array(records, encode)),
+                    mimetype='application/json')
@@ -1,10 +1,32 @@
+import sys
 import pytest
 from app import app
 from data_store import data_store
+from sqlite_store import SQLiteDataStore
+from storage import STORAGE_BACKENDS
+from response_cache import response_cache
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def storage(request, tmp_path, monkeypatch):
+    """Run the app against each storage backend in turn"""
+    if request.param == 'memory':
+        yield data_store
+        return
+
+    # Rebind the global store in every module that imported it (this one
+    # included, so compare against a saved reference)
+    default_store = data_store
+    store = SQLiteDataStore(str(tmp_path / "store.sqlite3"))
+    for module in list(sys.modules.values()):
+        if vars(module).get('data_store') is default_store:
+            monkeypatch.setattr(module, 'data_store', store)
+    yield store
+    store.close()
 
 
 @pytest.fixture
-def client():
+def client(storage):
     """Create a test client for the Flask application"""
     app.config['TESTING'] = True
     with app.test_client() as client:
@@ -34,18 +56,15 @@ def sample_post_data():
 def reset_data_store():
     """Reset the data store before each test"""
     # Clear existing data
-    data_store._users.clear()
-    data_store._posts.clear()
-    data_store._next_user_id = 1
-    data_store._next_post_id = 1
+    data_store.clear()
 
     # Reinitialize with sample data
     data_store._initialize_sample_data()
 
+    # Fresh stores reuse version numbers, so cached responses must go too
+    response_cache.clear()
+
     yield
 
     # Cleanup after test
-    data_store._users.clear()
-    data_store._posts.clear()
-    data_store._next_user_id = 1
-    data_store._next_post_id = 1
+    data_store.clear()
@@ -0,0 +1,135 @@
+from app import app
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestBatchCreate:
+    """Test cases for the batch create endpoints"""
+
+    def test_create_users(self, client):
+        """Test a batch of users is created in order"""
+        response = client.post("/api/users/batch", json=[
+            {"name": "A", "email": "a@example.com"},
+            {"name": "B", "email": "b@example.com"}])
+        assert response.status_code == 201
+        assert [user["id"] for user in response.get_json()] == [3, 4]
+        assert client.get("/api/users/4").get_json()["email"] == "b@example.com"
+
+    def test_create_posts(self, client):
+        """Test a batch of posts is created for several users"""
+        response = client.post("/api/posts/batch", json=[
+            {"title": "T1", "content": "C1", "user_id": 2},
+            {"title": "T2", "content": "C2", "user_id": 1}])
+        assert response.status_code == 201
+        assert [post["id"] for post in response.get_json()] == [4, 5]
+        assert [post["id"] for post in client.get("/api/posts/user/2").get_json()] == [2, 4]
+
+    @pytest.mark.parametrize("backend", ["marshmallow", "compiled"])
+    def test_validation_errors_per_item(self, client, monkeypatch, backend):
+        """Test every invalid item is reported and nothing is created"""
+        monkeypatch.setitem(app.config, 'VALIDATOR_BACKEND', backend)
+        response = client.post("/api/users/batch", json=[
+            {"name": "A", "email": "a@example.com"},
+            {"name": " ", "email": "not-an-email"},
+            {"email": "c@example.com"}])
+        assert response.status_code == 400
+        details = response.get_json()["details"]
+        assert set(details) == {"1", "2"}
+        assert set(details["1"]) == {"name", "email"}
+        assert "name" in details["2"]
+        assert len(client.get("/api/users/").get_json()) == 2
+
+    def test_duplicate_emails_are_rejected_together(self, client):
+        """Test emails taken by the store or an earlier item fail the whole batch"""
+        response = client.post("/api/users/batch", json=[
+            {"name": "A", "email": "a@example.com"},
+            {"name": "Taken", "email": "JOHN@example.com"},
+            {"name": "Again", "email": "A@example.com"}])
+        assert response.status_code == 409
+        assert set(response.get_json()["details"]) == {"1", "2"}
+        assert client.get("/api/users/").get_json()[-1]["id"] == 2
+
+    def test_missing_users_fail_post_batch(self, client):
+        """Test posts for unknown users fail the whole batch"""
+        response = client.post("/api/posts/batch", json=[
+            {"title": "T1", "content": "C1", "user_id": 1},
+            {"title": "T2", "content": "C2", "user_id": 99}])
+        assert response.status_code == 404
+        assert list(response.get_json()["details"]) == ["1"]
+        assert len(client.get("/api/posts/").get_json()) == 3
+
+    @pytest.mark.parametrize("body", [{}, [], {"name": "A"}, "text"])
+    def test_requires_an_array(self, client, body):
+        """Test anything but a non-empty array is refused"""
+        assert client.post("/api/users/batch", json=body).status_code == 400
+
+    def test_size_limit(self, client, monkeypatch):
+        """Test batches over BATCH_MAX_ITEMS are refused"""
+        monkeypatch.setitem(app.config, 'BATCH_MAX_ITEMS', 2)
+        items = [{"title": "T", "content": "C", "user_id": 1}] * 3
+        assert client.post("/api/posts/batch", json=items).status_code == 413
+
+
+class TestBulkPostChanges:
+    """Test cases for bulk post updates and deletes"""
+
+    def test_reassign_by_filter(self, client):
+        """Test moving every post of one user to another"""
+        response = client.post("/api/posts/batch/update",
+                               json={"filter": {"user_id": 1}, "patch": {"user_id": 2}})
+        assert response.status_code == 200
+        assert response.get_json() == {"updated": 2}
+        assert [post["id"] for post in client.get("/api/posts/user/2").get_json()] == [1, 2, 3]
+        assert client.get("/api/posts/user/1").get_json() == []
+
+    def test_update_by_ids_reports_missing(self, client):
+        """Test ids that do not exist are summarized, the rest updated"""
+        response = client.post("/api/posts/batch/update",
+                               json={"ids": [3, 99, 1], "patch": {"title": "Bulk"}})
+        assert response.get_json() == {"updated": 2, "not_found": [99]}
+        titles = {post["id"]: post["title"] for post in client.get("/api/posts/").get_json()}
+        assert titles == {1: "Bulk", 2: "Second Post", 3: "Bulk"}
+
+    def test_ids_and_filter_combine(self, client):
+        """Test a filter narrows an id list"""
+        response = client.post("/api/posts/batch/delete",
+                               json={"ids": [1, 2], "filter": {"user_id": 1}})
+        assert response.get_json() == {"deleted": 1, "not_found": [2]}
+        assert [post["id"] for post in client.get("/api/posts/").get_json()] == [2, 3]
+
+    def test_delete_by_filter(self, client):
+        """Test deleting every post of a user keeps the user"""
+        response = client.post("/api/posts/batch/delete", json={"filter": {"user_id": 1}})
+        assert response.get_json() == {"deleted": 2}
+        assert [post["id"] for post in client.get("/api/posts/").get_json()] == [2]
+        assert client.get("/api/users/1").status_code == 200
+
+    def test_one_version_per_operation(self, client):
+        """Test a bulk change moves the posts ETag once and shares one record version"""
+        client.post("/api/posts/batch/update", json={"ids": [1, 2], "patch": {"content": "C"}})
+        etags = {client.get(f"/api/posts/{post_id}").headers["ETag"] for post_id in (1, 2)}
+        assert etags == {client.get("/api/posts/").headers["ETag"]}
+
+    def test_missing_target_user(self, client):
+        """Test reassigning to an unknown user changes nothing"""
+        response = client.post("/api/posts/batch/update",
+                               json={"ids": [1], "patch": {"user_id": 99}})
+        assert response.status_code == 404
+        assert client.get("/api/posts/1").get_json()["user_id"] == 1
+
+    @pytest.mark.parametrize("body", [
+        {}, {"ids": "1"}, {"ids": [True]}, {"filter": {"title": "x"}},
+        {"filter": {"user_id": "1"}}, {"filter": {"user_id": 0}}, {"filter": {"user_id": -1}},
+        {"ids": [1], "patch": {}}, {"ids": [1], "patch": {"title": " "}}])
+    def test_invalid_requests(self, client, body):
+        """Test malformed selections and patches are refused"""
+        assert client.post("/api/posts/batch/update", json=body).status_code == 400
+
+    @pytest.mark.parametrize("user_id", [0, -1])
+    def test_delete_rejects_non_positive_user_filter(self, client, user_id):
+        """Test a filter on an impossible user id is refused before reaching the store"""
+        response = client.post("/api/posts/batch/delete", json={"filter": {"user_id": user_id}})
+        assert response.status_code == 400
+        assert len(client.get("/api/posts/").get_json()) == 3
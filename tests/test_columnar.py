@@ -0,0 +1,128 @@
+from columnar import ColumnarPostTable, COMPACT_MIN_ROWS
+import columnar
+from data_store import DataStore
+from models.post import Post
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestColumnarPostTable:
+    """Test cases for the columnar post table"""
+
+    @pytest.fixture
+    def table(self):
+        table = ColumnarPostTable()
+        for post_id, user_id in ((1, 1), (2, 2), (3, 1), (4, 3)):
+            table[post_id] = Post(id=post_id, title=f"Title {post_id}",
+                                  content=f"Content {post_id}", user_id=user_id)
+        return table
+
+    def test_mapping_behaviour(self, table):
+        """Test get, update, delete and iteration"""
+        assert len(table) == 4
+        assert table[3].to_dict() == {"id": 3, "title": "Title 3",
+                                      "content": "Content 3", "user_id": 1}
+
+        post = table[3]
+        post.title = "Changed"
+        table[3] = post
+        assert table[3].title == "Changed"
+
+        del table[2]
+        assert 2 not in table
+        assert list(table) == [1, 3, 4]
+        with pytest.raises(KeyError):
+            table[2]
+
+    def test_out_of_order_insert(self, table):
+        """Test ids inserted below the current maximum keep rows sorted"""
+        del table[2]
+        table[2] = Post(id=2, title="Again", content="Again", user_id=3)
+        table[0] = Post(id=0, title="Zero", content="Zero", user_id=3)
+        assert list(table) == [0, 1, 2, 3, 4]
+        assert table.ids_by_user(3) == [0, 2, 4]
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_user_scans(self, table, use_numpy, monkeypatch):
+        """Test per-user filters and counts with and without NumPy"""
+        if not use_numpy:
+            monkeypatch.setattr(columnar, "numpy", None)
+        elif columnar.numpy is None:
+            pytest.skip("NumPy is not installed")
+
+        assert table.ids_by_user(1) == [1, 3]
+        assert table.count_by_user(1) == 2
+        del table[1]
+        assert table.ids_by_user(1) == [3]
+        assert table.count_by_user(1) == 1
+        assert table.ids_by_user(99) == []
+        assert table.ids_by_users({1, 3}) == [3, 4]
+        assert table.count_by_users({1, 3, 99}) == 2
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_scans_skip_tombstones(self, table, use_numpy, monkeypatch):
+        """Test the tombstone marker never matches deleted rows as a user id"""
+        if not use_numpy:
+            monkeypatch.setattr(columnar, "numpy", None)
+        elif columnar.numpy is None:
+            pytest.skip("NumPy is not installed")
+
+        del table[2]
+        assert table.ids_by_user(columnar.DELETED) == []
+        assert table.count_by_user(columnar.DELETED) == 0
+        assert table.ids_by_users({columnar.DELETED}) == []
+        assert table.count_by_users({columnar.DELETED, 1}) == 2
+        assert table.ids_by_users({columnar.DELETED, 3}) == [4]
+        with pytest.raises(ValueError):
+            table[5] = Post(id=5, title="T", content="C", user_id=columnar.DELETED)
+
+    def test_store_with_deletes_and_negative_user_id(self):
+        """Test a negative user id selects nothing after posts are deleted"""
+        store = DataStore(post_storage="columnar")
+        store.delete_post(2)
+        assert store.count_posts_by_user(-1) == 0
+        assert store.get_posts_by_user(-1) == []
+        assert store.delete_posts(None, -1) == []
+        assert store.update_posts(None, -1, title="X") == []
+        assert store.query_posts(user_ids=[-1])[0] == []
+
+    def test_compaction(self):
+        """Test tombstoned rows are compacted away"""
+        table = ColumnarPostTable()
+        for post_id in range(1, COMPACT_MIN_ROWS + 1):
+            table[post_id] = Post(id=post_id, title="T", content="C",
+                                  user_id=post_id % 2)
+        for post_id in range(1, COMPACT_MIN_ROWS + 1, 2):
+            del table[post_id]
+
+        assert len(table) == COMPACT_MIN_ROWS // 2
+        assert len(table._ids) < COMPACT_MIN_ROWS
+        assert table.ids_by_user(0)[:3] == [2, 4, 6]
+
+
+class TestColumnarDataStore:
+    """Test DataStore with the columnar post storage"""
+
+    @pytest.fixture
+    def store(self):
+        return DataStore(post_storage='columnar')
+
+    def test_post_operations(self, store):
+        """Test the DataStore post API on top of the columnar table"""
+        assert [p.id for p in store.get_posts_by_user(1)] == [1, 3]
+        assert store.count_posts_by_user(1) == 2
+
+        store.update_post(1, title="Updated", user_id=2)
+        assert store.get_post(1).title == "Updated"
+        assert [p.id for p in store.get_posts_by_user(2)] == [1, 2]
+
+        store.delete_user(2)
+        assert [p.id for p in store.get_all_posts()] == [3]
+        assert [p.id for p in store.get_posts_page(limit=10)] == [3]
+
+    def test_unknown_storage(self):
+        """Test an unknown post storage name is rejected"""
+        with pytest.raises(ValueError):
+            DataStore(post_storage='parquet')
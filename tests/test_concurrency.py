@@ -0,0 +1,128 @@
+from data_store import DataStore
+from locks import ReadWriteLock
+from storage import VersionConflict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestReadWriteLock:
+    """Test cases for the reader-writer lock"""
+
+    def test_readers_share_the_lock(self):
+        """Test several readers can hold the lock at the same time"""
+        lock = ReadWriteLock()
+        inside = threading.Barrier(3, timeout=5)
+
+        def reader():
+            with lock.read:
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert not inside.broken
+
+    def test_writer_excludes_readers(self):
+        """Test a reader waits while a writer holds the lock"""
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_write()
+
+        def reader():
+            with lock.read:
+                events.append("read")
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join(0.1)
+        events.append("write done")
+        lock.release_write()
+        thread.join(5)
+
+        assert events == ["write done", "read"]
+
+
+class TestDataStoreConcurrency:
+    """Test DataStore under concurrent access"""
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_parallel_creates_get_unique_ids(self, post_storage):
+        """Test concurrent creates never hand out duplicate ids"""
+        store = DataStore(post_storage=post_storage)
+
+        def create(i):
+            user = store.create_user(f"User {i}", f"user{i}@example.com")
+            post = store.create_post("Title", "Content", user.id)
+            return user.id, post.id
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(create, range(400)))
+
+        user_ids = [user_id for user_id, _ in results]
+        post_ids = [post_id for _, post_id in results]
+        assert len(set(user_ids)) == 400
+        assert len(set(post_ids)) == 400
+        assert len(store.get_all_users()) == 402
+        assert len(store.get_all_posts()) == 403
+
+    def test_duplicate_email_race(self):
+        """Test only one of several concurrent creates with one email wins"""
+        store = DataStore()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda i: store.create_user(f"User {i}", "same@example.com"), range(32)))
+        assert sum(user is not None for user in results) == 1
+
+    def test_reads_during_cascade_deletes(self):
+        """Test listing posts while users are deleted stays consistent"""
+        store = DataStore()
+        users = [store.create_user(f"User {i}", f"user{i}@example.com")
+                 for i in range(50)]
+        for user in users:
+            for _ in range(20):
+                store.create_post("Title", "Content", user.id)
+
+        errors = []
+
+        def read():
+            try:
+                for _ in range(50):
+                    store.get_all_posts()
+                    ids = [post.id for post in store.iter_posts(batch_size=64)]
+                    assert ids == sorted(set(ids))
+            except Exception as err:  # pragma: no cover - reported below
+                errors.append(err)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        for user in users:
+            store.delete_user(user.id)
+        for thread in readers:
+            thread.join()
+
+        assert errors == []
+        assert [post.id for post in store.get_all_posts()] == [1, 2, 3]
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_compare_and_set_has_one_winner(self, post_storage):
+        """Test only one of many writers expecting the same version succeeds"""
+        store = DataStore(post_storage=post_storage)
+        version = store.get_post(1).version
+
+        def attempt(n):
+            try:
+                return store.update_post(1, title=f"Writer {n}", expected_version=version)
+            except VersionConflict:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            winners = [post for post in pool.map(attempt, range(32)) if post]
+        assert len(winners) == 1
+        assert store.get_post(1).title == winners[0].title
@@ -0,0 +1,132 @@
+import routes.user_routes
+import threading
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestConditionalRequests:
+    """Test cases for ETags and If-None-Match"""
+
+    @pytest.mark.parametrize("url", ["/api/users/1", "/api/posts/1", "/api/users/",
+                                     "/api/posts/", "/api/posts/?limit=1",
+                                     "/api/posts/?stream=true", "/api/posts/user/1"])
+    def test_matching_etag_returns_304(self, client, url):
+        """Test a GET repeated with its ETag gets an empty 304"""
+        response = client.get(url)
+        etag = response.headers["ETag"]
+        assert response.status_code == 200 and response.data
+        assert etag.startswith('"') and not etag.startswith('W/')
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.data == b""
+        assert cached.headers["ETag"] == etag
+
+    def test_update_changes_entity_etag(self, client):
+        """Test a stale ETag gets the new representation"""
+        etag = client.get("/api/users/1").headers["ETag"]
+        updated = client.put("/api/users/1", json={"name": "Renamed"})
+        assert updated.headers["ETag"] != etag
+
+        response = client.get("/api/users/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.get_json()["name"] == "Renamed"
+        assert response.headers["ETag"] == updated.headers["ETag"]
+
+    def test_collection_etags_follow_their_collection(self, client):
+        """Test list ETags change only when their collection changes"""
+        users_etag = client.get("/api/users/").headers["ETag"]
+        posts_etag = client.get("/api/posts/").headers["ETag"]
+
+        client.post("/api/users/", json={"name": "New", "email": "new@example.com"})
+        assert client.get("/api/users/").headers["ETag"] != users_etag
+        assert client.get("/api/posts/").headers["ETag"] == posts_etag
+
+        # Deleting a user with posts changes both collections
+        users_etag = client.get("/api/users/").headers["ETag"]
+        client.delete("/api/users/2")
+        assert client.get("/api/users/").headers["ETag"] != users_etag
+        assert client.get("/api/posts/").headers["ETag"] != posts_etag
+
+    def test_versions_are_never_reused_after_clear(self, client, storage):
+        """Test clearing the store does not bring old ETags back"""
+        etag = client.get("/api/users/1").headers["ETag"]
+        storage.clear()
+        storage._initialize_sample_data()
+
+        response = client.get("/api/users/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_not_modified_skips_serialization(self, client, monkeypatch):
+        """Test a 304 is answered without building the body"""
+        etag = client.get("/api/users/1").headers["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("body was serialized")
+        monkeypatch.setattr(routes.user_routes, "json_response", fail)
+
+        assert client.get("/api/users/1", headers={"If-None-Match": etag}).status_code == 304
+
+
+class TestIfMatch:
+    """Test cases for If-Match on writes"""
+
+    @pytest.mark.parametrize("url", ["/api/users/1", "/api/posts/1"])
+    def test_stale_etag_is_rejected(self, client, url):
+        """Test a write based on an old version gets a 412 and changes nothing"""
+        etag = client.get(url).headers["ETag"]
+        body = {"name": "First"} if "users" in url else {"title": "First"}
+        assert client.put(url, json=body, headers={"If-Match": etag}).status_code == 200
+
+        before = client.get(url).get_json()
+        for response in (client.put(url, json=body, headers={"If-Match": etag}),
+                         client.delete(url, headers={"If-Match": etag})):
+            assert response.status_code == 412
+            assert response.get_json() == {"error": "Precondition failed"}
+        assert client.get(url).get_json() == before
+
+    def test_current_etag_allows_delete(self, client):
+        """Test a delete naming the current version succeeds"""
+        etag = client.get("/api/posts/2").headers["ETag"]
+        assert client.delete("/api/posts/2", headers={"If-Match": etag}).status_code == 204
+        assert client.get("/api/posts/2").status_code == 404
+
+    @pytest.mark.parametrize("if_match,status", [
+        ('*', 200), ('W/"v1"', 412), ('"abc"', 412), ('"v1", "v2"', 412)])
+    def test_if_match_forms(self, client, if_match, status):
+        """Test wildcard, weak, foreign and multiple tags"""
+        response = client.put("/api/users/1", json={"name": "X"}, headers={"If-Match": if_match})
+        assert response.status_code == status
+
+    def test_missing_record_is_not_found(self, client):
+        """Test If-Match does not hide a 404"""
+        response = client.delete("/api/users/99", headers={"If-Match": '"v1"'})
+        assert response.status_code == 404
+
+    def test_no_lost_updates(self, client):
+        """Test concurrent read-modify-write cycles never overwrite each other"""
+        workers, increments = 4, 10
+        client.put("/api/posts/1", json={"title": "0"})
+
+        def increment():
+            worker = client.application.test_client()
+            done = 0
+            while done < increments:
+                response = worker.get("/api/posts/1")
+                count = int(response.get_json()["title"])
+                response = worker.put("/api/posts/1", json={"title": str(count + 1)},
+                                      headers={"If-Match": response.headers["ETag"]})
+                if response.status_code == 200:
+                    done += 1
+                else:
+                    assert response.status_code == 412
+
+        threads = [threading.Thread(target=increment) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client.get("/api/posts/1").get_json()["title"] == str(workers * increments)
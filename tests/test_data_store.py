@@ -2,6 +2,7 @@ from models.post import Post
 from models.user import User
 from data_store import DataStore
 import pytest
+import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,6 +30,13 @@ class TestUserClass:
         }
         assert user_dict == expected
 
+    def test_user_has_no_instance_dict(self):
+        """Test User uses __slots__ instead of a per-instance __dict__"""
+        user = User(id=1, name="Test User", email="test@example.com")
+        assert not hasattr(user, "__dict__")
+        with pytest.raises(AttributeError):
+            user.nickname = "tester"
+
     def test_user_from_dict(self):
         """Test User from_dict class method"""
         user_data = {
@@ -67,6 +75,11 @@ class TestPostClass:
         }
         assert post_dict == expected
 
+    def test_post_has_no_instance_dict(self):
+        """Test Post uses __slots__ instead of a per-instance __dict__"""
+        post = Post(id=1, title="Test Post", content="Test content", user_id=1)
+        assert not hasattr(post, "__dict__")
+
     def test_post_from_dict(self):
         """Test Post from_dict class method"""
         post_data = {
@@ -82,6 +95,14 @@ class TestPostClass:
         assert post.content == "Test content"
         assert post.user_id == 1
 
+    def test_post_to_json_is_cached(self):
+        """Test Post to_json caches its encoded bytes"""
+        post = Post(id=1, title="Test Post", content="Test content", user_id=1)
+        encoded = post.to_json()
+
+        assert json.loads(encoded) == post.to_dict()
+        assert post.to_json() is encoded
+
 
 class TestDataStore:
     """Test cases for DataStore class"""
@@ -260,3 +281,81 @@ class TestDataStore:
         # Verify posts are no longer in the store
         for post in user_posts:
             assert fresh_data_store.get_post(post.id) is None
+
+    def test_get_user_by_email_is_case_insensitive(self, fresh_data_store):
+        """Test email lookups use the normalized email index"""
+        user = fresh_data_store.get_user_by_email("  JOHN@Example.com ")
+        assert user is not None
+        assert user.id == 1
+
+    def test_create_user_duplicate_email(self, fresh_data_store):
+        """Test creating a user with a taken email is rejected"""
+        user = fresh_data_store.create_user("Other John", "John@example.com")
+        assert user is None
+        assert len(fresh_data_store.get_all_users()) == 2
+
+    def test_email_index_follows_updates_and_deletes(self, fresh_data_store):
+        """Test the email index is kept in sync by update and delete"""
+        fresh_data_store.update_user(1, email="johnny@example.com")
+        assert fresh_data_store.get_user_by_email("john@example.com") is None
+        assert fresh_data_store.get_user_by_email(
+            "johnny@example.com").id == 1
+
+        # Email owned by another user cannot be taken over
+        assert fresh_data_store.update_user(
+            2, email="johnny@example.com") is None
+        assert fresh_data_store.get_user(2).email == "jane@example.com"
+
+        fresh_data_store.delete_user(1)
+        assert fresh_data_store.get_user_by_email("johnny@example.com") is None
+        assert fresh_data_store.create_user(
+            "New John", "johnny@example.com") is not None
+
+    def test_post_index_follows_reassignment(self, fresh_data_store):
+        """Test reassigning a post moves it between users' post lists"""
+        fresh_data_store.update_post(1, user_id=2)
+
+        assert [p.id for p in fresh_data_store.get_posts_by_user(1)] == [3]
+        assert [p.id for p in fresh_data_store.get_posts_by_user(2)] == [1, 2]
+
+        # Cascade delete only touches the posts currently owned by the user
+        fresh_data_store.delete_user(1)
+        assert fresh_data_store.get_post(3) is None
+        assert fresh_data_store.get_post(1) is not None
+
+    def test_pages_skip_deleted_ids(self, fresh_data_store):
+        """Test keyset pages are served from the sorted id lists"""
+        fresh_data_store.delete_post(2)
+
+        assert [p.id for p in fresh_data_store.get_posts_page(limit=1)] == [1]
+        assert [p.id for p in fresh_data_store.get_posts_page(
+            after=1, limit=5)] == [3]
+        assert fresh_data_store.get_posts_page(after=3) == []
+        assert [u.id for u in fresh_data_store.get_users_page(after=1)] == [2]
+
+    def test_iter_posts_tolerates_concurrent_deletes(self, fresh_data_store):
+        """Test iterating in keyset batches survives deletes mid-iteration"""
+        posts = fresh_data_store.iter_posts(batch_size=1)
+        assert next(posts).id == 1
+
+        fresh_data_store.delete_post(2)
+        assert [p.id for p in posts] == [3]
+
+    def test_updates_are_copy_on_write(self, fresh_data_store):
+        """Test updates replace records instead of mutating handed-out ones"""
+        user = fresh_data_store.get_user(1)
+        post = fresh_data_store.get_post(1)
+        user_json = user.to_json()
+
+        fresh_data_store.update_user(1, name="Renamed")
+        fresh_data_store.update_post(1, content="Rewritten")
+
+        # Readers holding the old records keep a consistent snapshot
+        assert user.name == "John Doe"
+        assert user.to_json() is user_json
+        assert post.content == "This is the content of the first post"
+
+        assert json.loads(fresh_data_store.get_user(1).to_json())[
+            "name"] == "Renamed"
+        assert json.loads(fresh_data_store.get_post(1).to_json())[
+            "content"] == "Rewritten"
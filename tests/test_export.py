@@ -0,0 +1,80 @@
+from data_store import DataStore
+import csv
+import gzip
+import io
+import json
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestExport:
+    """Test cases for the NDJSON and CSV export endpoints"""
+
+    def test_ndjson(self, client):
+        """Test every post is exported as one JSON object per line"""
+        response = client.get("/api/posts/export")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert 'filename="posts.ndjson"' in response.headers["Content-Disposition"]
+        lines = response.data.decode().splitlines()
+        assert [json.loads(line) for line in lines] == client.get("/api/posts/").get_json()
+
+    def test_csv(self, client):
+        """Test CSV exports have a header and one row per user"""
+        client.post("/api/users/", json={"name": "Comma, \"Quoted\"", "email": "c@example.com"})
+        response = client.get("/api/users/export?format=csv")
+        assert response.mimetype == "text/csv"
+        rows = list(csv.reader(io.StringIO(response.data.decode())))
+        assert rows[0] == ["id", "name", "email"]
+        assert rows[3] == ["3", "Comma, \"Quoted\"", "c@example.com"]
+        assert len(rows) == 4
+
+    @pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+    def test_gzip(self, client, fmt):
+        """Test clients accepting gzip get the same export compressed"""
+        plain = client.get(f"/api/posts/export?format={fmt}").data
+        response = client.get(f"/api/posts/export?format={fmt}",
+                              headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data) == plain
+
+    def test_unknown_format(self, client):
+        """Test an unsupported format is refused"""
+        assert client.get("/api/users/export?format=xml").status_code == 400
+
+    def test_view_is_consistent_during_writes(self, storage):
+        """Test writes made while an export is read do not show up in it"""
+        for i in range(20):
+            storage.create_post(f"Post {i}", "Content", 1)
+        expected = [post.to_dict() for post in storage.get_all_posts()]
+
+        posts = storage.export_posts()
+        first = next(posts)
+        storage.update_post(3, title="Changed mid-export")
+        storage.delete_post(2)
+        storage.create_post("Late", "Post", 2)
+        storage.delete_user(1)
+        exported = [first.to_dict()] + [post.to_dict() for post in posts]
+        assert exported == expected
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_memory_views_survive_compaction(self, post_storage):
+        """Test in-memory exports hold their view across tombstone compaction"""
+        store = DataStore(post_storage=post_storage)
+        store.create_posts([(f"Post {i}", "Content", 1) for i in range(2000)])
+        expected = [post.to_dict() for post in store.get_all_posts()]
+
+        posts = store.export_posts()
+        store.update_posts(by_user=1, title="Changed")
+        store.delete_posts(list(range(1, 1800)))
+        assert [post.to_dict() for post in posts] == expected
+
+    def test_export_does_not_copy_records(self, client, monkeypatch):
+        """Test the export is encoded from the store iterator, not a list dump"""
+        def fail(*args, **kwargs):
+            raise AssertionError("list endpoint used")
+        monkeypatch.setattr("data_store.DataStore.get_all_posts", fail)
+        monkeypatch.setattr("sqlite_store.SQLiteDataStore.get_all_posts", fail)
+        assert client.get("/api/posts/export").status_code == 200
@@ -0,0 +1,114 @@
+from app import app
+from models.post import Post
+from schemas import post_schema, user_schema
+from serializers import get_dumper, project
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestProjection:
+    """Test cases for projected schemas"""
+
+    def test_projection_is_built_once(self):
+        """Test each projection and its dumper are created once"""
+        projected = project(post_schema, ("id", "title"))
+        assert projected is project(post_schema, ("id", "title"))
+        assert get_dumper(projected) is get_dumper(projected)
+
+    def test_omitted_fields_are_not_read(self):
+        """Test the projected dumper never touches omitted attributes"""
+        class Post:
+            id = 1
+            title = "Title"
+
+            @property
+            def content(self):
+                raise AssertionError("content read")
+
+        assert get_dumper(project(post_schema, ("id", "title")))(Post()) == {"id": 1, "title": "Title"}
+
+    def test_model_caches_projections(self):
+        """Test records keep each projection's encoding next to the full one"""
+        post = Post(id=1, title="Title", content="Content", user_id=2)
+        encoded = post.to_json_fields(("id", "title"))
+        assert encoded == b'{"id":1,"title":"Title"}'
+        assert post.to_json_fields(("id", "title")) is encoded
+        assert post.to_json_fields(("content",)) == b'{"content":"Content"}'
+
+
+class TestFieldsParameter:
+    """Test cases for the fields query parameter on read endpoints"""
+
+    @pytest.mark.parametrize("url", [
+        "/api/posts/?fields=id,title",
+        "/api/posts/?fields=id&fields=title",
+        "/api/posts/?fields=title,id&limit=2",
+        "/api/posts/?fields=id,title&stream=1",
+        "/api/posts/?fields=id,title&sort=-title",
+        "/api/posts/search?q=post&fields=id,title",
+        "/api/posts/user/1?fields=id,title",
+    ])
+    def test_post_lists(self, client, url):
+        """Test every post listing returns only the requested fields"""
+        posts = client.get(url).get_json()
+        assert posts and all(set(post) == {"id", "title"} for post in posts)
+
+    def test_single_records(self, client):
+        """Test single-record reads are projected too"""
+        assert client.get("/api/posts/1?fields=content").get_json() == {
+            "content": "This is the content of the first post"}
+        assert client.get("/api/users/2?fields=name").get_json() == {"name": "Jane Smith"}
+
+    def test_user_lists(self, client):
+        """Test user listings and suggestions are projected"""
+        assert client.get("/api/users/?fields=email&limit=1").get_json() == [
+            {"email": "john@example.com"}]
+        assert client.get("/api/users/suggest?q=ja&fields=id").get_json() == [{"id": 2}]
+
+    def test_every_field_matches_the_full_record(self, client):
+        """Test naming every field returns the usual body"""
+        full = client.get("/api/users/").data
+        assert client.get("/api/users/?fields=email,id,name").data == full
+
+    @pytest.mark.parametrize("entity_cache", [True, False])
+    def test_entity_cache_setting(self, client, entity_cache, monkeypatch):
+        """Test projections and full records are right with or without the entity cache"""
+        monkeypatch.setitem(app.config, 'ENTITY_JSON_CACHE', entity_cache)
+        assert client.get("/api/users/1?fields=id").get_json() == {"id": 1}
+        assert set(client.get("/api/users/1").get_json()) == {"id", "name", "email"}
+
+    def test_cached_projections_follow_writes(self, client, monkeypatch):
+        """Test cached projections match fresh dumps and are replaced by updates"""
+        url = "/api/posts/?fields=id,title"
+        cached = client.get(url).get_json()
+        monkeypatch.setitem(app.config, 'ENTITY_JSON_CACHE', False)
+        assert client.get(url).get_json() == cached
+        monkeypatch.setitem(app.config, 'ENTITY_JSON_CACHE', True)
+        client.put("/api/posts/1", json={"title": "Renamed"})
+        assert client.get(url).get_json()[0] == {"id": 1, "title": "Renamed"}
+        assert client.get("/api/posts/1?fields=title").get_json() == {"title": "Renamed"}
+
+    def test_export(self, client):
+        """Test exports write only the requested columns"""
+        response = client.get("/api/users/export?format=csv&fields=name")
+        assert response.data.decode().splitlines() == ["name", "John Doe", "Jane Smith"]
+
+    def test_next_link_keeps_fields(self, client):
+        """Test the next page is requested with the same fields"""
+        response = client.get("/api/posts/?fields=title&limit=1")
+        assert "fields=title" in response.headers["Link"]
+
+    @pytest.mark.parametrize("url", [
+        "/api/posts/?fields=id,body", "/api/posts/?fields=", "/api/posts/?fields=,",
+        "/api/posts/1?fields=password", "/api/posts/user/1?fields=x",
+        "/api/posts/search?q=post&fields=x", "/api/posts/export?fields=x",
+        "/api/users/?fields=title", "/api/users/1?fields=x",
+        "/api/users/suggest?q=j&fields=x", "/api/users/export?fields=x",
+    ])
+    def test_invalid_fields(self, client, url):
+        """Test unknown or empty field lists are refused"""
+        response = client.get(url)
+        assert response.status_code == 400
+        assert "field" in response.get_json()["error"]
@@ -0,0 +1,70 @@
+from app import app
+from ingest import iter_lines
+import ingest
+import io
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def ndjson(*records):
+    """Encode records (or raw strings) as an NDJSON body"""
+    return "".join((record if isinstance(record, str) else json.dumps(record)) + "\n"
+                   for record in records)
+
+
+def post_import(client, url, body):
+    """Send an NDJSON body to an import endpoint"""
+    return client.post(url, data=body, content_type="application/x-ndjson")
+
+
+class TestNdjsonImport:
+    """Test cases for the NDJSON import endpoints"""
+
+    def test_import_users_across_chunks(self, client, monkeypatch):
+        """Test valid lines are imported and duplicates rejected in every chunk"""
+        monkeypatch.setitem(app.config, 'IMPORT_CHUNK_SIZE', 2)
+        body = ndjson({"name": "A", "email": "a@example.com"},
+                      {"name": "Taken", "email": "john@example.com"},
+                      {"name": "B", "email": "b@example.com"},
+                      {"name": "Again", "email": "A@example.com"},
+                      {"name": "C", "email": "c@example.com"})
+        report = post_import(client, "/api/users/import", body).get_json()
+
+        assert (report["lines"], report["imported"], report["failed"]) == (5, 3, 2)
+        assert [error["line"] for error in report["errors"]] == [2, 4]
+        emails = [user["email"] for user in client.get("/api/users/").get_json()]
+        assert emails[2:] == ["a@example.com", "b@example.com", "c@example.com"]
+
+    def test_bad_lines_are_reported(self, client):
+        """Test malformed JSON, invalid records and missing users are skipped"""
+        body = ndjson({"title": "T1", "content": "C1", "user_id": 1},
+                      "{not json",
+                      "",
+                      {"title": " ", "content": "C", "user_id": 1},
+                      {"title": "T2", "content": "C2", "user_id": 99})
+        response = post_import(client, "/api/posts/import", body)
+        assert response.status_code == 200
+        report = response.get_json()
+
+        assert (report["imported"], report["failed"]) == (1, 3)
+        errors = {error["line"]: error["error"] for error in report["errors"]}
+        assert errors[2] == "Invalid JSON"
+        assert "title" in errors[4]
+        assert "user_id" in errors[5]
+        assert report["records_per_second"] >= 0
+        assert len(client.get("/api/posts/").get_json()) == 4
+
+    def test_reported_errors_are_capped(self, client, monkeypatch):
+        """Test only the first errors are kept, while all are counted"""
+        monkeypatch.setattr(ingest, "MAX_REPORTED_ERRORS", 2)
+        report = post_import(client, "/api/users/import", ndjson("x", "y", "z")).get_json()
+        assert report["failed"] == 3
+        assert len(report["errors"]) == 2 and report["errors_truncated"]
+
+    def test_long_lines_are_skipped(self):
+        """Test an oversized line is dropped without losing the next one"""
+        stream = io.BytesIO(b"short\n" + b"x" * 50 + b"\nnext\nlast")
+        assert list(iter_lines(stream, max_line_bytes=10)) == [
+            (1, b"short\n"), (2, None), (3, b"next\n"), (4, b"last")]
@@ -0,0 +1,184 @@
+from data_store import DataStore
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    {},
+    {"user_ids": [2]},
+    {"user_ids": [1, 3], "sort": "-id"},
+    {"min_id": 10, "max_id": 30},
+    {"min_id": 50, "sort": "-id", "limit": 5},
+    {"title_prefix": "Beta", "sort": "title"},
+    {"title_prefix": "al", "user_ids": [3], "sort": "-title"},
+    {"title_prefix": "gamma 1", "min_id": 20},
+    {"sort": "title", "offset": 5, "limit": 10},
+    {"sort": "-title", "limit": 3},
+    {"user_ids": [2], "sort": "title", "offset": 2, "limit": 4},
+    {"user_ids": [99]},
+]
+
+
+def _fill(store):
+    """Add posts with repeating title words, spread over three users"""
+    store.create_user("Third", "third@example.com")
+    words = ["Alpha", "beta", "Gamma", "alpine"]
+    store.create_posts([(f"{words[i % 4]} {i}", "Body", i % 3 + 1) for i in range(60)])
+
+
+def _expected(store, user_ids=None, min_id=None, max_id=None, title_prefix=None,
+              sort="id", offset=0, limit=None):
+    """Answer a query by scanning every post"""
+    posts = [post for post in store.get_all_posts()
+             if (user_ids is None or post.user_id in user_ids)
+             and (min_id is None or post.id >= min_id)
+             and (max_id is None or post.id <= max_id)
+             and (title_prefix is None or post.title.lower().startswith(title_prefix.lower()))]
+    if sort.endswith("title"):
+        posts.sort(key=lambda post: (post.title.lower(), post.id))
+    if sort.startswith("-"):
+        posts.reverse()
+    end = None if limit is None else offset + limit
+    return [post.id for post in posts[offset:end]]
+
+
+class TestQueryPosts:
+    """Test cases for index-backed post queries"""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_a_full_scan(self, storage, query):
+        """Test every backend returns what a scan of every post would"""
+        _fill(storage)
+        posts, plan = storage.query_posts(**query)
+        assert [post.id for post in posts] == _expected(storage, **query)
+        assert plan is None
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_columnar_matches_a_full_scan(self, query):
+        """Test the columnar layout answers like the dict layout"""
+        store = DataStore(post_storage="columnar")
+        _fill(store)
+        assert [post.id for post in store.query_posts(**query)[0]] == _expected(store, **query)
+
+    def test_most_selective_index_drives(self):
+        """Test the planner picks the smallest index and stops at a full page"""
+        store = DataStore()
+        _fill(store)
+        plan = store.query_posts(user_ids=[3], min_id=1, explain=True)[1]
+        assert plan.startswith("user_id index")
+        plan = store.query_posts(user_ids=[1, 2, 3], min_id=60, explain=True)[1]
+        assert plan.startswith("id index; 4 of 63")
+        plan = store.query_posts(title_prefix="beta", user_ids=[1, 2], explain=True)[1]
+        assert plan.startswith("title index") and plan.endswith("sorted in memory")
+        plan = store.query_posts(sort="title", limit=5, explain=True)[1]
+        assert plan == "title index; 5 of 63 posts examined; index order"
+
+    def test_columnar_user_filter_scans_once(self, monkeypatch):
+        """Test many user ids are counted in one column scan and listed only when they drive"""
+        store = DataStore(post_storage="columnar")
+        _fill(store)
+
+        def fail(*args):
+            raise AssertionError("per-user scan")
+        monkeypatch.setattr("columnar.ColumnarPostTable.ids_by_user", fail)
+        monkeypatch.setattr("columnar.ColumnarPostTable.count_by_user", fail)
+        posts, plan = store.query_posts(user_ids=list(range(3, 103)), explain=True)
+        assert plan.startswith("user_id column scan")
+        assert [post.id for post in posts] == _expected(store, user_ids=list(range(3, 103)))
+
+        monkeypatch.setattr("columnar.ColumnarPostTable.ids_by_users", fail)
+        plan = store.query_posts(user_ids=[1, 2, 3], min_id=60, explain=True)[1]
+        assert plan.startswith("id index")
+
+    def test_title_index_follows_writes(self, storage):
+        """Test renames and deletes move posts in the title index"""
+        _fill(storage)
+        storage.update_post(5, title="Zulu")
+        storage.update_posts(post_ids=[6, 7], title="zebra")
+        storage.delete_post(8)
+        storage.delete_user(3)
+        posts = storage.query_posts(title_prefix="z", sort="-title")[0]
+        assert [post.id for post in posts] == [5, 7]
+        assert [post.id for post in storage.query_posts(title_prefix="beta 5")[0]] == [61]
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_title_index_survives_restart(self, post_storage, tmp_path):
+        """Test the title index is rebuilt from a snapshot and the log"""
+        wal_path = str(tmp_path / "store.wal")
+        snap_path = str(tmp_path / "store.snap")
+        store = DataStore(post_storage=post_storage, wal_path=wal_path, snapshot_path=snap_path)
+        _fill(store)
+        store.save_snapshot()
+        store.update_post(1, title="Omega")
+        store.delete_post(2)
+        store.close()
+
+        restored = DataStore(post_storage=post_storage, wal_path=wal_path, snapshot_path=snap_path)
+        assert [post.id for post in restored.query_posts(title_prefix="omega")[0]] == [1]
+        restored.create_post("Omega 2", "Body", 1)
+        query = {"title_prefix": "beta", "sort": "-title"}
+        assert [post.id for post in restored.query_posts(**query)[0]] == _expected(restored, **query)
+        restored.close()
+
+    def test_unknown_sort(self, storage):
+        """Test an unknown sort order is rejected"""
+        with pytest.raises(ValueError):
+            storage.query_posts(sort="content")
+
+
+class TestPostListFilters:
+    """Test cases for filters and sorts on GET /api/posts/"""
+
+    def test_filters(self, client):
+        """Test filters combine and list values may be repeated or comma separated"""
+        response = client.get("/api/posts/?user_id=1,2&min_id=2&title_prefix=th")
+        assert [post["id"] for post in response.get_json()] == [3]
+        response = client.get("/api/posts/?user_id=1&user_id=2&sort=-id")
+        assert [post["id"] for post in response.get_json()] == [3, 2, 1]
+
+    def test_sort_by_title(self, client):
+        """Test title sorts are case-insensitive"""
+        response = client.get("/api/posts/?sort=title")
+        assert [post["title"] for post in response.get_json()] == [
+            "First Post", "Second Post", "Third Post"]
+
+    @pytest.mark.parametrize("sort", ["id", "-id", "title", "-title"])
+    def test_next_links_cover_every_match(self, client, sort):
+        """Test following next links returns every match once, in order"""
+        for i in range(7):
+            client.post("/api/posts/", json={"title": f"Extra {i}", "content": "Body", "user_id": 2})
+        expected = [post["id"] for post in client.get(f"/api/posts/?user_id=2&sort={sort}").get_json()]
+        assert len(expected) == 8
+
+        seen = []
+        url = f"/api/posts/?user_id=2&sort={sort}&limit=3"
+        while url:
+            response = client.get(url)
+            seen += [post["id"] for post in response.get_json()]
+            link = response.headers.get("Link")
+            url = link.split(">")[0].lstrip("<") if link else None
+        assert seen == expected
+
+    def test_explain(self, client):
+        """Test the explain flag reports the index that answered"""
+        response = client.get("/api/posts/?user_id=1&explain=1")
+        plan = response.headers["X-Query-Plan"]
+        assert "user_id" in plan
+        assert "X-Query-Plan" not in client.get("/api/posts/?user_id=1").headers
+
+    @pytest.mark.parametrize("query", [
+        "user_id=abc", "user_id=", "min_id=-1", "max_id=x", "title_prefix=%20",
+        "sort=content", "user_id=1&limit=0", "user_id=" + ",".join(["1"] * 101),
+    ])
+    def test_invalid_parameters(self, client, query):
+        """Test malformed filters are refused"""
+        assert client.get(f"/api/posts/?{query}").status_code == 400
+
+    def test_filters_do_not_scan(self, client, monkeypatch):
+        """Test filtered listings never load the whole collection"""
+        def fail(*args, **kwargs):
+            raise AssertionError("full list loaded")
+        monkeypatch.setattr("data_store.DataStore.get_all_posts", fail)
+        monkeypatch.setattr("sqlite_store.SQLiteDataStore.get_all_posts", fail)
+        assert client.get("/api/posts/?user_id=1").status_code == 200
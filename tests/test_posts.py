@@ -1,4 +1,5 @@
 from data_store import data_store
+from schemas import posts_schema
 import pytest
 import json
 import sys
@@ -246,3 +247,57 @@ class TestPostsEndpoints:
         data = json.loads(response.data)
         assert isinstance(data, list)
         assert len(data) == 0
+
+    def test_get_posts_paginated(self, client):
+        """Test GET /api/posts with limit follows the next cursor to the end"""
+        response = client.get('/api/posts/?limit=2')
+        assert response.status_code == 200
+        assert [p['id'] for p in json.loads(response.data)] == [1, 2]
+
+        link = response.headers['Link']
+        assert link.endswith('; rel="next"')
+        next_url = link[1:link.index('>')]
+
+        response = client.get(next_url)
+        assert [p['id'] for p in json.loads(response.data)] == [3]
+        assert 'Link' not in response.headers
+
+    def test_get_posts_by_user_paginated(self, client):
+        """Test GET /api/posts/user/<user_id> supports keyset pagination"""
+        response = client.get('/api/posts/user/1?limit=1')
+        assert [p['id'] for p in json.loads(response.data)] == [1]
+
+        link = response.headers['Link']
+        response = client.get(link[1:link.index('>')])
+        assert [p['id'] for p in json.loads(response.data)] == [3]
+        assert 'Link' not in response.headers
+
+    def test_get_posts_invalid_pagination(self, client):
+        """Test invalid limit or cursor values return 400"""
+        for query in ('limit=0', 'limit=abc', 'limit=5000', 'after=!!!'):
+            response = client.get(f'/api/posts/?{query}')
+            assert response.status_code == 400
+            assert 'error' in json.loads(response.data)
+
+    def test_get_posts_streamed(self, client):
+        """Test GET /api/posts?stream=true returns the same array incrementally"""
+        expected = json.loads(client.get('/api/posts/').data)
+
+        response = client.get('/api/posts/?stream=true')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.data) == expected
+
+        response = client.get('/api/posts/user/1?stream=1')
+        assert [p['id'] for p in json.loads(response.data)] == [1, 3]
+
+    def test_get_posts_same_body_without_json_cache(self, client, monkeypatch):
+        """Test cached fragments produce the same body as a fresh schema dump"""
+        cached = client.get('/api/posts/').data
+
+        monkeypatch.setitem(client.application.config, 'ENTITY_JSON_CACHE', False)
+        uncached = client.get('/api/posts/').data
+
+        assert cached == uncached
+        assert json.loads(cached) == posts_schema.dump(data_store.get_all_posts())
@@ -0,0 +1,83 @@
+from response_cache import ResponseCache, ENTRY_OVERHEAD, response_cache
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def key(path, version, collection="posts"):
+    """Build a cache key for a query-less request"""
+    return (collection, path, (), version)
+
+
+class TestResponseCache:
+    """Test cases for the LRU response cache itself"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the byte budget evicts the coldest entry first"""
+        cache = ResponseCache(3 * (100 + ENTRY_OVERHEAD))
+        for path in ("/a", "/b", "/c"):
+            cache.put(key(path, 1), b"x" * 100, [])
+        cache.get(key("/a", 1))
+        cache.put(key("/d", 1), b"x" * 100, [])
+
+        assert cache.get(key("/b", 1)) is None
+        assert cache.get(key("/a", 1)) is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    def test_newer_version_drops_older_entries(self):
+        """Test caching a new collection version invalidates only that collection"""
+        cache = ResponseCache(1 << 20)
+        cache.put(key("/a", 1), b"old", [])
+        cache.put(key("/u", 1, "users"), b"users", [])
+        cache.put(key("/b", 2), b"new", [])
+
+        assert cache.stats()["entries"] == 2
+        assert cache.get(key("/u", 1, "users")) is not None
+        # A slow request that read the old version does not bring it back
+        cache.put(key("/a", 1), b"old", [])
+        assert cache.get(key("/a", 1)) is None
+
+    def test_oversized_responses_are_not_cached(self):
+        """Test a body larger than the whole budget is skipped"""
+        cache = ResponseCache(1000)
+        cache.put(key("/a", 1), b"x" * 1000, [])
+        assert cache.stats()["entries"] == 0
+
+
+class TestCachedEndpoints:
+    """Test cases for list endpoints served through the cache"""
+
+    @pytest.mark.parametrize("url", ["/api/users/", "/api/posts/", "/api/posts/?limit=1",
+                                     "/api/posts/user/1"])
+    def test_repeated_request_hits(self, client, url):
+        """Test the second identical request is served from the cache"""
+        first = client.get(url)
+        second = client.get(url)
+        assert second.data == first.data
+        assert second.headers.get("Link") == first.headers.get("Link")
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert response_cache.stats()["hits"] == 1
+        assert response_cache.stats()["misses"] == 1
+
+    def test_mutation_invalidates(self, client):
+        """Test a write is visible on the next list request"""
+        client.get("/api/posts/")
+        client.put("/api/posts/1", json={"title": "Changed"})
+        titles = [post["title"] for post in client.get("/api/posts/").get_json()]
+        assert "Changed" in titles
+        assert response_cache.stats()["entries"] == 1
+
+    def test_streams_are_not_cached(self, client):
+        """Test streamed responses bypass the cache"""
+        assert client.get("/api/posts/?stream=true").data
+        assert response_cache.stats()["entries"] == 0
+
+    def test_stats_endpoint(self, client):
+        """Test the counters are exposed over HTTP"""
+        client.get("/api/users/")
+        client.get("/api/users/")
+        stats = client.get("/api/cache/stats").get_json()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"] == 1 and 0 < stats["bytes"] <= stats["max_bytes"]
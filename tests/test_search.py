@@ -0,0 +1,163 @@
+from data_store import DataStore
+from models.post import Post
+from search import SearchIndex, tokenize
+from storage import SearchUnavailable
+import search
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _ids(posts):
+    return [post.id for post in posts]
+
+
+class TestSearchIndex:
+    """Test cases for the in-memory inverted index"""
+
+    @pytest.fixture(params=["numpy", "python"])
+    def index(self, request, monkeypatch):
+        """An index searched with and without NumPy"""
+        if request.param == "python":
+            monkeypatch.setattr(search, "numpy", None)
+        elif search.numpy is None:
+            pytest.skip("NumPy is not installed")
+        return SearchIndex()
+
+    @staticmethod
+    def _post(post_id, title, content):
+        return Post(id=post_id, title=title, content=content, user_id=1)
+
+    def test_tokenize(self):
+        """Test terms are lowercase words without punctuation"""
+        assert tokenize("Hello, World! it's 2024") == ["hello", "world", "it", "s", "2024"]
+
+    def test_and_semantics_and_ranking(self, index):
+        """Test every term must match and title matches rank first"""
+        index.add(self._post(1, "Cooking", "pasta recipes for dinner"))
+        index.add(self._post(2, "Pasta", "cooking fresh pasta, more pasta at home"))
+        index.add(self._post(3, "Travel", "pasta in Rome"))
+        assert index.search("pasta cooking") == ([2, 1], 2)
+        assert index.search("PASTA") == ([2, 1, 3], 3)
+        assert index.search("pasta sushi") == ([], 0)
+        assert index.search("!!!") == ([], 0)
+
+    def test_ties_are_in_id_order_across_pages(self, index):
+        """Test equal scores are ordered by id, so pages never overlap"""
+        for post_id in range(1, 51):
+            index.add(self._post(post_id, "Same", "same words"))
+        pages = [index.search("same", offset, 7)[0] for offset in range(0, 50, 7)]
+        assert sum(pages, []) == list(range(1, 51))
+
+    def test_update_and_remove(self, index):
+        """Test changed and removed posts stop matching their old terms"""
+        old = self._post(1, "Old title", "shared body")
+        new = self._post(1, "New title", "shared body")
+        index.add(old)
+        index.add(self._post(2, "Other", "shared body"))
+        index.update(old, new)
+        assert index.search("old") == ([], 0)
+        assert index.search("new shared") == ([1], 1)
+        index.remove_many([new, self._post(2, "Other", "shared body")])
+        assert index.search("shared") == ([], 0)
+        assert len(index) == 0
+
+
+class TestStoreSearch:
+    """Test cases for search kept in step with store writes"""
+
+    def test_writes_update_results(self, storage):
+        """Test creates, updates and deletes are searchable immediately"""
+        post = storage.create_post("Zebra sighting", "Stripes everywhere", 1)
+        assert _ids(storage.search_posts("zebra")[0]) == [post.id]
+
+        storage.update_post(post.id, title="Lion sighting")
+        assert storage.search_posts("zebra") == ([], 0)
+        assert _ids(storage.search_posts("lion stripes")[0]) == [post.id]
+
+        storage.update_posts(by_user=1, content="Rewritten")
+        assert storage.search_posts("stripes") == ([], 0)
+        assert storage.search_posts("rewritten")[1] == 3
+
+        storage.delete_post(post.id)
+        assert storage.search_posts("lion") == ([], 0)
+        storage.delete_user(1)
+        assert storage.search_posts("rewritten") == ([], 0)
+        assert storage.search_posts("second")[1] == 1
+
+    def test_pages(self, storage):
+        """Test offsets page through the ranked matches"""
+        storage.create_posts([(f"Note {i}", "common text", 2) for i in range(10)])
+        everything, total = storage.search_posts("common")
+        assert total == 10
+        assert _ids(storage.search_posts("common", 4, 4)[0]) == _ids(everything[4:8])
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_index_survives_restart(self, post_storage, tmp_path):
+        """Test the index is rebuilt lazily from a snapshot, the log and later writes"""
+        wal_path = str(tmp_path / "store.wal")
+        snap_path = str(tmp_path / "store.snap")
+        store = DataStore(post_storage=post_storage, wal_path=wal_path, snapshot_path=snap_path)
+        store.create_post("Before snapshot", "alpha", 1)
+        store.save_snapshot()
+        store.create_post("After snapshot", "alpha", 2)
+        store.close()
+
+        restored = DataStore(post_storage=post_storage, wal_path=wal_path, snapshot_path=snap_path)
+        # Startup leaves the index to the first search
+        assert restored._search is None
+        restored.create_post("Later", "alpha", 2)
+        assert restored.search_posts("alpha")[1] == 3
+        restored.create_post("Latest", "alpha", 2)
+        assert restored.search_posts("alpha")[1] == 4
+        assert restored.search_posts("snapshot before")[1] == 1
+        restored.close()
+
+    def test_disabled_index(self):
+        """Test a store built without the index refuses to search"""
+        with pytest.raises(SearchUnavailable):
+            DataStore(search_index=False).search_posts("post")
+
+
+class TestSearchEndpoint:
+    """Test cases for GET /api/posts/search"""
+
+    def test_results(self, client):
+        """Test matches are returned best first with their total"""
+        client.post("/api/posts/", json={"title": "Gardening", "content": "Tomato tips", "user_id": 1})
+        client.post("/api/posts/", json={"title": "Tomato soup", "content": "Tomato recipe", "user_id": 2})
+        response = client.get("/api/posts/search?q=tomato")
+        assert response.status_code == 200
+        assert [post["title"] for post in response.get_json()] == ["Tomato soup", "Gardening"]
+        assert response.headers["X-Total-Count"] == "2"
+        assert response.headers["ETag"]
+
+    def test_next_link_pages_by_position(self, client):
+        """Test the next link continues the ranking where the page ended"""
+        response = client.get("/api/posts/search?q=post&limit=2")
+        assert len(response.get_json()) == 2
+        next_url = response.headers["Link"].split(">")[0].lstrip("<")
+        last = client.get(next_url)
+        assert len(last.get_json()) == 1 and "Link" not in last.headers
+        assert {post["id"] for post in response.get_json() + last.get_json()} == {1, 2, 3}
+
+    def test_requires_query(self, client):
+        """Test an empty or missing query is refused"""
+        assert client.get("/api/posts/search").status_code == 400
+        assert client.get("/api/posts/search?q=%20").status_code == 400
+        assert client.get("/api/posts/search?q=post&limit=0").status_code == 400
+
+    def test_sees_writes(self, client):
+        """Test cached results are replaced once posts change"""
+        assert client.get("/api/posts/search?q=walrus").get_json() == []
+        client.post("/api/posts/", json={"title": "Walrus", "content": "Tusks", "user_id": 1})
+        assert len(client.get("/api/posts/search?q=walrus").get_json()) == 1
+
+    def test_disabled_index(self, client, monkeypatch):
+        """Test searching a store without an index answers 503"""
+        import data_store as data_store_module
+        if not isinstance(data_store_module.data_store, DataStore):
+            pytest.skip("memory backend only")
+        monkeypatch.setattr(data_store_module.data_store, "_search_enabled", False)
+        assert client.get("/api/posts/search?q=post").status_code == 503
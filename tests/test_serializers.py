@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from models.post import Post
+from models.user import User
+from schemas import post_schema, user_schema, PostSchema
+from serializers import compile_dumper, dump_many, get_dumper
+from marshmallow import Schema, fields, post_dump
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestCompiledDumper:
+    """Test cases for the compiled schema dumpers"""
+
+    def test_matches_marshmallow_for_users(self):
+        """Test compiled UserSchema dump matches marshmallow output"""
+        dump = compile_dumper(user_schema)
+        users = [
+            User(id=1, name="John Doe", email="john@example.com"),
+            User(id=2, name="Zoë Ünïcode", email="zoe@example.com"),
+            User(id=None, name=None, email=None),
+        ]
+        for user in users:
+            assert dump(user) == user_schema.dump(user)
+
+    def test_matches_marshmallow_for_posts(self):
+        """Test compiled PostSchema dump matches marshmallow output"""
+        dump = compile_dumper(post_schema)
+        posts = [
+            Post(id=1, title="Title", content="Content", user_id=1),
+            Post(id="7", title=b"bytes title", content=42, user_id=3.0),
+            SimpleNamespace(id=5, title="Missing content and user"),
+            {"id": 9, "title": "dict", "content": "input", "user_id": 2},
+        ]
+        for post in posts:
+            result = dump(post)
+            assert result == post_schema.dump(post)
+            assert list(result) == list(post_schema.dump(post))
+
+    def test_dump_many(self):
+        """Test dump_many matches marshmallow's many=True output"""
+        posts = [Post(id=i, title=f"T{i}", content="C", user_id=1)
+                 for i in range(1, 20)]
+        assert dump_many(post_schema, posts) == PostSchema(
+            many=True).dump(posts)
+
+    def test_get_dumper_is_cached(self):
+        """Test dumpers are compiled once per schema instance"""
+        assert get_dumper(post_schema) is get_dumper(post_schema)
+
+    def test_falls_back_for_unsupported_schemas(self):
+        """Test schemas with unknown fields or hooks use Schema.dump"""
+        class HookedSchema(Schema):
+            name = fields.String()
+
+            @post_dump
+            def shout(self, data, **kwargs):
+                return {"name": data["name"].upper()}
+
+        class NestedSchema(Schema):
+            tags = fields.List(fields.String())
+
+        hooked = HookedSchema()
+        nested = NestedSchema()
+        assert compile_dumper(hooked) == hooked.dump
+        assert compile_dumper(nested) == nested.dump
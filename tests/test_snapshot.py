@@ -0,0 +1,141 @@
+from data_store import DataStore
+from snapshot import read_snapshot
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_forked(work):
+    """Run `work` in a forked child and return its exit code (0 if it returned true)"""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = 0 if work() else 1
+        finally:
+            os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+def contents(store):
+    """Return the full contents of a store as plain data"""
+    return ([user.to_dict() for user in store.get_all_users()],
+            [post.to_dict() for post in store.get_all_posts()])
+
+
+class TestSnapshot:
+    """Test cases for binary snapshots"""
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_restore_round_trip(self, tmp_path, post_storage):
+        """Test a restored store matches the one that wrote the snapshot"""
+        path = str(tmp_path / "store.snap")
+        store = DataStore(post_storage=post_storage)
+        user = store.create_user("Zoë Ünïcode", "zoe@example.com")
+        store.create_post("Ⅰ título", "Contenu — ünïcode", user.id)
+        store.delete_post(2)
+        store.save_snapshot(path)
+
+        restored = DataStore(post_storage=post_storage, snapshot_path=path)
+        assert contents(restored) == contents(store)
+        assert restored.get_user_by_email("ZOE@example.com").id == user.id
+        assert [p.id for p in restored.get_posts_by_user(1)] == [1, 3]
+
+    def test_restored_columnar_store_accepts_writes(self, tmp_path):
+        """Test mutations on top of a memory-mapped snapshot"""
+        path = str(tmp_path / "store.snap")
+        DataStore().save_snapshot(path)
+
+        store = DataStore(post_storage="columnar", snapshot_path=path)
+        store.update_post(1, title="Changed")
+        store.delete_post(2)
+        post = store.create_post("New", "Post", 2)
+        assert post.id == 4
+        assert [(p.id, p.title) for p in store.get_all_posts()] == [
+            (1, "Changed"), (3, "Third Post"), (4, "New")]
+
+    def test_id_counters_are_stored(self, tmp_path):
+        """Test ids freed by deleting the newest records are not reused"""
+        path = str(tmp_path / "store.snap")
+        store = DataStore()
+        store.delete_user(2)
+        store.save_snapshot(path)
+
+        snapshot = read_snapshot(path)
+        assert (snapshot.next_user_id, snapshot.next_post_id) == (3, 4)
+        restored = DataStore(snapshot_path=path)
+        assert restored.create_user("Next", "next@example.com").id == 3
+
+    def test_snapshot_truncates_log(self, tmp_path):
+        """Test the log only replays mutations made after the snapshot"""
+        snap_path = str(tmp_path / "store.snap")
+        wal_path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=wal_path, snapshot_path=snap_path)
+        store.create_user("Before", "before@example.com")
+        store.save_snapshot()
+        assert os.path.getsize(wal_path) == 0
+        store.create_user("After", "after@example.com")
+        expected = contents(store)
+        store.close()
+
+        restored = DataStore(wal_path=wal_path, snapshot_path=snap_path)
+        assert contents(restored) == expected
+        restored.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test restoring from a file that is not a snapshot"""
+        path = tmp_path / "store.snap"
+        path.write_bytes(b"\0" * 64)
+        with pytest.raises(ValueError):
+            DataStore(snapshot_path=str(path))
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_versions_are_stored(self, tmp_path, post_storage):
+        """Test record versions, collection versions and the clock survive"""
+        path = str(tmp_path / "store.snap")
+        store = DataStore(post_storage=post_storage)
+        store.update_post(2, title="Edited")
+        store.delete_user(1)
+        store.save_snapshot(path)
+
+        restored = DataStore(post_storage=post_storage, snapshot_path=path)
+        assert restored.get_post(2).version == store.get_post(2).version
+        assert restored.get_users_version() == store.get_users_version()
+        assert restored.get_posts_version() == store.get_posts_version()
+        assert restored.create_user("Next", "next@example.com").version > store.get_posts_version()
+
+
+class TestSnapshotAtExit:
+    """Test which processes save the snapshot as they exit"""
+
+    def test_unchanged_store_is_not_saved(self, tmp_path):
+        """Test a process that only read leaves the snapshot alone"""
+        path = str(tmp_path / "store.snap")
+        store = DataStore(snapshot_path=path)
+        store.get_all_users()
+        store.save_snapshot_at_exit()
+        assert not os.path.exists(path)
+        store.create_user("New", "new@example.com")
+        store.save_snapshot_at_exit()
+        assert [u.name for u in DataStore(snapshot_path=path).get_all_users()][-1] == "New"
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    @pytest.mark.parametrize("lazy", [True, False])
+    def test_parent_never_overwrites_a_worker_snapshot(self, tmp_path, lazy):
+        """Test the preloading parent does not save its stale copy over a worker's"""
+        path = str(tmp_path / "store.snap")
+        master = DataStore(snapshot_path=path, lazy=lazy)
+        if not lazy:
+            # A parent with changes of its own that a worker has since superseded
+            master.create_user("Master", "master@example.com")
+
+        def worker():
+            master.create_user("Worker", "worker@example.com")
+            master.save_snapshot_at_exit()
+            return True
+
+        assert run_forked(worker) == 0
+        master.save_snapshot_at_exit()
+        names = [u.name for u in DataStore(snapshot_path=path).get_all_users()]
+        assert names == ["John Doe", "Jane Smith", "Worker"]
@@ -0,0 +1,91 @@
+from sqlite_store import SQLiteDataStore
+from storage import Storage, create_storage
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import multiprocessing
+import sqlite3
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def create_users(path, prefix, count):
+    """Create users through a store opened in another process"""
+    store = SQLiteDataStore(path)
+    for i in range(count):
+        store.create_user(f"{prefix} {i}", f"{prefix}{i}@example.com")
+    store.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a fresh database file"""
+    return str(tmp_path / "store.sqlite3")
+
+
+class TestSQLiteDataStore:
+    """Test cases for the SQLite-backed data store"""
+
+    def test_new_database_gets_sample_data_once(self, db_path):
+        """Test sample data is loaded only when the file is created"""
+        store = SQLiteDataStore(db_path)
+        store.delete_user(2)
+        reopened = SQLiteDataStore(db_path)
+        assert [u.id for u in reopened.get_all_users()] == [1]
+        assert [p.id for p in reopened.get_all_posts()] == [1, 3]
+
+    def test_stores_share_one_dataset(self, db_path):
+        """Test writes through one store are visible through another"""
+        first = SQLiteDataStore(db_path)
+        second = SQLiteDataStore(db_path)
+        user = first.create_user("Shared", "shared@example.com")
+        assert second.get_user_by_email("SHARED@example.com").id == user.id
+        assert second.create_user("Dup", "shared@example.com") is None
+
+    def test_worker_processes_share_writes(self, db_path):
+        """Test concurrent processes allocate unique ids in one dataset"""
+        SQLiteDataStore(db_path).clear()
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=create_users, args=(db_path, f"w{n}", 25))
+                   for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        users = SQLiteDataStore(db_path).get_all_users()
+        assert [u.id for u in users] == list(range(1, 101))
+
+    def test_connections_are_per_thread(self, db_path):
+        """Test threads sharing a store each get a working connection"""
+        store = SQLiteDataStore(db_path)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            created = list(pool.map(lambda i: store.create_post(
+                f"Post {i}", "Content", 1), range(80)))
+        assert len({post.id for post in created}) == 80
+        assert store.count_posts_by_user(1) == 82
+
+    def test_pool_closes_every_thread_connection(self, db_path):
+        """Test closing the store closes connections opened by other threads"""
+        store = SQLiteDataStore(db_path)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: store.get_user(1), range(16)))
+        connections = list(store._pool._connections)
+        store.close()
+
+        assert connections
+        for conn in connections:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        assert store.get_user(1).name == "John Doe"
+
+    def test_create_storage_selects_backend(self, db_path):
+        """Test the configured backend name picks the implementation"""
+        config = SimpleNamespace(DATA_STORE_BACKEND="sqlite", DATA_STORE_SQLITE_PATH=db_path)
+        store = create_storage(config)
+        assert isinstance(store, SQLiteDataStore) and isinstance(store, Storage)
+
+        config.DATA_STORE_BACKEND = "cassandra"
+        with pytest.raises(ValueError):
+            create_storage(config)
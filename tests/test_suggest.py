@@ -0,0 +1,128 @@
+from prefix_index import PrefixIndex
+import prefix_index
+import random
+from sqlite_store import SQLiteDataStore
+import sqlite3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _names(users):
+    return [user.name for user in users]
+
+
+class TestPrefixIndex:
+    """Test cases for the sorted prefix index"""
+
+    def test_match_in_key_order(self):
+        """Test matches come back in key order, limited and without duplicates"""
+        index = PrefixIndex()
+        for key, item_id in [("bob", 2), ("alice", 1), ("alicia", 3), ("al@example.com", 3),
+                             ("carol", 4)]:
+            index.add(key, item_id)
+        assert index.match("al", 10) == [3, 1]
+        assert index.match("al", 1) == [3]
+        assert index.match("ali", 10) == [1, 3]
+        assert index.match("z", 10) == []
+
+    def test_remove(self):
+        """Test removed entries stop matching"""
+        index = PrefixIndex()
+        index.add("alice", 1)
+        index.add("alice", 2)
+        index.remove("alice", 1)
+        assert index.match("a", 10) == [2]
+        assert len(index) == 1
+
+    def test_matches_span_buckets(self, monkeypatch):
+        """Test lookups walk across bucket boundaries after splits and removals"""
+        monkeypatch.setattr(prefix_index, "BUCKET_SIZE", 4)
+        rng = random.Random(1)
+        index = PrefixIndex()
+        entries = []
+        for item_id in range(2000):
+            entry = ("".join(rng.choices("abc", k=rng.randint(1, 5))), item_id)
+            index.add(*entry)
+            entries.append(entry)
+            if rng.random() < 0.3:
+                index.remove(*entries.pop(rng.randrange(len(entries))))
+        entries.sort()
+        assert len(index) == len(entries)
+        for prefix in ["", "a", "ab", "cab"]:
+            expected = [item_id for key, item_id in entries if key.startswith(prefix)]
+            assert index.match(prefix, 10**6) == expected
+            assert index.match(prefix, 7) == expected[:7]
+            reversed_entries = [entry for entry in entries if entry[0].startswith(prefix)][::-1]
+            assert list(index.iter_prefix(prefix, reverse=True)) == reversed_entries
+
+
+class TestStoreSuggest:
+    """Test cases for user suggestions kept in step with store writes"""
+
+    def test_matches_names_and_emails(self, storage):
+        """Test prefixes match names and emails case-insensitively"""
+        storage.create_user("Johanna Berg", "berg@example.com")
+        assert _names(storage.suggest_users("JO")) == ["Johanna Berg", "John Doe"]
+        assert _names(storage.suggest_users("jane@")) == ["Jane Smith"]
+        assert _names(storage.suggest_users("be")) == ["Johanna Berg"]
+        assert _names(storage.suggest_users("john ")) == ["John Doe"]
+        assert _names(storage.suggest_users("j", limit=1)) == ["Jane Smith"]
+        assert storage.suggest_users("x") == []
+
+    def test_user_matching_twice_is_listed_once(self, storage):
+        """Test a user whose name and email both match appears once"""
+        storage.create_user("Kim", "kim@example.com")
+        assert _names(storage.suggest_users("ki")) == ["Kim"]
+
+    def test_writes_update_suggestions(self, storage):
+        """Test renames, email changes and deletes show up immediately"""
+        storage.update_user(1, name="Zed Doe")
+        assert _names(storage.suggest_users("john")) == ["Zed Doe"]
+        assert _names(storage.suggest_users("zed")) == ["Zed Doe"]
+        storage.update_user(1, email="zz@example.com")
+        assert storage.suggest_users("john") == []
+        storage.delete_user(1)
+        assert storage.suggest_users("z") == []
+        storage.clear()
+        assert storage.suggest_users("jane") == []
+
+    def test_sqlite_backfills_name_keys(self, tmp_path):
+        """Test a database created before name keys existed gets them on open"""
+        path = str(tmp_path / "old.sqlite3")
+        SQLiteDataStore(path).close()
+        with sqlite3.connect(path) as conn:
+            conn.execute("DROP INDEX users_name_key")
+            conn.execute("ALTER TABLE users DROP COLUMN name_key")
+        store = SQLiteDataStore(path)
+        assert _names(store.suggest_users("john")) == ["John Doe"]
+        store.close()
+
+
+class TestSuggestEndpoint:
+    """Test cases for GET /api/users/suggest"""
+
+    def test_suggest(self, client):
+        """Test suggestions are returned as user objects"""
+        response = client.get("/api/users/suggest?q=ja")
+        assert response.status_code == 200
+        assert response.get_json() == [{"id": 2, "name": "Jane Smith", "email": "jane@example.com"}]
+        assert response.headers["ETag"]
+
+    def test_limit(self, client):
+        """Test the limit caps the suggestions and is validated"""
+        assert len(client.get("/api/users/suggest?q=j&limit=1").get_json()) == 1
+        assert client.get("/api/users/suggest?q=j&limit=0").status_code == 400
+        assert client.get("/api/users/suggest?q=j&limit=101").status_code == 400
+        assert client.get("/api/users/suggest?q=j&limit=ten").status_code == 400
+
+    def test_requires_query(self, client):
+        """Test a missing or blank query is refused"""
+        assert client.get("/api/users/suggest").status_code == 400
+        assert client.get("/api/users/suggest?q=%20").status_code == 400
+
+    def test_sees_writes(self, client):
+        """Test cached suggestions are replaced once users change"""
+        assert client.get("/api/users/suggest?q=quinn").get_json() == []
+        client.post("/api/users/", json={"name": "Quinn", "email": "q@example.com"})
+        assert len(client.get("/api/users/suggest?q=quinn").get_json()) == 1
@@ -20,6 +20,20 @@ class TestUsersEndpoints:
         assert data[0]['name'] == "John Doe"
         assert data[1]['name'] == "Jane Smith"
 
+    def test_get_users_paginated(self, client):
+        """Test GET /api/users with limit returns a page and a next link"""
+        response = client.get('/api/users/?limit=1')
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert [user['id'] for user in data] == [1]
+        link = response.headers['Link']
+
+        response = client.get(link[1:link.index('>')])
+        data = json.loads(response.data)
+        assert [user['id'] for user in data] == [2]
+        assert 'Link' not in response.headers
+
     def test_get_user_success(self, client):
         """Test GET /api/users/<id> returns specific user"""
         response = client.get('/api/users/1')
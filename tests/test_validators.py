@@ -0,0 +1,138 @@
+from schemas import post_schema, post_update_schema, user_schema, user_update_schema
+from validators import CompiledLoader, load
+from marshmallow import ValidationError
+import itertools
+import json
+import pytest
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STRING_VALUES = [None, "", "   ", "Valid text", b"bytes", b"\xff", 42, True, ["x"], {"a": 1}]
+EMAIL_VALUES = [None, "", "not-an-email", "new@example.com", "JOHN@example.com",
+                "jane@example.com", 7]
+USER_ID_VALUES = [None, 1, 2, 999, "1", "abc", 1.9, True, float("inf"), [1]]
+
+
+def outcome(loader, data, context=None):
+    """Return the loaded data or the error messages of a load call"""
+    try:
+        return "ok", loader(data, context)
+    except ValidationError as err:
+        return "error", err.messages
+
+
+def marshmallow_loader(schema):
+    """Wrap Schema.load with the same signature as CompiledLoader.load"""
+    def load(data, context=None):
+        schema.context = context or {}
+        return schema.load(data)
+    return load
+
+
+def payloads(keys_and_values):
+    """Build payloads combining present/absent keys and candidate values"""
+    keys = list(keys_and_values)
+    for present in itertools.product([False, True], repeat=len(keys)):
+        chosen = [keys_and_values[k] if p else [None] for k, p in zip(keys, present)]
+        for values in itertools.islice(itertools.product(*chosen), 60):
+            yield {k: v for k, v, p in zip(keys, values, present) if p}
+
+
+class TestCompiledLoader:
+    """Test the compiled validators against marshmallow's Schema.load"""
+
+    @pytest.mark.parametrize("schema, keys_and_values, context", [
+        (user_schema, {"name": STRING_VALUES, "email": EMAIL_VALUES}, None),
+        (user_update_schema, {"name": STRING_VALUES, "email": EMAIL_VALUES},
+         {"current_user_id": 1}),
+        (post_schema, {"title": STRING_VALUES, "content": STRING_VALUES,
+                       "user_id": USER_ID_VALUES}, None),
+        (post_update_schema, {"title": STRING_VALUES, "content": STRING_VALUES,
+                              "user_id": USER_ID_VALUES}, None),
+    ])
+    def test_matches_marshmallow(self, schema, keys_and_values, context):
+        """Test compiled loads return the same data or the same errors"""
+        compiled = CompiledLoader(schema).load
+        reference = marshmallow_loader(schema)
+        for data in payloads(keys_and_values):
+            assert outcome(compiled, data, context) == outcome(
+                reference, data, context), data
+
+    def test_unknown_fields_and_bad_input_type(self):
+        """Test unknown/dump-only keys and non-dict payloads are rejected alike"""
+        compiled = CompiledLoader(user_schema).load
+        reference = marshmallow_loader(user_schema)
+        for data in ({"id": 5, "name": "A", "email": "a@example.com", "extra": 1},
+                     [{"name": "A"}], "text", 3):
+            assert outcome(compiled, data) == outcome(reference, data)
+
+
+class TestCompiledValidatorRoutes:
+    """Test routes with VALIDATOR_BACKEND set to compiled"""
+
+    @pytest.fixture(autouse=True)
+    def compiled_backend(self, client):
+        client.application.config['VALIDATOR_BACKEND'] = 'compiled'
+        yield
+        client.application.config['VALIDATOR_BACKEND'] = 'marshmallow'
+
+    def test_create_user_duplicate_email_returns_409(self, client):
+        """Test duplicate emails still map to 409"""
+        response = client.post('/api/users/', json={"name": "John",
+                                                    "email": "john@example.com"})
+        assert response.status_code == 409
+
+    def test_update_user_keeps_own_email(self, client):
+        """Test the current_user_id context is honored"""
+        response = client.put('/api/users/1', json={"email": "john@example.com"})
+        assert response.status_code == 200
+
+    def test_create_post_unknown_user_returns_404(self, client):
+        """Test unknown user_id still maps to 404"""
+        response = client.post('/api/posts/', json={"title": "T", "content": "C",
+                                                    "user_id": 999})
+        assert response.status_code == 404
+
+    def test_create_post_validation_details(self, client):
+        """Test validation failures return the marshmallow details"""
+        response = client.post('/api/posts/', json={"title": " ", "user_id": "x"})
+        assert response.status_code == 400
+        assert json.loads(response.data)["details"] == {
+            "title": ["Title cannot be empty or just whitespace."],
+            "content": ["Missing data for required field."],
+            "user_id": ["Not a valid integer."],
+        }
+
+
+class TestSchemaContext:
+    """Test the marshmallow backend never mutates the shared schemas"""
+
+    def test_load_leaves_shared_schema_context(self, client):
+        """Test a load with a context does not assign it to the shared schema"""
+        before = dict(user_update_schema.context)
+        with client.application.app_context():
+            assert load(user_update_schema, {"email": "john@example.com"},
+                        {"current_user_id": 1}) == {"email": "john@example.com"}
+        assert user_update_schema.context == before
+
+    def test_concurrent_updates_keep_own_email(self, client):
+        """Test users resubmitting their own email in parallel never get 409"""
+        app = client.application
+        emails = {1: "john@example.com", 2: "jane@example.com"}
+        statuses = []
+
+        def update(user_id):
+            test_client = app.test_client()
+            for _ in range(50):
+                statuses.append(test_client.put(
+                    f'/api/users/{user_id}', json={"email": emails[user_id]}).status_code)
+
+        threads = [threading.Thread(target=update, args=(user_id,))
+                   for user_id in (1, 2, 1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert set(statuses) == {200}
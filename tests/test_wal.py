@@ -0,0 +1,272 @@
+from config import Config
+from data_store import DataStore
+from storage import create_storage
+from wal import LogFailed, LogLocked, WriteAheadLog, read_log
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_forked(work):
+    """Run `work` in a forked child and return its exit code (0 if it returned true)"""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = 0 if work() else 1
+        finally:
+            os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+def snapshot(store):
+    """Return the full contents of a store as plain data"""
+    return ([user.to_dict() for user in store.get_all_users()],
+            [post.to_dict() for post in store.get_all_posts()])
+
+
+class TestWriteAheadLog:
+    """Test cases for the write-ahead log"""
+
+    @pytest.mark.parametrize("sync", ["always", "batch", "none"])
+    def test_replay_rebuilds_store(self, tmp_path, sync):
+        """Test replaying the log reproduces every mutation"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path, wal_sync=sync)
+        user = store.create_user("Logged User", "logged@example.com")
+        post = store.create_post("Logged", "Post", user.id)
+        store.update_user(1, email="johnny@example.com")
+        store.update_post(post.id, user_id=2)
+        store.delete_post(2)
+        store.delete_user(1)
+        expected = snapshot(store)
+        store.close()
+
+        restored = DataStore(wal_path=path)
+        assert snapshot(restored) == expected
+        assert restored.get_user_by_email("johnny@example.com") is None
+        assert [p.id for p in restored.get_posts_by_user(2)] == [post.id]
+        restored.close()
+
+    def test_ids_are_not_reused_after_restart(self, tmp_path):
+        """Test id counters survive deleting the newest records"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+        user = store.create_user("Temp", "temp@example.com")
+        store.delete_user(user.id)
+        store.close()
+
+        restored = DataStore(wal_path=path)
+        assert restored.create_user("Next", "next@example.com").id == user.id + 1
+        restored.close()
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """Test a partially written final record is skipped on replay"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+        store.create_user("Kept", "kept@example.com")
+        store.close()
+        with open(path, "ab") as log_file:
+            log_file.write(b'{"op":"create_user","user":{"id":9')
+
+        restored = DataStore(wal_path=path)
+        assert [u.name for u in restored.get_all_users()][-1] == "Kept"
+        restored.close()
+
+    def test_writes_after_torn_tail_survive_restart(self, tmp_path):
+        """Test recovery cuts off a torn tail so later records are replayed"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+        store.create_user("Kept", "kept@example.com")
+        store.close()
+        with open(path, "ab") as log_file:
+            log_file.write(b'{"op":"create_user","user":{"id":9')
+
+        store = DataStore(wal_path=path)
+        user = store.create_user("After", "after@example.com")
+        post = store.create_post("After", "Post", user.id)
+        expected = snapshot(store)
+        store.close()
+
+        restored = DataStore(wal_path=path)
+        assert snapshot(restored) == expected
+        assert restored.get_post(post.id).user_id == user.id
+        restored.close()
+
+    def test_group_commit_logs_every_writer(self, tmp_path):
+        """Test concurrent writers sharing fsyncs all reach the log"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path, wal_sync="batch")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: store.create_user(
+                f"User {i}", f"user{i}@example.com"), range(200)))
+        store.close()
+
+        records = list(read_log(path))
+        assert sum(r["op"] == "create_user" for r in records) == 202
+
+    def test_failed_fsync_fails_every_waiter(self, tmp_path, monkeypatch):
+        """Test no record of a batch whose fsync failed is reported durable"""
+        log = WriteAheadLog(str(tmp_path / "store.wal"), sync="batch")
+        first = log.append({"op": "clear"})
+        second = log.append({"op": "clear"})
+        syncing = threading.Event()
+        release = threading.Event()
+
+        def failing_fsync(fd):
+            syncing.set()
+            release.wait()
+            raise OSError(5, "Input/output error")
+        monkeypatch.setattr(os, "fsync", failing_fsync)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            flusher = pool.submit(log.commit, first)
+            syncing.wait()
+            waiter = pool.submit(log.commit, second)
+            # Let the waiter block on the batch in flight
+            time.sleep(0.05)
+            release.set()
+            with pytest.raises(OSError):
+                flusher.result()
+            with pytest.raises(LogFailed):
+                waiter.result()
+        with pytest.raises(LogFailed):
+            log.append({"op": "clear"})
+        monkeypatch.undo()
+        with pytest.raises(LogFailed):
+            log.close()
+
+    def test_failed_write_in_always_mode(self, tmp_path, monkeypatch):
+        """Test a failed per-record fsync fails later appends too"""
+        log = WriteAheadLog(str(tmp_path / "store.wal"), sync="always")
+
+        def failing_fsync(fd):
+            raise OSError(28, "No space left on device")
+        monkeypatch.setattr(os, "fsync", failing_fsync)
+        with pytest.raises(OSError):
+            log.append({"op": "clear"})
+        monkeypatch.undo()
+        with pytest.raises(LogFailed):
+            log.append({"op": "clear"})
+        with pytest.raises(LogFailed):
+            log.close()
+
+    def test_unknown_sync_mode(self, tmp_path):
+        """Test an unknown sync mode is rejected"""
+        with pytest.raises(ValueError):
+            WriteAheadLog(str(tmp_path / "store.wal"), sync="sometimes")
+
+    def test_versions_survive_replay(self, tmp_path):
+        """Test record and collection versions are restored from the log"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+        store.update_user(1, name="Renamed")
+        store.delete_post(3)
+        expected = (store.get_user(1).version, store.get_users_version(),
+                    store.get_posts_version())
+        store.close()
+
+        restored = DataStore(wal_path=path)
+        assert (restored.get_user(1).version, restored.get_users_version(),
+                restored.get_posts_version()) == expected
+        assert restored.create_post("Next", "Post", 1).version > max(expected)
+        restored.close()
+
+    def test_batches_replay_whole(self, tmp_path):
+        """Test batch creates are logged as one record and replayed in full"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+        sample_records = len(list(read_log(path)))
+        store.create_users([("A", "a@example.com"), ("B", "b@example.com")])
+        store.create_posts([("T1", "C1", 3), ("T2", "C2", 4)])
+        expected = snapshot(store)
+        store.close()
+
+        assert len(list(read_log(path))) == sample_records + 2
+        restored = DataStore(wal_path=path)
+        assert snapshot(restored) == expected
+        restored.close()
+
+    @pytest.mark.parametrize("post_storage", ["dict", "columnar"])
+    def test_bulk_post_changes_replay(self, tmp_path, post_storage):
+        """Test bulk updates and deletes are replayed with their indexes"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(post_storage=post_storage, wal_path=path)
+        store.update_posts(by_user=1, user_id=2)
+        store.delete_posts([2, 3, 99])
+        expected = snapshot(store)
+        store.close()
+
+        restored = DataStore(post_storage=post_storage, wal_path=path)
+        assert snapshot(restored) == expected
+        assert [p.id for p in restored.get_posts_by_user(2)] == [1]
+        assert restored.get_posts_by_user(1) == []
+        restored.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+class TestForkedWorkers:
+    """Test the log is owned by the process that serves writes, as under gunicorn --preload"""
+
+    @pytest.mark.parametrize("lazy", [True, False])
+    def test_recycled_workers_continue_the_ids(self, tmp_path, lazy):
+        """Test each forked worker loads the log its predecessor left, not the parent's state"""
+        path = str(tmp_path / "store.wal")
+        master = DataStore(wal_path=path, lazy=lazy)
+        if not lazy:
+            # A parent that has loaded the store lets go of the log before forking
+            master.get_all_users()
+            master.close()
+
+        def worker(name):
+            def work():
+                user = master.create_user(name, f"{name}@example.com")
+                master.close()
+                return user is not None
+            return work
+
+        assert run_forked(worker("first")) == 0
+        assert run_forked(worker("second")) == 0
+        restored = DataStore(wal_path=path)
+        assert [(u.id, u.name) for u in restored.get_all_users()][2:] == [(3, "first"), (4, "second")]
+        restored.close()
+
+    def test_second_process_is_refused(self, tmp_path):
+        """Test a process cannot load the store while another has the log open"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path)
+
+        def work():
+            try:
+                store.create_user("Other", "other@example.com")
+            except LogLocked:
+                return True
+            return False
+
+        assert run_forked(work) == 0
+        assert store.create_user("Owner", "owner@example.com").id == 3
+        store.close()
+        users = [r["user"]["name"] for r in read_log(path) if r["op"] == "create_user"]
+        assert users == ["John Doe", "Jane Smith", "Owner"]
+
+    def test_lazy_store_is_not_loaded_before_use(self, tmp_path):
+        """Test a lazy store leaves the log alone until first used"""
+        path = str(tmp_path / "store.wal")
+        store = DataStore(wal_path=path, lazy=True)
+        assert not os.path.exists(path)
+        assert len(store.get_all_users()) == 2
+        store.close()
+
+    def test_create_storage_refuses_several_workers(self, tmp_path):
+        """Test the app's store refuses a log when gunicorn runs several workers"""
+        class Workers(Config):
+            DATA_STORE_BACKEND = 'memory'
+            DATA_STORE_WAL_PATH = str(tmp_path / "store.wal")
+            WEB_CONCURRENCY = 2
+
+        with pytest.raises(ValueError):
+            create_storage(Workers)
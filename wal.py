@@ -0,0 +1,199 @@
+"""
+Append-only write-ahead log for DataStore mutations.
+
+Every mutation is appended as one JSON line. Durability is controlled by the
+sync mode:
+
+- ``always``: each record is written and fsync'ed before `append` returns.
+- ``batch``: group commit. Records are buffered by `append`; callers then wait
+  in `commit`, where the first waiter writes every buffered record and issues
+  a single fsync on behalf of all of them.
+- ``none``: records are handed to the OS on commit without fsync.
+
+`append` is called while the store holds its write lock, so records are logged
+in the order they were applied; `commit` is called after the lock is released,
+so concurrent writers can share one fsync.
+
+A failed write or fsync fails the log for good: how much of the batch
+reached the disk is unknown, so no record from it is reported durable. The
+flushing caller gets the original error; writers waiting on the batch, and
+every later `append` or `commit` of an unsynced record, raise `LogFailed`.
+
+Recovery replays records up to the first torn or invalid line. The log is
+then cut back to the end of the last good record, so records appended
+afterwards are not hidden behind the bad line.
+
+Only one process may append to a log. Opening it takes an exclusive advisory
+lock on the file (where `fcntl` is available), and a second process opening
+the same path gets `LogLocked` instead of interleaving records whose ids
+collide with the first's.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+SYNC_MODES = ('always', 'batch', 'none')
+
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+class LogFailed(OSError):
+    """Raised once an earlier write or fsync of the log has failed."""
+
+
+class LogLocked(OSError):
+    """Raised when another process already has the log open."""
+
+
+class WriteAheadLog:
+    """Append-only JSON-lines log with per-op or group-commit fsync."""
+
+    def __init__(self, path: str, sync: str = 'batch'):
+        """Open `path` for appending, locking out every other process."""
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown WAL sync mode: {sync!r}")
+        self.path = path
+        self.sync = sync
+        self._file = open(path, 'ab')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._file.close()
+                raise LogLocked(f"Write-ahead log {path} is open in another process") from None
+        self._cond = threading.Condition(threading.Lock())
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._flushing = False
+        # First write or fsync error; once set, no more records become durable
+        self._error: Optional[BaseException] = None
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Log a record and return its sequence number."""
+        line = _encode(record).encode() + b'\n'
+        with self._cond:
+            self._check()
+            self._appended += 1
+            if self.sync == 'always':
+                try:
+                    self._file.write(line)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except BaseException as err:
+                    self._error = err
+                    raise
+                self._durable = self._appended
+            else:
+                self._buffer.append(line)
+            return self._appended
+
+    def _check(self):
+        """Raise LogFailed if an earlier write or fsync failed (lock held)."""
+        if self._error is not None:
+            raise LogFailed(f"Write-ahead log failed: {self._error}") from self._error
+
+    def commit(self, lsn: int):
+        """Block until every record up to `lsn` has been written (and synced)."""
+        with self._cond:
+            while self._durable < lsn:
+                self._check()
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                # Become the flusher for everything buffered so far
+                self._flushing = True
+                batch, self._buffer = self._buffer, []
+                target = self._appended
+                failed = None
+                self._cond.release()
+                try:
+                    self._file.write(b''.join(batch))
+                    self._file.flush()
+                    if self.sync == 'batch':
+                        os.fsync(self._file.fileno())
+                except BaseException as err:
+                    failed = err
+                    raise
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    if failed is None:
+                        self._durable = target
+                    else:
+                        # Waiters on this batch wake up to the error
+                        self._error = failed
+                    self._cond.notify_all()
+
+    def cut(self, length: int):
+        """Cut anything past `length` bytes (the valid prefix found by `iter_log`)."""
+        if os.fstat(self._file.fileno()).st_size > length:
+            self._file.truncate(length)
+            os.fsync(self._file.fileno())
+
+    @property
+    def last_lsn(self) -> int:
+        """Sequence number of the most recently appended record."""
+        return self._appended
+
+    def truncate(self):
+        """Flush pending records, then discard the whole log (after a snapshot)."""
+        self.commit(self._appended)
+        with self._cond:
+            self._file.truncate(0)
+            if self.sync != 'none':
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Flush pending records and close the log file."""
+        try:
+            self.commit(self._appended)
+        finally:
+            self._file.close()
+
+
+    def detach(self):
+        """
+        Close a log inherited through fork without writing anything: the
+        pending records, and the lock on the file, belong to the parent.
+        """
+        with self._cond:
+            self._buffer = []
+        self._file.close()
+
+
+def iter_log(path: str) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """
+    Yield the records of a log file in order, each with the byte offset just
+    past it.
+
+    Reading stops at a torn final line (left by a crash mid-write) or any
+    line that is not valid JSON; the last offset yielded is the length of
+    the valid prefix.
+    """
+    if not os.path.exists(path):
+        return
+    offset = 0
+    with open(path, 'rb') as log_file:
+        for line in log_file:
+            if not line.endswith(b'\n'):
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return
+            offset += len(line)
+            yield record, offset
+
+
+def read_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a log file in order, up to any torn or invalid line."""
+    for record, _ in iter_log(path):
+        yield record